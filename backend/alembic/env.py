@@ -12,8 +12,8 @@ from app.config import settings
 # Import all models to ensure they're registered
 from app.models import (
     Tenant, Agent, Session, Message,
-    UsageEvent, ProviderCall, ToolExecution,
-    VoiceArtifact, IdempotencyKey
+    UsageEvent, UsageRollup, ProviderCall, ToolExecution,
+    VoiceArtifact, IdempotencyKey, Invoice
 )
 
 # this is the Alembic Config object, which provides
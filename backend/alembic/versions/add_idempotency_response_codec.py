@@ -0,0 +1,35 @@
+"""Store idempotency responses as versioned codec blobs
+
+Revision ID: idempotency_codec_005
+Revises: message_cost_004
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'idempotency_codec_005'
+down_revision = 'message_cost_004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing rows keep their JSON text; a leading '{' marks them as legacy
+    # for app.utils.codec.decode()
+    op.execute(
+        "ALTER TABLE idempotency_keys ALTER COLUMN response TYPE BYTEA "
+        "USING convert_to(response::text, 'UTF8')"
+    )
+
+
+def downgrade() -> None:
+    # Compressed responses cannot go back into a JSON column; they are only
+    # a replay cache, so drop them
+    op.execute("DELETE FROM idempotency_keys WHERE get_byte(response, 0) <> 123")
+    op.execute(
+        "ALTER TABLE idempotency_keys ALTER COLUMN response TYPE JSON "
+        "USING convert_from(response, 'UTF8')::json"
+    )
@@ -0,0 +1,40 @@
+"""Add invoices table (database invoice backend)
+
+Revision ID: invoices_006
+Revises: idempotency_codec_005
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'invoices_006'
+down_revision = 'idempotency_codec_005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('invoices',
+    sa.Column('company_key', sa.String(length=100), nullable=False),
+    sa.Column('id', sa.String(length=64), nullable=False),
+    sa.Column('customer', sa.String(length=255), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('amount', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('due_date', sa.Date(), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('payment_date', sa.Date(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('company_key', 'id')
+    )
+    op.create_index('ix_invoices_company_customer', 'invoices', ['company_key', sa.text('lower(customer)')], unique=False)
+    op.create_index('ix_invoices_company_status', 'invoices', ['company_key', 'status'], unique=False)
+    # Load data: python scripts/load_invoices.py --target database ...
+
+
+def downgrade() -> None:
+    op.drop_index('ix_invoices_company_status', table_name='invoices')
+    op.drop_index('ix_invoices_company_customer', table_name='invoices')
+    op.drop_table('invoices')
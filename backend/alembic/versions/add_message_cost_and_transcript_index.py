@@ -0,0 +1,38 @@
+"""Add messages.cost_usd and (session_id, created_at, id) index
+
+Revision ID: message_cost_004
+Revises: usage_rollups_003
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'message_cost_004'
+down_revision = 'usage_rollups_003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('messages', sa.Column('cost_usd', sa.Numeric(precision=10, scale=6), nullable=True))
+    op.create_index('ix_messages_session_id_created_at', 'messages', ['session_id', 'created_at', 'id'], unique=False)
+
+    # Existing messages: take the cost already billed for them
+    op.execute("""
+        UPDATE messages SET cost_usd = billed.cost_usd
+        FROM (
+            SELECT message_id, SUM(cost_usd) AS cost_usd
+            FROM usage_events
+            WHERE message_id IS NOT NULL
+            GROUP BY message_id
+        ) AS billed
+        WHERE billed.message_id = messages.id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_messages_session_id_created_at', table_name='messages')
+    op.drop_column('messages', 'cost_usd')
@@ -0,0 +1,27 @@
+"""Mark tool executions served from the result cache
+
+Revision ID: tool_cached_007
+Revises: invoices_006
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'tool_cached_007'
+down_revision = 'invoices_006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'tool_executions',
+        sa.Column('cached', sa.Boolean(), server_default=sa.false(), nullable=False)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('tool_executions', 'cached')
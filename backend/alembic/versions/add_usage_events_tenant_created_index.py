@@ -0,0 +1,25 @@
+"""Add composite (tenant_id, created_at) index to usage_events
+
+Revision ID: usage_tenant_created_002
+Revises: add_company_key_001
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'usage_tenant_created_002'
+down_revision = 'add_company_key_001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Analytics aggregates a tenant's events over a date range
+    op.create_index('ix_usage_events_tenant_id_created_at', 'usage_events', ['tenant_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_usage_events_tenant_id_created_at', table_name='usage_events')
@@ -0,0 +1,45 @@
+"""Add usage_rollups table
+
+Revision ID: usage_rollups_003
+Revises: usage_tenant_created_002
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'usage_rollups_003'
+down_revision = 'usage_tenant_created_002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('usage_rollups',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('granularity', sa.String(length=10), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('tenant_id', sa.UUID(), nullable=False),
+    sa.Column('agent_id', sa.UUID(), nullable=False),
+    sa.Column('provider', sa.String(length=50), nullable=False),
+    sa.Column('event_type', sa.String(length=50), nullable=False),
+    sa.Column('tokens_in', sa.BigInteger(), nullable=False),
+    sa.Column('tokens_out', sa.BigInteger(), nullable=False),
+    sa.Column('cost_usd', sa.Numeric(precision=14, scale=6), nullable=False),
+    sa.Column('message_count', sa.Integer(), nullable=False),
+    sa.Column('session_sketch', sa.LargeBinary(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['agent_id'], ['agents.id'], ),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('granularity', 'bucket_start', 'tenant_id', 'agent_id', 'provider', 'event_type', name='uq_usage_rollups_bucket')
+    )
+    op.create_index('ix_usage_rollups_tenant_bucket', 'usage_rollups', ['tenant_id', 'granularity', 'bucket_start'], unique=False)
+    # Backfill from existing history: python scripts/rebuild_usage_rollups.py
+
+
+def downgrade() -> None:
+    op.drop_index('ix_usage_rollups_tenant_bucket', table_name='usage_rollups')
+    op.drop_table('usage_rollups')
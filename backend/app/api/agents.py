@@ -1,36 +1,53 @@
 """
 Agent API endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from uuid import UUID
 
 from app.models.tenant import Tenant
 from app.models.agent import Agent
 from app.schemas.agent import AgentCreate, AgentUpdate, AgentResponse
-from app.utils.database import get_db
+from app.utils.database import get_async_db
 from app.middleware.auth import get_current_tenant
 from app.middleware.error_handler import NotFoundException
+from app.utils.etag import weak_etag, etag_matches, not_modified, set_etag
 
 router = APIRouter()
 
 
 @router.get("", response_model=List[AgentResponse])
 async def list_agents(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     tenant: Tenant = Depends(get_current_tenant),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """List all agents for the current tenant"""
-    agents = db.query(Agent).filter(Agent.tenant_id == tenant.id).all()
-    return agents
+    """
+    List all agents for the current tenant
+
+    Weak ETag over the agent count and newest updated_at; a matching
+    If-None-Match gets a 304 without loading the agents.
+    """
+    count, last_updated = (await db.execute(
+        select(func.count(Agent.id), func.max(Agent.updated_at)).where(Agent.tenant_id == tenant.id)
+    )).one()
+    etag = weak_etag(tenant.id, count, last_updated.isoformat() if last_updated else None)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
+    result = await db.execute(select(Agent).where(Agent.tenant_id == tenant.id))
+    return result.scalars().all()
 
 
 @router.post("", response_model=AgentResponse, status_code=201)
 async def create_agent(
     agent_data: AgentCreate,
     tenant: Tenant = Depends(get_current_tenant),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new agent"""
     agent = Agent(
@@ -44,8 +61,8 @@ async def create_agent(
     )
 
     db.add(agent)
-    db.commit()
-    db.refresh(agent)
+    await db.commit()
+    await db.refresh(agent)
 
     return agent
 
@@ -53,18 +70,26 @@ async def create_agent(
 @router.get("/{agent_id}", response_model=AgentResponse)
 async def get_agent(
     agent_id: UUID,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     tenant: Tenant = Depends(get_current_tenant),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get agent by ID"""
-    agent = db.query(Agent).filter(
+    """Get agent by ID (weak ETag over updated_at)"""
+    result = await db.execute(select(Agent).where(
         Agent.id == agent_id,
         Agent.tenant_id == tenant.id
-    ).first()
+    ))
+    agent = result.scalars().first()
 
     if not agent:
         raise NotFoundException("Agent not found")
 
+    etag = weak_etag(agent.id, agent.updated_at.isoformat())
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
     return agent
 
 
@@ -73,13 +98,14 @@ async def update_agent(
     agent_id: UUID,
     agent_data: AgentUpdate,
     tenant: Tenant = Depends(get_current_tenant),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update agent"""
-    agent = db.query(Agent).filter(
+    result = await db.execute(select(Agent).where(
         Agent.id == agent_id,
         Agent.tenant_id == tenant.id
-    ).first()
+    ))
+    agent = result.scalars().first()
 
     if not agent:
         raise NotFoundException("Agent not found")
@@ -89,8 +115,8 @@ async def update_agent(
     for field, value in update_data.items():
         setattr(agent, field, value)
 
-    db.commit()
-    db.refresh(agent)
+    await db.commit()
+    await db.refresh(agent)
 
     return agent
 
@@ -99,18 +125,19 @@ async def update_agent(
 async def delete_agent(
     agent_id: UUID,
     tenant: Tenant = Depends(get_current_tenant),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete agent"""
-    agent = db.query(Agent).filter(
+    result = await db.execute(select(Agent).where(
         Agent.id == agent_id,
         Agent.tenant_id == tenant.id
-    ).first()
+    ))
+    agent = result.scalars().first()
 
     if not agent:
         raise NotFoundException("Agent not found")
 
-    db.delete(agent)
-    db.commit()
+    await db.delete(agent)
+    await db.commit()
 
     return None
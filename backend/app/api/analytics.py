@@ -2,105 +2,296 @@
 Analytics API endpoints
 """
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session as DBSession
-from sqlalchemy import func
-from datetime import datetime, date
-from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, func, or_, select
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Tuple
 from decimal import Decimal
+from collections import defaultdict
 
 from app.models.tenant import Tenant
 from app.models.agent import Agent
 from app.models.session import Session
-from app.models.usage import UsageEvent
-from app.schemas.analytics import UsageAnalytics, ProviderStats, TopAgentsResponse, TopAgent
-from app.utils.database import get_db
+from app.models.usage import UsageRollup
+from app.schemas.analytics import (
+    UsageAnalytics, ProviderStats, TopAgentsResponse, TopAgent, UsageTimeseries, UsageSeries
+)
+from app.utils.database import get_async_db
+from app.utils.cache import TTLCache
 from app.middleware.auth import get_current_tenant
+from app.middleware.error_handler import BadRequestException
+from app.services.billing.rollups import count_sessions, month_after
+from app.config import settings
 
 router = APIRouter()
 
+# (tenant_id, bucket, group_by, start_date, end_date) -> UsageTimeseries
+timeseries_cache = TTLCache(
+    max_size=settings.ANALYTICS_CACHE_MAX_SIZE,
+    ttl_seconds=settings.ANALYTICS_CACHE_TTL_SECONDS
+)
+
+BUCKET_SIZES = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+DEFAULT_RANGE_DAYS = {"hour": 7, "day": 30}
+
+
+def _usage_range(start_date: Optional[date], end_date: Optional[date]) -> Tuple[date, date]:
+    """
+    Resolve an (inclusive) date range, defaulting to the last 30 days
+
+    Ranges longer than ANALYTICS_MAX_RANGE_DAYS are rejected so a read stays
+    bounded however long the history is.
+    """
+    end_date = end_date or datetime.utcnow().date()
+    start_date = start_date or end_date - timedelta(days=DEFAULT_RANGE_DAYS["day"] - 1)
+    if start_date > end_date:
+        raise BadRequestException("start_date must not be after end_date")
+    days = (end_date - start_date).days + 1
+    if days > settings.ANALYTICS_MAX_RANGE_DAYS:
+        raise BadRequestException(
+            f"Range has {days} days; the maximum is {settings.ANALYTICS_MAX_RANGE_DAYS}"
+        )
+    return start_date, end_date
+
+
+def _rollup_filters(tenant_id, start_date: date, end_date: date) -> list:
+    """
+    WHERE clauses for a tenant's rollups covering an (inclusive) date range
+
+    Whole months are read from the monthly rollups and the partial months at
+    either end from the daily ones, so a range touches at most ~12 + 62 rows
+    per tenant x agent x provider x event_type.
+    """
+    range_start = datetime.combine(start_date, datetime.min.time())
+    range_end = datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+    months_start = range_start
+    if start_date.day != 1:
+        months_start = datetime.combine(month_after(start_date), datetime.min.time())
+    months_end = range_end.replace(day=1)
+
+    if months_start >= months_end:
+        covered = and_(
+            UsageRollup.granularity == "day",
+            UsageRollup.bucket_start >= range_start,
+            UsageRollup.bucket_start < range_end
+        )
+    else:
+        covered = or_(
+            and_(
+                UsageRollup.granularity == "month",
+                UsageRollup.bucket_start >= months_start,
+                UsageRollup.bucket_start < months_end
+            ),
+            and_(
+                UsageRollup.granularity == "day",
+                or_(
+                    and_(UsageRollup.bucket_start >= range_start, UsageRollup.bucket_start < months_start),
+                    and_(UsageRollup.bucket_start >= months_end, UsageRollup.bucket_start < range_end)
+                )
+            )
+        )
+    return [UsageRollup.tenant_id == tenant_id, covered]
+
+
+def _sessions_by(rows) -> Dict:
+    """Merge (key, session_sketch) rows into distinct session counts per key"""
+    sketches = defaultdict(list)
+    for key, sketch in rows:
+        sketches[key].append(sketch)
+    return {key: count_sessions(group) for key, group in sketches.items()}
+
 
 @router.get("/usage", response_model=UsageAnalytics)
 async def get_usage_analytics(
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
     tenant: Tenant = Depends(get_current_tenant),
-    db: DBSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Get usage analytics for a date range
+    Get usage analytics for a date range (default: the last 30 days)
+
+    Read from the monthly and daily usage rollups; session counts merge the
+    rollups' distinct-session sketches.
     """
-    query = db.query(UsageEvent).filter(UsageEvent.tenant_id == tenant.id)
+    start_date, end_date = _usage_range(start_date, end_date)
+    filters = _rollup_filters(tenant.id, start_date, end_date)
+
+    # Breakdown by provider
+    provider_rows = (await db.execute(
+        select(
+            UsageRollup.provider,
+            func.sum(UsageRollup.message_count),
+            func.sum(UsageRollup.tokens_in),
+            func.sum(UsageRollup.tokens_out),
+            func.sum(UsageRollup.cost_usd)
+        ).where(*filters).group_by(UsageRollup.provider)
+    )).all()
 
-    if start_date:
-        query = query.filter(UsageEvent.created_at >= start_date)
-    if end_date:
-        query = query.filter(UsageEvent.created_at <= end_date)
+    sketch_rows = (await db.execute(
+        select(UsageRollup.provider, UsageRollup.session_sketch).where(*filters)
+    )).all()
+    provider_sessions = _sessions_by(sketch_rows)
 
-    usage_events = query.all()
+    provider_breakdown = {
+        provider: ProviderStats(
+            sessions=provider_sessions[provider],
+            tokens_in=tokens_in,
+            tokens_out=tokens_out,
+            cost_usd=Decimal(cost_usd)
+        )
+        for provider, _, tokens_in, tokens_out, cost_usd in provider_rows
+    }
 
     # Calculate totals
-    total_sessions = db.query(func.count(func.distinct(UsageEvent.session_id))).filter(
-        UsageEvent.tenant_id == tenant.id
-    ).scalar() or 0
+    return UsageAnalytics(
+        total_sessions=count_sessions(sketch for _, sketch in sketch_rows),
+        total_messages=sum(int(r[1]) for r in provider_rows),
+        total_tokens_in=sum(int(r[2]) for r in provider_rows),
+        total_tokens_out=sum(int(r[3]) for r in provider_rows),
+        total_cost_usd=sum((Decimal(r[4]) for r in provider_rows), Decimal(0)),
+        breakdown_by_provider=provider_breakdown
+    )
 
-    total_tokens_in = sum(e.tokens_in for e in usage_events)
-    total_tokens_out = sum(e.tokens_out for e in usage_events)
-    total_cost = sum(e.cost_usd for e in usage_events)
 
-    # Breakdown by provider
-    provider_breakdown = {}
-    for provider in ['vendorA', 'vendorB']:
-        provider_events = [e for e in usage_events if e.provider == provider]
-        if provider_events:
-            provider_breakdown[provider] = ProviderStats(
-                sessions=len(set(e.session_id for e in provider_events)),
-                tokens_in=sum(e.tokens_in for e in provider_events),
-                tokens_out=sum(e.tokens_out for e in provider_events),
-                cost_usd=Decimal(sum(e.cost_usd for e in provider_events))
+@router.get("/usage/timeseries", response_model=UsageTimeseries)
+async def get_usage_timeseries(
+    bucket: str = Query("day", pattern="^(hour|day)$"),
+    group_by: str = Query("provider", pattern="^(provider|agent)$"),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    tenant: Tenant = Depends(get_current_tenant),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get usage per hour/day bucket, one series per provider or agent
+
+    Read from the rollups matching the bucket size. Every series has a value
+    for every bucket in [start_date, end_date] (zero where there was no
+    usage). Defaults to the last 7 days for hourly and 30 days for daily
+    buckets. Responses are cached per tenant and range for
+    ANALYTICS_CACHE_TTL_SECONDS.
+    """
+    end_date = end_date or datetime.utcnow().date()
+    start_date = start_date or end_date - timedelta(days=DEFAULT_RANGE_DAYS[bucket] - 1)
+    if start_date > end_date:
+        raise BadRequestException("start_date must not be after end_date")
+
+    cache_key = (tenant.id, bucket, group_by, start_date, end_date)
+    cached = timeseries_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    step = BUCKET_SIZES[bucket]
+    range_start = datetime.combine(start_date, datetime.min.time())
+    range_end = datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+    bucket_count = int((range_end - range_start) / step)
+    if bucket_count > settings.ANALYTICS_TIMESERIES_MAX_POINTS:
+        raise BadRequestException(
+            f"Range has {bucket_count} {bucket} buckets; the maximum is {settings.ANALYTICS_TIMESERIES_MAX_POINTS}"
+        )
+
+    key_column = UsageRollup.provider if group_by == "provider" else UsageRollup.agent_id
+    rows = (await db.execute(
+        select(
+            UsageRollup.bucket_start,
+            key_column,
+            func.sum(UsageRollup.message_count),
+            func.sum(UsageRollup.tokens_in),
+            func.sum(UsageRollup.tokens_out),
+            func.sum(UsageRollup.cost_usd)
+        ).where(
+            UsageRollup.tenant_id == tenant.id,
+            UsageRollup.granularity == bucket,
+            UsageRollup.bucket_start >= range_start,
+            UsageRollup.bucket_start < range_end
+        ).group_by(UsageRollup.bucket_start, key_column)
+    )).all()
+
+    buckets = [range_start + i * step for i in range(bucket_count)]
+    position = {value: i for i, value in enumerate(buckets)}
+    series: Dict = {}
+    for bucket_start, key, messages, tokens_in, tokens_out, cost_usd in rows:
+        values = series.get(key)
+        if values is None:
+            values = series[key] = UsageSeries(
+                key=str(key),
+                label=str(key),
+                messages=[0] * bucket_count,
+                tokens_in=[0] * bucket_count,
+                tokens_out=[0] * bucket_count,
+                cost_usd=[Decimal(0)] * bucket_count
             )
+        i = position[bucket_start]
+        values.messages[i] = int(messages)
+        values.tokens_in[i] = int(tokens_in)
+        values.tokens_out[i] = int(tokens_out)
+        values.cost_usd[i] = Decimal(cost_usd)
 
-    return UsageAnalytics(
-        total_sessions=total_sessions,
-        total_messages=len(usage_events),
-        total_tokens_in=total_tokens_in,
-        total_tokens_out=total_tokens_out,
-        total_cost_usd=Decimal(total_cost),
-        breakdown_by_provider=provider_breakdown
+    if group_by == "agent" and series:
+        names = (await db.execute(
+            select(Agent.id, Agent.name).where(Agent.id.in_(list(series)))
+        )).all()
+        for agent_id, name in names:
+            series[agent_id].label = name
+
+    response = UsageTimeseries(
+        bucket=bucket,
+        group_by=group_by,
+        buckets=buckets,
+        series=sorted(series.values(), key=lambda s: s.label)
     )
+    timeseries_cache.set(cache_key, response)
+    return response
 
 
 @router.get("/top-agents", response_model=TopAgentsResponse)
 async def get_top_agents(
     limit: int = Query(10, ge=1, le=50),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
     tenant: Tenant = Depends(get_current_tenant),
-    db: DBSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Get top agents by cost
+    Get top agents by cost for a date range (default: the last 30 days)
     """
-    results = db.query(
-        Agent.id,
-        Agent.name,
-        func.count(func.distinct(UsageEvent.session_id)).label('total_sessions'),
-        func.sum(UsageEvent.cost_usd).label('total_cost'),
-        func.sum(UsageEvent.tokens_in + UsageEvent.tokens_out).label('total_tokens')
-    ).join(
-        UsageEvent, Agent.id == UsageEvent.agent_id
-    ).filter(
-        Agent.tenant_id == tenant.id
-    ).group_by(
-        Agent.id, Agent.name
-    ).order_by(
-        func.sum(UsageEvent.cost_usd).desc()
-    ).limit(limit).all()
+    start_date, end_date = _usage_range(start_date, end_date)
+    filters = _rollup_filters(tenant.id, start_date, end_date)
+
+    results = (await db.execute(
+        select(
+            Agent.id,
+            Agent.name,
+            func.sum(UsageRollup.cost_usd).label('total_cost'),
+            func.sum(UsageRollup.tokens_in + UsageRollup.tokens_out).label('total_tokens')
+        ).join(
+            UsageRollup, Agent.id == UsageRollup.agent_id
+        ).where(
+            *filters
+        ).group_by(
+            Agent.id, Agent.name
+        ).order_by(
+            func.sum(UsageRollup.cost_usd).desc()
+        ).limit(limit)
+    )).all()
+
+    agent_sessions = {}
+    if results:
+        agent_sessions = _sessions_by((await db.execute(
+            select(UsageRollup.agent_id, UsageRollup.session_sketch).where(
+                *filters,
+                UsageRollup.agent_id.in_([r[0] for r in results])
+            )
+        )).all())
 
     agents = [
         TopAgent(
             agent_id=r[0],
             agent_name=r[1],
-            total_sessions=r[2],
-            total_cost_usd=Decimal(r[3] or 0),
-            total_tokens=r[4] or 0
+            total_sessions=agent_sessions.get(r[0], 0),
+            total_cost_usd=Decimal(r[2] or 0),
+            total_tokens=r[3] or 0
         )
         for r in results
     ]
@@ -0,0 +1,81 @@
+"""
+Ops API endpoints - in-process reliability and cache state
+
+State is per worker process; each worker reports its own view.
+"""
+from fastapi import APIRouter
+
+from app.schemas.ops import (
+    CircuitBreakersResponse, CircuitBreakerStatus, RetryBudgetStatus,
+    LatencyResponse, ProviderLatency, CachesResponse, CacheStats, IdempotencySweeperStatus
+)
+from app.services.reliability.circuit_breaker import get_all_circuit_breakers
+from app.services.reliability.retry_budget import retry_budget
+from app.services.reliability.latency import get_all_latency_windows, latency_snapshot
+from app.middleware.auth import tenant_cache
+from app.api.analytics import timeseries_cache
+from app.services.idempotency_sweeper import idempotency_sweeper
+from app.services.history import history_cache
+from app.services.response_cache import response_cache
+from app.services.tools.result_cache import tool_result_cache
+
+router = APIRouter()
+
+
+@router.get("/circuit-breakers", response_model=CircuitBreakersResponse)
+async def get_circuit_breakers():
+    """
+    Get circuit breaker state for every provider called so far
+    """
+    breakers = get_all_circuit_breakers()
+    return CircuitBreakersResponse(
+        circuit_breakers=[
+            CircuitBreakerStatus(**breaker.snapshot())
+            for breaker in breakers.values()
+        ]
+    )
+
+
+@router.get("/retry-budget", response_model=RetryBudgetStatus)
+async def get_retry_budget():
+    """
+    Get the vendor retry budget window and counters
+    """
+    return RetryBudgetStatus(**retry_budget.snapshot())
+
+
+@router.get("/latency", response_model=LatencyResponse)
+async def get_latency():
+    """
+    Get recent latency percentiles and the current adaptive timeout per provider
+    """
+    return LatencyResponse(
+        providers=[
+            ProviderLatency(**latency_snapshot(provider))
+            for provider in get_all_latency_windows()
+        ]
+    )
+
+
+@router.get("/caches", response_model=CachesResponse)
+async def get_caches():
+    """
+    Get hit/miss counters for in-process caches
+    """
+    return CachesResponse(
+        caches={
+            "tenant": CacheStats(**tenant_cache.stats()),
+            "analytics_timeseries": CacheStats(**timeseries_cache.stats()),
+            "conversation_history": CacheStats(**history_cache.stats()),
+            "response_cache": CacheStats(**response_cache.local.stats()),
+            "tool_results": CacheStats(**tool_result_cache.stats())
+        }
+    )
+
+
+@router.get("/idempotency-sweeper", response_model=IdempotencySweeperStatus)
+async def get_idempotency_sweeper():
+    """
+    Get counters for the expired idempotency key sweeper
+    """
+    return IdempotencySweeperStatus(**idempotency_sweeper.snapshot())
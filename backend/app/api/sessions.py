@@ -1,20 +1,32 @@
 """
 Session and Message API endpoints
 """
-from fastapi import APIRouter, Depends, Request
-from sqlalchemy.orm import Session as DBSession
-from typing import Optional
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Optional, Tuple
 from uuid import UUID
 
 from app.models.tenant import Tenant
 from app.models.agent import Agent
 from app.models.session import Session, Message
 from app.schemas.session import SessionCreate, SessionResponse, MessageCreate, MessageResponse
-from app.utils.database import get_db
+from app.utils.database import get_async_db, AsyncSessionLocal
 from app.middleware.auth import get_current_tenant
-from app.middleware.error_handler import NotFoundException
+from app.middleware.error_handler import NotFoundException, AppException, BadRequestException
 from app.api.deps import get_correlation_id, get_idempotency_key
 from app.services.message_handler import MessageHandler
+from app.services.request_context import load_request_context
+from app.utils.etag import weak_etag, etag_matches, not_modified, set_etag
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 router = APIRouter()
 
@@ -23,14 +35,15 @@ router = APIRouter()
 async def create_session(
     session_data: SessionCreate,
     tenant: Tenant = Depends(get_current_tenant),
-    db: DBSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new conversation session"""
     # Verify agent belongs to tenant
-    agent = db.query(Agent).filter(
+    result = await db.execute(select(Agent).where(
         Agent.id == session_data.agent_id,
         Agent.tenant_id == tenant.id
-    ).first()
+    ))
+    agent = result.scalars().first()
 
     if not agent:
         raise NotFoundException("Agent not found")
@@ -40,50 +53,96 @@ async def create_session(
         agent_id=session_data.agent_id,
         customer_id=session_data.customer_id,
         channel=session_data.channel,
-        metadata=session_data.metadata
+        session_metadata=session_data.metadata
     )
 
     db.add(session)
-    db.commit()
-    db.refresh(session)
+    await db.commit()
+    await db.refresh(session)
 
-    return session
+    # Built explicitly: a new session has no messages, and lazy-loading the
+    # relationship is not possible on an AsyncSession
+    return SessionResponse(
+        id=session.id,
+        tenant_id=session.tenant_id,
+        agent_id=session.agent_id,
+        customer_id=session.customer_id,
+        channel=session.channel,
+        metadata=session.session_metadata or {},
+        created_at=session.created_at,
+        messages=[]
+    )
+
+
+def _encode_cursor(message: Message) -> str:
+    """Opaque cursor pointing just after a message"""
+    raw = f"{message.created_at.isoformat()}|{message.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    try:
+        created_at, message_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), UUID(message_id)
+    except ValueError:
+        raise BadRequestException("Invalid cursor")
 
 
 @router.get("/{session_id}", response_model=SessionResponse)
 async def get_session(
     session_id: UUID,
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    after: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    if_none_match: Optional[str] = Header(None),
     tenant: Tenant = Depends(get_current_tenant),
-    db: DBSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get session with full transcript"""
-    session = db.query(Session).filter(
+    """
+    Get session with a page of its transcript
+
+    Messages are ordered by (created_at, id) and paged with a keyset
+    cursor; next_cursor is set while more messages remain.
+
+    Carries a weak ETag over the session's updated_at, its latest message
+    and the page parameters; a matching If-None-Match gets a 304 before
+    any messages are loaded.
+    """
+    result = await db.execute(select(Session).where(
         Session.id == session_id,
         Session.tenant_id == tenant.id
-    ).first()
+    ))
+    session = result.scalars().first()
 
     if not session:
         raise NotFoundException("Session not found")
 
-    # Load messages
-    messages = db.query(Message).filter(
-        Message.session_id == session_id
-    ).order_by(Message.created_at).all()
-
-    # Convert messages to MessageResponse with cost calculation
-    from app.services.billing.metering import calculate_cost
-    message_responses = []
-    for msg in messages:
-        # Calculate cost if tokens are available
-        cost_usd = "0.000000"
-        if msg.tokens_in and msg.tokens_out and msg.provider_used:
-            cost_usd = str(calculate_cost(
-                provider=msg.provider_used,
-                tokens_in=msg.tokens_in,
-                tokens_out=msg.tokens_out
-            ))
-
-        message_responses.append(MessageResponse(
+    # Messages are append-only, so the newest one versions the transcript
+    latest_message_id = (await db.execute(
+        select(Message.id).where(
+            Message.session_id == session_id
+        ).order_by(Message.created_at.desc(), Message.id.desc()).limit(1)
+    )).scalar()
+    etag = weak_etag(session.id, session.updated_at.isoformat(), latest_message_id, limit, after)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
+    # Load one page of messages (one extra row tells us if there is more)
+    query = select(Message).where(Message.session_id == session_id)
+    if after:
+        query = query.where(tuple_(Message.created_at, Message.id) > _decode_cursor(after))
+    messages = (await db.execute(
+        query.order_by(Message.created_at, Message.id).limit(limit + 1)
+    )).scalars().all()
+
+    next_cursor = None
+    if len(messages) > limit:
+        messages = messages[:limit]
+        next_cursor = _encode_cursor(messages[-1])
+
+    message_responses = [
+        MessageResponse(
             id=msg.id,
             session_id=msg.session_id,
             role=msg.role,
@@ -94,9 +153,11 @@ async def get_session(
             latency_ms=msg.latency_ms,
             tools_called=msg.tools_called,
             correlation_id=msg.correlation_id,
-            cost_usd=cost_usd,
+            cost_usd=msg.cost_usd if msg.cost_usd is not None else Decimal("0.000000"),
             created_at=msg.created_at
-        ))
+        )
+        for msg in messages
+    ]
 
     return SessionResponse(
         id=session.id,
@@ -106,7 +167,8 @@ async def get_session(
         channel=session.channel,
         metadata=session.session_metadata or {},
         created_at=session.created_at,
-        messages=message_responses
+        messages=message_responses,
+        next_cursor=next_cursor
     )
 
 
@@ -116,29 +178,81 @@ async def send_message(
     message_data: MessageCreate,
     request: Request,
     tenant: Tenant = Depends(get_current_tenant),
-    db: DBSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     correlation_id: Optional[str] = Depends(get_correlation_id),
     idempotency_key: Optional[str] = Depends(get_idempotency_key)
 ):
     """Send a message in a session"""
-    from app.utils.logger import get_logger
-    logger = get_logger(__name__)
-
     try:
-        # Verify session belongs to tenant
-        session = db.query(Session).filter(
-            Session.id == session_id,
-            Session.tenant_id == tenant.id
-        ).first()
+        # Verify session belongs to tenant (loaded with its agent, once per request)
+        context = await load_request_context(db, tenant, session_id, correlation_id)
 
-        if not session:
+        if not context:
             raise NotFoundException("Session not found")
 
         # Use MessageHandler to process the message
-        handler = MessageHandler(db, tenant.id, session, correlation_id)
-        response = await handler.handle_message(message_data.content, idempotency_key)
+        handler = MessageHandler(db, context)
+        response = await handler.handle_message(message_data.content, idempotency_key, raw_replay=True)
 
+        if isinstance(response, bytes):
+            # Idempotent replay: already-serialized MessageResponse
+            return Response(content=response, media_type="application/json", status_code=201)
         return response
     except Exception as e:
         logger.error(f"Error in send_message: {type(e).__name__}: {str(e)}", exc_info=True)
         raise
+
+
+def _sse(event: str, data: Any) -> str:
+    """Format one Server-Sent Event"""
+    if isinstance(data, bytes):
+        payload = data.decode()
+    elif isinstance(data, BaseModel):
+        payload = data.model_dump_json()
+    else:
+        payload = json.dumps(data)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+@router.post("/{session_id}/messages/stream")
+async def stream_message(
+    session_id: UUID,
+    message_data: MessageCreate,
+    tenant: Tenant = Depends(get_current_tenant),
+    db: AsyncSession = Depends(get_async_db),
+    correlation_id: Optional[str] = Depends(get_correlation_id),
+    idempotency_key: Optional[str] = Depends(get_idempotency_key)
+):
+    """
+    Send a message in a session and stream the reply as Server-Sent Events
+
+    Events: `delta` ({"text": ...}) per chunk, then `message` with the
+    persisted MessageResponse, or `error` if the turn failed.
+    """
+    context = await load_request_context(db, tenant, session_id, correlation_id)
+
+    if not context:
+        raise NotFoundException("Session not found")
+
+    # The stream outlives this request's session; release its connection and
+    # give the stream its own session (the context's entities stay readable)
+    await db.commit()
+
+    async def event_stream():
+        async with AsyncSessionLocal() as stream_db:
+            handler = MessageHandler(stream_db, context)
+            try:
+                async for event, data in handler.stream_message(message_data.content, idempotency_key):
+                    yield _sse(event, data)
+            except Exception as e:
+                logger.error(f"Error in stream_message: {type(e).__name__}: {str(e)}", exc_info=True)
+                yield _sse("error", {
+                    "error": e.message if isinstance(e, AppException) else "An unexpected error occurred",
+                    "correlation_id": correlation_id
+                })
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -2,11 +2,11 @@
 Tenant API endpoints
 """
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.tenant import Tenant
 from app.schemas.tenant import TenantCreate, TenantResponse
-from app.utils.database import get_db
+from app.utils.database import get_async_db
 from app.middleware.auth import generate_api_key
 
 router = APIRouter()
@@ -15,7 +15,7 @@ router = APIRouter()
 @router.post("", response_model=TenantResponse, status_code=201)
 async def create_tenant(
     tenant_data: TenantCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new tenant and issue an API key
@@ -28,7 +28,7 @@ async def create_tenant(
     )
 
     db.add(tenant)
-    db.commit()
-    db.refresh(tenant)
+    await db.commit()
+    await db.refresh(tenant)
 
     return tenant
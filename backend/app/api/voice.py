@@ -2,17 +2,19 @@
 Voice API endpoints - Speech-to-Text and Text-to-Speech
 """
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Response
-from sqlalchemy.orm import Session as DBSession
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from uuid import UUID
 
 from app.models.tenant import Tenant
 from app.models.session import Session
 from app.models.voice import VoiceArtifact
-from app.utils.database import get_db
+from app.utils.database import get_async_db
 from app.middleware.auth import get_current_tenant
 from app.middleware.error_handler import NotFoundException
 from app.api.deps import get_correlation_id, get_idempotency_key
+from app.services.request_context import load_request_context
 from app.services.voice.handler import VoiceMessageHandler
 from app.config import settings
 
@@ -24,7 +26,7 @@ async def send_voice_message(
     session_id: UUID,
     audio_file: UploadFile = File(..., description="Audio file (wav, mp3, m4a, etc.)"),
     tenant: Tenant = Depends(get_current_tenant),
-    db: DBSession = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     correlation_id: Optional[str] = Depends(get_correlation_id),
     idempotency_key: Optional[str] = Depends(get_idempotency_key)
 ):
@@ -42,14 +44,12 @@ async def send_voice_message(
     - JSON with transcription, message details, and audio download URL
     - Or direct audio file (set Accept: audio/mp3)
     """
-    # Verify session belongs to tenant
-    session = db.query(Session).filter(
-        Session.id == session_id,
-        Session.tenant_id == tenant.id
-    ).first()
+    # Verify session belongs to tenant (loaded with its agent, once per request)
+    context = await load_request_context(db, tenant, session_id, correlation_id)
 
-    if not session:
+    if not context:
         raise NotFoundException("Session not found")
+    session = context.session
 
     # Check if session is voice channel
     if session.channel != "voice":
@@ -71,7 +71,7 @@ async def send_voice_message(
     await audio_file.seek(0)
 
     # Process voice message
-    handler = VoiceMessageHandler(db, tenant.id, session, correlation_id)
+    handler = VoiceMessageHandler(db, context)
 
     result = await handler.handle_voice_message(
         audio_file=audio_file.file,
@@ -97,7 +97,7 @@ async def download_voice_audio(
     session_id: UUID,
     message_id: UUID,
     tenant: Tenant = Depends(get_current_tenant),
-    db: DBSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Download audio artifact for a message
@@ -105,20 +105,22 @@ async def download_voice_audio(
     Returns the audio file (mp3) for the assistant's response
     """
     # Verify session belongs to tenant
-    session = db.query(Session).filter(
+    result = await db.execute(select(Session).where(
         Session.id == session_id,
         Session.tenant_id == tenant.id
-    ).first()
+    ))
+    session = result.scalars().first()
 
     if not session:
         raise NotFoundException("Session not found")
 
     # Find audio artifact
-    artifact = db.query(VoiceArtifact).filter(
+    result = await db.execute(select(VoiceArtifact).where(
         VoiceArtifact.session_id == session_id,
         VoiceArtifact.message_id == message_id,
         VoiceArtifact.artifact_type == "audio_out"
-    ).first()
+    ))
+    artifact = result.scalars().first()
 
     if not artifact:
         raise NotFoundException("Audio artifact not found")
@@ -137,7 +139,7 @@ async def download_voice_audio(
 async def list_voice_artifacts(
     session_id: UUID,
     tenant: Tenant = Depends(get_current_tenant),
-    db: DBSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     List all voice artifacts for a session
@@ -145,18 +147,21 @@ async def list_voice_artifacts(
     Returns both incoming (user) and outgoing (assistant) audio artifacts
     """
     # Verify session belongs to tenant
-    session = db.query(Session).filter(
+    result = await db.execute(select(Session).where(
         Session.id == session_id,
         Session.tenant_id == tenant.id
-    ).first()
+    ))
+    session = result.scalars().first()
 
     if not session:
         raise NotFoundException("Session not found")
 
     # Get all artifacts
-    artifacts = db.query(VoiceArtifact).filter(
-        VoiceArtifact.session_id == session_id
-    ).order_by(VoiceArtifact.created_at).all()
+    artifacts = (await db.execute(
+        select(VoiceArtifact).where(
+            VoiceArtifact.session_id == session_id
+        ).order_by(VoiceArtifact.created_at)
+    )).scalars().all()
 
     return [
         {
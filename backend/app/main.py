@@ -2,23 +2,59 @@
 VocalBridge Ops - Main FastAPI Application
 Multi-Tenant Agent Gateway
 """
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
 from app.middleware.correlation_id import CorrelationIDMiddleware
 from app.middleware.error_handler import add_exception_handlers
-from app.api import tenants, agents, sessions, analytics, voice
+from app.api import tenants, agents, sessions, analytics, voice, ops
 from app.utils.logger import setup_logging
+from app.utils.database import async_engine
+from app.utils.redis_client import close_redis
+from app.services.idempotency_sweeper import idempotency_sweeper
+from app.services.invoices.factory import close_invoice_backend
+from app.services.vendors.factory import close_vendor_adapters
+from app.services.voice.stt import stt_service
+from app.services.voice.tts import tts_service
 
 # Setup logging
 setup_logging()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Application startup/shutdown
+    """
+    sweeper = None
+    if settings.IDEMPOTENCY_SWEEP_ENABLED:
+        sweeper = asyncio.create_task(idempotency_sweeper.run_forever())
+
+    yield
+
+    if sweeper:
+        sweeper.cancel()
+        with suppress(asyncio.CancelledError):
+            await sweeper
+
+    # Release shared vendor connection pools and DB connections
+    await close_vendor_adapters()
+    await stt_service.aclose()
+    await tts_service.aclose()
+    await close_invoice_backend()
+    await close_redis()
+    await async_engine.dispose()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="VocalBridge Ops",
     description="Multi-Tenant Agent Gateway",
     version="1.0.0",
-    debug=settings.DEBUG
+    debug=settings.DEBUG,
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -28,7 +64,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["X-Correlation-ID"],
+    expose_headers=["X-Correlation-ID", "ETag"],
 )
 
 # Add correlation ID middleware
@@ -43,6 +79,7 @@ app.include_router(agents.router, prefix="/api/agents", tags=["Agents"])
 app.include_router(sessions.router, prefix="/api/sessions", tags=["Sessions"])
 app.include_router(analytics.router, prefix="/api/analytics", tags=["Analytics"])
 app.include_router(voice.router, prefix="/api/sessions", tags=["Voice"])
+app.include_router(ops.router, prefix="/api/ops", tags=["Ops"])
 
 
 @app.get("/")
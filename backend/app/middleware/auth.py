@@ -3,12 +3,22 @@ Multi-tenant authentication middleware
 """
 import secrets
 from typing import Optional
+from uuid import UUID
 from fastapi import Header, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.tenant import Tenant
-from app.utils.database import get_db
+from app.utils.database import get_async_db
+from app.utils.cache import TTLCache
 from app.middleware.error_handler import UnauthorizedException
+from app.config import settings
+
+# API key -> detached Tenant snapshot
+tenant_cache = TTLCache(
+    max_size=settings.TENANT_CACHE_MAX_SIZE,
+    ttl_seconds=settings.TENANT_CACHE_TTL_SECONDS
+)
 
 
 def generate_api_key() -> str:
@@ -18,16 +28,52 @@ def generate_api_key() -> str:
     return f"sk_{''.join(secrets.token_urlsafe(32))}"
 
 
-def get_tenant_from_api_key(api_key: str, db: Session) -> Optional[Tenant]:
+def invalidate_tenant_cache(tenant_id: Optional[UUID] = None):
+    """
+    Drop cached tenant entries
+
+    Args:
+        tenant_id: Only drop entries for this tenant (default: drop everything)
+    """
+    if tenant_id is None:
+        tenant_cache.clear()
+    else:
+        tenant_cache.delete_where(lambda _key, tenant: tenant.id == tenant_id)
+
+
+async def get_tenant_from_api_key(api_key: str, db: AsyncSession) -> Optional[Tenant]:
     """
     Get tenant by API key
+
+    Served from the in-process tenant cache when possible. The cached
+    instance is detached and merged into the caller's session without
+    a SELECT, so it behaves like a freshly loaded row.
     """
-    return db.query(Tenant).filter(Tenant.api_key == api_key).first()
+    cached = tenant_cache.get(api_key)
+    if cached is None:
+        result = await db.execute(select(Tenant).where(Tenant.api_key == api_key))
+        tenant = result.scalars().first()
+        if not tenant:
+            return None
+
+        db.expunge(tenant)
+        tenant_cache.set(api_key, tenant)
+        cached = tenant
+
+    return await db.merge(cached, load=False)
+
+
+@event.listens_for(Tenant, "after_insert")
+@event.listens_for(Tenant, "after_update")
+@event.listens_for(Tenant, "after_delete")
+def _invalidate_on_tenant_change(mapper, connection, target: Tenant):
+    """Keep the tenant cache coherent with tenant writes made in this process"""
+    invalidate_tenant_cache(target.id)
 
 
 async def get_current_tenant(
     x_api_key: str = Header(..., alias="X-API-Key"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Tenant:
     """
     Dependency to get current tenant from API key
@@ -36,7 +82,7 @@ async def get_current_tenant(
     if not x_api_key:
         raise UnauthorizedException("API key is required")
 
-    tenant = get_tenant_from_api_key(x_api_key, db)
+    tenant = await get_tenant_from_api_key(x_api_key, db)
     if not tenant:
         raise UnauthorizedException("Invalid API key")
 
@@ -4,10 +4,11 @@ Database models
 from app.models.tenant import Tenant
 from app.models.agent import Agent
 from app.models.session import Session, Message
-from app.models.usage import UsageEvent, ProviderCall
+from app.models.usage import UsageEvent, UsageRollup, ProviderCall
 from app.models.tool import ToolExecution
 from app.models.voice import VoiceArtifact
 from app.models.idempotency import IdempotencyKey
+from app.models.invoice import Invoice
 
 __all__ = [
     "Tenant",
@@ -15,8 +16,10 @@ __all__ = [
     "Session",
     "Message",
     "UsageEvent",
+    "UsageRollup",
     "ProviderCall",
     "ToolExecution",
     "VoiceArtifact",
     "IdempotencyKey",
+    "Invoice",
 ]
@@ -1,7 +1,7 @@
 """
 Idempotency Key model
 """
-from sqlalchemy import Column, String, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, String, DateTime, ForeignKey, LargeBinary
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -13,7 +13,7 @@ class IdempotencyKey(Base):
 
     key = Column(String(255), primary_key=True)
     tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False, index=True)
-    response = Column(JSON, nullable=False)
+    response = Column(LargeBinary, nullable=False)  # app.utils.codec blob
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     expires_at = Column(DateTime, nullable=False, index=True)
 
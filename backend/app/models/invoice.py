@@ -0,0 +1,29 @@
+"""
+Invoice model (database invoice backend)
+"""
+from sqlalchemy import Column, String, Date, DateTime, Numeric, Text, Index, func
+from datetime import datetime
+from app.utils.database import Base
+
+
+class Invoice(Base):
+    __tablename__ = "invoices"
+
+    # Partitioned by the tenant's company_key (tenants sharing a key share data)
+    company_key = Column(String(100), primary_key=True)
+    id = Column(String(64), primary_key=True)
+    customer = Column(String(255), nullable=True)
+    status = Column(String(20), nullable=False)  # 'paid' | 'pending' | 'overdue'
+    amount = Column(Numeric(14, 2), nullable=False)
+    due_date = Column(Date, nullable=True)
+    description = Column(Text, nullable=True)
+    payment_date = Column(Date, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_invoices_company_customer", "company_key", func.lower(customer)),
+        Index("ix_invoices_company_status", "company_key", "status"),
+    )
+
+    def __repr__(self):
+        return f"<Invoice(company_key={self.company_key}, id={self.id}, status={self.status})>"
@@ -1,7 +1,7 @@
 """
 Session and Message models
 """
-from sqlalchemy import Column, String, Text, Integer, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, String, Text, Integer, DateTime, ForeignKey, JSON, Numeric, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -34,6 +34,10 @@ class Session(Base):
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        # Transcript pages: keyset on (created_at, id) within a session
+        Index("ix_messages_session_id_created_at", "session_id", "created_at", "id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     session_id = Column(UUID(as_uuid=True), ForeignKey("sessions.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -43,6 +47,7 @@ class Message(Base):
     tokens_in = Column(Integer, nullable=True)
     tokens_out = Column(Integer, nullable=True)
     latency_ms = Column(Integer, nullable=True)
+    cost_usd = Column(Numeric(10, 6), nullable=True)  # billed cost, set when the message is written
     tools_called = Column(JSON, default=list, nullable=False)  # tool execution references
     correlation_id = Column(String(255), nullable=True, index=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
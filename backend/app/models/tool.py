@@ -1,7 +1,7 @@
 """
 Tool Execution model
 """
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, JSON, Text
+from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, JSON, Text, false
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -23,6 +23,7 @@ class ToolExecution(Base):
     status = Column(String(50), nullable=False)  # 'success' | 'error'
     latency_ms = Column(Integer, nullable=True)
     error_message = Column(Text, nullable=True)
+    cached = Column(Boolean, default=False, server_default=false(), nullable=False)  # served from the result cache
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     # Relationships
@@ -1,7 +1,10 @@
 """
 Usage and Provider Call models
 """
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, JSON, Numeric, Text
+from sqlalchemy import (
+    Column, String, Integer, BigInteger, DateTime, ForeignKey, JSON, Numeric, Text, LargeBinary,
+    Index, UniqueConstraint
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -11,6 +14,10 @@ from app.utils.database import Base
 
 class UsageEvent(Base):
     __tablename__ = "usage_events"
+    __table_args__ = (
+        # Tenant + date-range scans (analytics)
+        Index("ix_usage_events_tenant_id_created_at", "tenant_id", "created_at"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False, index=True)
@@ -21,7 +28,7 @@ class UsageEvent(Base):
     tokens_in = Column(Integer, nullable=False)
     tokens_out = Column(Integer, nullable=False)
     cost_usd = Column(Numeric(10, 6), nullable=False)
-    event_type = Column(String(50), default="message", nullable=False)  # 'message' | 'voice_stt' | 'voice_tts'
+    event_type = Column(String(50), default="message", nullable=False)  # 'message' | 'cache_hit' | 'voice_stt' | 'voice_tts'
     usage_metadata = Column("metadata", JSON, default=dict, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
 
@@ -35,6 +42,40 @@ class UsageEvent(Base):
         return f"<UsageEvent(id={self.id}, provider={self.provider}, cost_usd={self.cost_usd})>"
 
 
+class UsageRollup(Base):
+    """
+    Usage pre-aggregated per hour/day x tenant x agent x provider x event_type
+
+    Maintained incrementally as usage events are written; analytics read
+    these instead of scanning usage_events.
+    """
+    __tablename__ = "usage_rollups"
+    __table_args__ = (
+        UniqueConstraint(
+            "granularity", "bucket_start", "tenant_id", "agent_id", "provider", "event_type",
+            name="uq_usage_rollups_bucket"
+        ),
+        Index("ix_usage_rollups_tenant_bucket", "tenant_id", "granularity", "bucket_start"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    granularity = Column(String(10), nullable=False)  # 'hour' | 'day'
+    bucket_start = Column(DateTime, nullable=False)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    agent_id = Column(UUID(as_uuid=True), ForeignKey("agents.id"), nullable=False)
+    provider = Column(String(50), nullable=False)
+    event_type = Column(String(50), nullable=False)
+    tokens_in = Column(BigInteger, default=0, nullable=False)
+    tokens_out = Column(BigInteger, default=0, nullable=False)
+    cost_usd = Column(Numeric(14, 6), default=0, nullable=False)
+    message_count = Column(Integer, default=0, nullable=False)
+    session_sketch = Column(LargeBinary, nullable=False)  # HyperLogLog registers of session ids
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<UsageRollup({self.granularity} {self.bucket_start}, agent_id={self.agent_id}, provider={self.provider})>"
+
+
 class ProviderCall(Base):
     __tablename__ = "provider_calls"
 
@@ -44,7 +85,7 @@ class ProviderCall(Base):
     correlation_id = Column(String(255), nullable=False, index=True)
     provider = Column(String(50), nullable=False)
     attempt_number = Column(Integer, nullable=False)
-    status = Column(String(50), nullable=False)  # 'success' | 'retry' | 'fallback' | 'error'
+    status = Column(String(50), nullable=False)  # 'success' | 'retry' | 'fallback' | 'error' | 'circuit_open' | 'cancelled'
     http_status = Column(Integer, nullable=True)
     latency_ms = Column(Integer, nullable=True)
     error_message = Column(Text, nullable=True)
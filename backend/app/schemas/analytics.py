@@ -2,6 +2,7 @@
 Analytics schemas
 """
 from pydantic import BaseModel
+from datetime import datetime
 from decimal import Decimal
 from typing import Dict, List
 from uuid import UUID
@@ -33,3 +34,19 @@ class TopAgent(BaseModel):
 
 class TopAgentsResponse(BaseModel):
     agents: List[TopAgent]
+
+
+class UsageSeries(BaseModel):
+    key: str
+    label: str
+    messages: List[int]
+    tokens_in: List[int]
+    tokens_out: List[int]
+    cost_usd: List[Decimal]
+
+
+class UsageTimeseries(BaseModel):
+    bucket: str
+    group_by: str
+    buckets: List[datetime]
+    series: List[UsageSeries]
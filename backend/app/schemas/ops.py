@@ -0,0 +1,75 @@
+"""
+Operational (ops) schemas
+"""
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+class CircuitBreakerStatus(BaseModel):
+    provider: str
+    state: str  # 'closed' | 'open' | 'half_open'
+    window_calls: int
+    failure_rate: float
+    slow_call_rate: float
+    total_calls: int
+    total_failures: int
+    rejected_calls: int
+    times_opened: int
+    retry_in_seconds: Optional[float]
+
+
+class CircuitBreakersResponse(BaseModel):
+    circuit_breakers: List[CircuitBreakerStatus]
+
+
+class RetryBudgetStatus(BaseModel):
+    ratio: float
+    window_seconds: float
+    window_requests: int
+    window_retries: int
+    retries_allowed: int
+    total_requests: int
+    total_retries: int
+    rejected_retries: int
+
+
+class ProviderLatency(BaseModel):
+    provider: str
+    samples: int
+    p50_ms: Optional[int]
+    p95_ms: Optional[int]
+    p99_ms: Optional[int]
+    timeout_seconds: float
+
+
+class LatencyResponse(BaseModel):
+    providers: List[ProviderLatency]
+
+
+class CacheStats(BaseModel):
+    size: int
+    max_size: int
+    ttl_seconds: float
+    hits: int
+    misses: int
+    evictions: int
+    hit_rate: float
+
+
+class CachesResponse(BaseModel):
+    caches: Dict[str, CacheStats]
+
+
+class IdempotencySweeperStatus(BaseModel):
+    interval_seconds: float
+    batch_size: int
+    max_batches: int
+    runs: int
+    failed_runs: int
+    total_deleted: int
+    last_run_at: Optional[datetime]
+    last_deleted: int
+    last_batches: int
+    last_duration_ms: int
+    last_error: Optional[str]
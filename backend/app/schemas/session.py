@@ -46,6 +46,7 @@ class SessionResponse(BaseModel):
     metadata: Dict[str, Any]
     created_at: datetime
     messages: List[MessageResponse] = []
+    next_cursor: Optional[str] = None
 
     class Config:
         from_attributes = True
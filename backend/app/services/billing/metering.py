@@ -1,13 +1,15 @@
 """
 Usage metering and cost calculation
 """
+import uuid
 from decimal import Decimal
 from typing import Optional
 from uuid import UUID
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 
 from app.models.usage import UsageEvent
+from app.services.billing.rollups import fold_usage_rollups
 from app.config import PRICING
 from app.utils.logger import get_logger
 
@@ -40,8 +42,8 @@ def calculate_cost(provider: str, tokens_in: int, tokens_out: int) -> Decimal:
     return total_cost.quantize(Decimal('0.000001'))
 
 
-def create_usage_event(
-    db: Session,
+async def create_usage_event(
+    db: AsyncSession,
     tenant_id: UUID,
     agent_id: UUID,
     session_id: UUID,
@@ -50,11 +52,15 @@ def create_usage_event(
     tokens_out: int,
     message_id: Optional[UUID] = None,
     event_type: str = "message",
-    metadata: dict = None
+    metadata: dict = None,
+    commit: bool = True
 ) -> UsageEvent:
     """
     Create and persist a usage event
 
+    The event's rollups are folded after the commit, in a short transaction
+    of their own (see fold_usage_rollups).
+
     Args:
         db: Database session
         tenant_id: Tenant ID
@@ -66,6 +72,9 @@ def create_usage_event(
         message_id: Message ID (optional)
         event_type: Event type (default 'message')
         metadata: Additional metadata (optional)
+        commit: Commit immediately; pass False to leave the event in the
+            caller's transaction (id and created_at are set client-side), and
+            call fold_usage_rollups() once that transaction has committed
 
     Returns:
         Created UsageEvent
@@ -73,6 +82,7 @@ def create_usage_event(
     cost = calculate_cost(provider, tokens_in, tokens_out)
 
     usage_event = UsageEvent(
+        id=uuid.uuid4(),
         tenant_id=tenant_id,
         agent_id=agent_id,
         session_id=session_id,
@@ -83,12 +93,15 @@ def create_usage_event(
         cost_usd=cost,
         event_type=event_type,
         metadata=metadata or {},
+        usage_metadata=metadata or {},  # the mapped column; `metadata` alone is not persisted
         created_at=datetime.utcnow()
     )
 
     db.add(usage_event)
-    db.commit()
-    db.refresh(usage_event)
+    if commit:
+        await db.commit()
+        await db.refresh(usage_event)
+        await fold_usage_rollups(db, [usage_event])
 
     logger.info(
         f"Usage event created",
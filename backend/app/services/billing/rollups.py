@@ -0,0 +1,233 @@
+"""
+Usage rollups - hourly/daily/monthly aggregates maintained as usage is metered
+"""
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.usage import UsageEvent, UsageRollup
+from app.utils.logger import get_logger
+from app.utils.sketch import HyperLogLog
+
+logger = get_logger(__name__)
+
+GRANULARITIES = ("hour", "day", "month")
+
+
+def bucket_start(timestamp: datetime, granularity: str) -> datetime:
+    """Start of the hour/day/month bucket containing timestamp"""
+    if granularity == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == "month":
+        return timestamp.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unknown rollup granularity: {granularity}")
+
+
+def month_after(day: date) -> date:
+    """First day of the month following day"""
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def _session_bytes(session_id) -> bytes:
+    return (session_id if isinstance(session_id, UUID) else UUID(str(session_id))).bytes
+
+
+def count_sessions(sketches: Iterable[bytes]) -> int:
+    """Distinct sessions across a set of rollup rows"""
+    return HyperLogLog.union(sketches).count()
+
+
+async def _locked_rollup(
+    db: AsyncSession,
+    granularity: str,
+    bucket: datetime,
+    event: UsageEvent
+) -> UsageRollup:
+    """
+    Get (creating if needed) the rollup row for an event's bucket, locked
+    FOR UPDATE until the caller's transaction ends
+    """
+    query = select(UsageRollup).where(
+        UsageRollup.granularity == granularity,
+        UsageRollup.bucket_start == bucket,
+        UsageRollup.tenant_id == event.tenant_id,
+        UsageRollup.agent_id == event.agent_id,
+        UsageRollup.provider == event.provider,
+        UsageRollup.event_type == event.event_type
+    ).with_for_update()
+
+    rollup = (await db.execute(query)).scalar_one_or_none()
+    if rollup is not None:
+        return rollup
+
+    rollup = UsageRollup(
+        id=uuid.uuid4(),
+        granularity=granularity,
+        bucket_start=bucket,
+        tenant_id=event.tenant_id,
+        agent_id=event.agent_id,
+        provider=event.provider,
+        event_type=event.event_type,
+        tokens_in=0,
+        tokens_out=0,
+        cost_usd=Decimal(0),
+        message_count=0,
+        session_sketch=HyperLogLog().to_bytes()
+    )
+    try:
+        async with db.begin_nested():
+            db.add(rollup)
+            await db.flush([rollup])
+        return rollup
+    except IntegrityError:
+        # Another transaction created the bucket first
+        return (await db.execute(query)).scalar_one()
+
+
+async def record_usage_rollup(db: AsyncSession, event: UsageEvent):
+    """
+    Fold a usage event into its hourly, daily and monthly rollups
+
+    Runs in the caller's transaction and holds the bucket rows' locks until
+    it ends; request paths go through fold_usage_rollups() instead. Rows are
+    locked hour-day-month, in a fixed order, so concurrent writers to the
+    same bucket serialize without deadlocking.
+    """
+    session_id = _session_bytes(event.session_id)
+    for granularity in GRANULARITIES:
+        rollup = await _locked_rollup(db, granularity, bucket_start(event.created_at, granularity), event)
+
+        sketch = HyperLogLog.from_bytes(rollup.session_sketch)
+        sketch.add(session_id)
+
+        rollup.tokens_in += event.tokens_in
+        rollup.tokens_out += event.tokens_out
+        rollup.cost_usd = Decimal(rollup.cost_usd) + Decimal(event.cost_usd)
+        rollup.message_count += 1
+        rollup.session_sketch = sketch.to_bytes()
+
+
+async def fold_usage_rollups(db: AsyncSession, events: Sequence[UsageEvent]) -> bool:
+    """
+    Fold committed usage events into their rollups in a short transaction of their own
+
+    Called once the events' transaction has committed, on a separate session
+    bound to the same engine, so the shared bucket rows are locked only for
+    the fold itself rather than for a whole chat turn. A failure is logged
+    and rolled back without touching the (already durable) events; the
+    drift is repaired by scripts/rebuild_usage_rollups.py.
+
+    Returns:
+        True if the rollups were updated
+    """
+    async with AsyncSession(db.bind, autoflush=False, expire_on_commit=False) as fold_db:
+        try:
+            for event in events:
+                await record_usage_rollup(fold_db, event)
+            await fold_db.commit()
+            return True
+        except SQLAlchemyError:
+            await fold_db.rollback()
+            logger.exception(
+                "Usage rollup fold failed",
+                extra={"usage_event_ids": [str(event.id) for event in events]}
+            )
+            return False
+
+
+async def rebuild_usage_rollups(
+    db: AsyncSession,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    tenant_id: Optional[UUID] = None
+) -> int:
+    """
+    Recompute rollups for whole months from usage_events (backfill/repair)
+
+    The range is widened to whole months (monthly rows cover the full
+    month), then its rollups are deleted and rebuilt from the raw events;
+    the caller commits. Meant for closed periods (backfill after the
+    migration, or repairing drift) since events metered into the range
+    while it runs would be missed.
+
+    Returns:
+        Number of rollup rows written
+    """
+    rollup_filters = []
+    event_filters = []
+    if start_date:
+        start_date = start_date.replace(day=1)
+    if end_date:
+        end_date = month_after(end_date) - timedelta(days=1)
+    if start_date:
+        start = datetime.combine(start_date, datetime.min.time())
+        rollup_filters.append(UsageRollup.bucket_start >= start)
+        event_filters.append(UsageEvent.created_at >= start)
+    if end_date:
+        end = datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+        rollup_filters.append(UsageRollup.bucket_start < end)
+        event_filters.append(UsageEvent.created_at < end)
+    if tenant_id:
+        rollup_filters.append(UsageRollup.tenant_id == tenant_id)
+        event_filters.append(UsageEvent.tenant_id == tenant_id)
+
+    await db.execute(delete(UsageRollup).where(*rollup_filters))
+
+    buckets: Dict[Tuple, list] = {}
+    events = await db.stream(
+        select(
+            UsageEvent.created_at,
+            UsageEvent.tenant_id,
+            UsageEvent.agent_id,
+            UsageEvent.provider,
+            UsageEvent.event_type,
+            UsageEvent.session_id,
+            UsageEvent.tokens_in,
+            UsageEvent.tokens_out,
+            UsageEvent.cost_usd
+        ).where(*event_filters).execution_options(yield_per=5000)
+    )
+    async for created_at, tenant, agent, provider, event_type, session_id, tokens_in, tokens_out, cost in events:
+        for granularity in GRANULARITIES:
+            key = (granularity, bucket_start(created_at, granularity), tenant, agent, provider, event_type)
+            totals = buckets.get(key)
+            if totals is None:
+                totals = buckets[key] = [0, 0, Decimal(0), 0, HyperLogLog()]
+            totals[0] += tokens_in
+            totals[1] += tokens_out
+            totals[2] += Decimal(cost)
+            totals[3] += 1
+            totals[4].add(_session_bytes(session_id))
+
+    db.add_all(
+        UsageRollup(
+            id=uuid.uuid4(),
+            granularity=granularity,
+            bucket_start=bucket,
+            tenant_id=tenant,
+            agent_id=agent,
+            provider=provider,
+            event_type=event_type,
+            tokens_in=tokens_in,
+            tokens_out=tokens_out,
+            cost_usd=cost,
+            message_count=count,
+            session_sketch=sketch.to_bytes()
+        )
+        for (granularity, bucket, tenant, agent, provider, event_type), (tokens_in, tokens_out, cost, count, sketch)
+        in buckets.items()
+    )
+
+    logger.info(
+        "Usage rollups rebuilt",
+        extra={"rollups": len(buckets), "start_date": str(start_date), "end_date": str(end_date)}
+    )
+    return len(buckets)
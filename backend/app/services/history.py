@@ -0,0 +1,135 @@
+"""
+Per-session conversation history windows
+
+Each session's recent turns are kept in a bounded in-process cache
+together with their token counts. A turn only reads the messages written
+since the window's cursor (normally none, or the previous turn's pair),
+so the transcript is never re-queried or re-counted as the session grows.
+Windows are trimmed oldest-first to the agent's token budget.
+"""
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.agent import Agent
+from app.models.session import Message
+from app.utils.cache import TTLCache
+
+# Roles replayed to the vendor
+HISTORY_ROLES = ("user", "assistant")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate token count (~4 characters per token)
+
+    Only used for budgeting; billing uses the vendor-reported counts.
+    """
+    return max(1, (len(text) + 3) // 4)
+
+
+@dataclass
+class HistoryEntry:
+    role: str
+    content: str
+    tokens: int
+
+
+@dataclass
+class HistoryWindow:
+    """Most recent messages of one session within a token budget"""
+
+    max_tokens: int
+    max_messages: int
+    entries: Deque[HistoryEntry] = field(default_factory=deque)
+    total_tokens: int = 0
+    # (created_at, id) of the newest message seen
+    cursor: Optional[Tuple[datetime, UUID]] = None
+
+    def append(self, message: Message):
+        """Add a newer message and trim the oldest to stay within budget"""
+        key = (message.created_at, message.id)
+        if self.cursor is not None and key <= self.cursor:
+            return  # already seen (concurrent refresh)
+        self.cursor = key
+        if message.role not in HISTORY_ROLES:
+            return
+
+        entry = HistoryEntry(message.role, message.content, estimate_tokens(message.content))
+        self.entries.append(entry)
+        self.total_tokens += entry.tokens
+        while self.entries and (
+            self.total_tokens > self.max_tokens or len(self.entries) > self.max_messages
+        ):
+            self.total_tokens -= self.entries.popleft().tokens
+
+    def as_messages(self) -> List[Dict[str, str]]:
+        """Chat-style [{"role", "content"}] list, oldest first"""
+        return [{"role": e.role, "content": e.content} for e in self.entries]
+
+
+def history_budget(agent: Agent) -> int:
+    """
+    Token budget for an agent's history (0 disables history)
+
+    Agent.config: {"history": {"max_tokens": 2000}}
+    """
+    history = (agent.config or {}).get("history") or {}
+    return int(history.get("max_tokens", settings.CONVERSATION_HISTORY_MAX_TOKENS))
+
+
+# Windows by session id (per worker process)
+history_cache = TTLCache(
+    max_size=settings.CONVERSATION_HISTORY_CACHE_SIZE,
+    ttl_seconds=settings.CONVERSATION_HISTORY_CACHE_TTL_SECONDS
+)
+
+
+async def _load_window(db: AsyncSession, session_id: UUID, max_tokens: int) -> HistoryWindow:
+    """Build a window from the newest messages of a session (cache miss)"""
+    max_messages = settings.CONVERSATION_HISTORY_MAX_MESSAGES
+    result = await db.execute(
+        select(Message)
+        .where(Message.session_id == session_id)
+        .order_by(Message.created_at.desc(), Message.id.desc())
+        .limit(max_messages)
+    )
+    window = HistoryWindow(max_tokens=max_tokens, max_messages=max_messages)
+    for message in reversed(result.scalars().all()):
+        window.append(message)
+    return window
+
+
+async def _refresh_window(db: AsyncSession, session_id: UUID, window: HistoryWindow):
+    """Append messages written since the window's cursor (by any worker)"""
+    query = select(Message).where(Message.session_id == session_id)
+    if window.cursor is not None:
+        query = query.where(tuple_(Message.created_at, Message.id) > window.cursor)
+    result = await db.execute(query.order_by(Message.created_at, Message.id))
+    for message in result.scalars().all():
+        window.append(message)
+
+
+async def get_conversation_history(db: AsyncSession, session_id: UUID, agent: Agent) -> List[Dict[str, Any]]:
+    """
+    Recent turns of a session, oldest first, within the agent's token budget
+
+    Must be called before the current turn's user message is added.
+    """
+    max_tokens = history_budget(agent)
+    if max_tokens <= 0:
+        return []
+
+    window = history_cache.get(session_id)
+    if window is None or window.max_tokens != max_tokens:
+        window = await _load_window(db, session_id, max_tokens)
+        history_cache.set(session_id, window)
+    else:
+        await _refresh_window(db, session_id, window)
+    return window.as_messages()
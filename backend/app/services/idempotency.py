@@ -1,44 +1,87 @@
 """
 Idempotency key handling
+
+Two stores share one interface:
+
+- IdempotencyService (database): the response is written in the turn's
+  own transaction; there is no in-flight claim.
+- RedisIdempotencyStore: the key is claimed with SET NX before any work,
+  duplicates wait for the in-flight result, and completed responses
+  expire through Redis TTLs.
+
+Responses are handled as the JSON bytes that were served, so a replay
+is written to the client without being parsed or re-validated. Both
+stores keep them as app.utils.codec blobs (IDEMPOTENCY_CODEC).
 """
-from typing import Optional, Any, Dict
+from typing import Optional
 from datetime import datetime, timedelta
 from uuid import UUID
-from decimal import Decimal
-from sqlalchemy.orm import Session
-import json
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from redis.exceptions import RedisError
+import asyncio
+import secrets
+import time
 
+from app.config import settings
 from app.models.idempotency import IdempotencyKey
+from app.middleware.error_handler import AppException
+from app.services.idempotency_sweeper import delete_expired_batch
+from app.services.reliability.circuit_breaker import CircuitBreaker
+from app.utils import codec
 from app.utils.logger import get_logger
+from app.utils.redis_client import get_redis
 
 logger = get_logger(__name__)
 
 
-def serialize_for_json(obj: Any) -> Any:
-    """Convert objects to JSON-serializable format"""
-    if isinstance(obj, UUID):
-        return str(obj)
-    elif isinstance(obj, datetime):
-        return obj.isoformat()
-    elif isinstance(obj, Decimal):
-        return str(obj)
-    elif isinstance(obj, dict):
-        return {k: serialize_for_json(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [serialize_for_json(item) for item in obj]
-    return obj
+def encode_response(payload: bytes) -> bytes:
+    """Codec blob for a response's JSON bytes"""
+    return codec.encode(
+        payload,
+        codec.get_codec(settings.IDEMPOTENCY_CODEC),
+        settings.IDEMPOTENCY_COMPRESS_MIN_BYTES
+    )
+
+
+class IdempotencyInFlight(AppException):
+    """A request with the same key is still being processed"""
+
+    def __init__(self):
+        super().__init__(
+            "A request with this Idempotency-Key is still being processed; retry shortly",
+            status_code=409
+        )
 
 
 class IdempotencyService:
     """
-    Handles idempotency key storage and retrieval
+    Handles idempotency key storage and retrieval (database table)
     """
 
-    def __init__(self, db: Session, tenant_id: UUID):
+    # cache_response() joins the caller's transaction
+    writes_in_transaction = True
+
+    def __init__(self, db: AsyncSession, tenant_id: UUID):
         self.db = db
         self.tenant_id = tenant_id
 
-    def get_cached_response(self, key: str) -> Optional[Dict[str, Any]]:
+    async def claim(self, key: str) -> Optional[bytes]:
+        """
+        Cached response (JSON bytes) for key, or None if the request should be processed
+
+        The table has no in-flight state, so concurrent duplicates are not
+        detected until one of them has committed.
+        """
+        return await self.get_cached_response(key)
+
+    async def release(self, key: str):
+        """Nothing is held while a request is processed"""
+
+    async def refresh(self, key: str):
+        """Nothing is held while a request is processed"""
+
+    async def get_cached_response(self, key: str) -> Optional[bytes]:
         """
         Get cached response for idempotency key
 
@@ -46,60 +89,295 @@ class IdempotencyService:
             key: Idempotency key
 
         Returns:
-            Cached response or None if not found/expired
+            Cached response JSON or None if not found/expired
         """
-        record = self.db.query(IdempotencyKey).filter(
+        result = await self.db.execute(select(IdempotencyKey).where(
             IdempotencyKey.key == key,
             IdempotencyKey.tenant_id == self.tenant_id,
             IdempotencyKey.expires_at > datetime.utcnow()
-        ).first()
+        ))
+        record = result.scalars().first()
 
         if record:
+            try:
+                response = codec.decode(record.response)
+            except codec.CodecError as e:
+                # Written by a worker with a codec this one lacks: reprocess
+                logger.warning(
+                    f"Dropping undecodable idempotent response for {key}: {e}",
+                    extra={"tenant_id": str(self.tenant_id)}
+                )
+                await self.db.delete(record)
+                await self.db.flush()
+                return None
+
             logger.info(
                 f"Idempotency key hit: {key}",
                 extra={"tenant_id": str(self.tenant_id)}
             )
-            return record.response
+            return response
 
         return None
 
-    def cache_response(self, key: str, response: Dict[str, Any], ttl_hours: int = 24):
+    async def cache_response(
+        self,
+        key: str,
+        response: bytes,
+        ttl_seconds: Optional[int] = None,
+        commit: bool = True
+    ):
         """
         Cache response for idempotency key
 
         Args:
             key: Idempotency key
-            response: Response to cache
-            ttl_hours: Time to live in hours (default 24)
+            response: Response JSON, as served
+            ttl_seconds: Time to live (default IDEMPOTENCY_TTL_SECONDS)
+            commit: Commit immediately; pass False to join the caller's transaction
         """
-        expires_at = datetime.utcnow() + timedelta(hours=ttl_hours)
-
-        # Serialize response to ensure JSON compatibility
-        serialized_response = serialize_for_json(response)
+        expires_at = datetime.utcnow() + timedelta(seconds=ttl_seconds or settings.IDEMPOTENCY_TTL_SECONDS)
 
         idempotency_key = IdempotencyKey(
             key=key,
             tenant_id=self.tenant_id,
-            response=serialized_response,
+            response=encode_response(response),
             created_at=datetime.utcnow(),
             expires_at=expires_at
         )
 
-        self.db.merge(idempotency_key)  # Use merge to handle duplicates
-        self.db.commit()
+        await self.db.merge(idempotency_key)  # Use merge to handle duplicates
+        if commit:
+            await self.db.commit()
 
         logger.info(
             f"Idempotency key cached: {key}",
             extra={"tenant_id": str(self.tenant_id), "expires_at": expires_at.isoformat()}
         )
 
-    def cleanup_expired(self):
-        """Clean up expired idempotency keys"""
-        deleted = self.db.query(IdempotencyKey).filter(
-            IdempotencyKey.expires_at < datetime.utcnow()
-        ).delete()
-
-        self.db.commit()
+    async def cleanup_expired(self, batch_size: int = 1000) -> int:
+        """
+        Delete one batch of expired idempotency keys (all tenants)
 
+        Routine cleanup is done by the background IdempotencySweeper.
+        """
+        deleted = await delete_expired_batch(self.db, batch_size)
         if deleted > 0:
             logger.info(f"Cleaned up {deleted} expired idempotency keys")
+        return deleted
+
+
+# Deletes the key only if it still holds ARGV[1] (this request's claim, or
+# an undecodable response)
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# Re-arms the claim's expiry only while it is still ARGV[1] (this request's)
+_REFRESH_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+_PENDING = b"pending:"
+_DONE = b"done:"
+
+# Shared per worker: one Redis failure sends every request straight to the
+# database store for IDEMPOTENCY_REDIS_RETRY_SECONDS, then one probe retries
+redis_breaker = CircuitBreaker(
+    name="idempotency-redis",
+    window_size=1,
+    min_calls=1,
+    open_seconds=settings.IDEMPOTENCY_REDIS_RETRY_SECONDS
+)
+
+
+class RedisIdempotencyStore:
+    """
+    Redis-backed idempotency keys with in-flight claims
+
+    claim() atomically SETs the key to a pending marker (NX, with
+    IDEMPOTENCY_LOCK_TTL_SECONDS expiry) before the request is processed.
+    Long-running owners (streamed answers) call refresh() to keep the
+    claim alive. A duplicate that finds the marker polls until the owner
+    stores its response, releases the claim (it may then claim it itself), or
+    IDEMPOTENCY_WAIT_SECONDS pass (409). Completed responses are stored
+    after the turn commits and expire after IDEMPOTENCY_TTL_SECONDS.
+
+    If Redis is unreachable the request falls back to the database store,
+    and redis_breaker keeps later requests off Redis (no connect timeout
+    to pay) until IDEMPOTENCY_REDIS_RETRY_SECONDS have passed.
+    """
+
+    def __init__(self, db: AsyncSession, tenant_id: UUID, redis=None):
+        self.db = db
+        self.tenant_id = tenant_id
+        self.redis = redis if redis is not None else get_redis()
+        self._token = secrets.token_hex(16).encode()
+        self._fallback: Optional[IdempotencyService] = None
+
+    @property
+    def writes_in_transaction(self) -> bool:
+        """Responses go to Redis after the caller commits (or into its transaction on fallback)"""
+        return self._fallback is not None
+
+    def _key(self, key: str) -> str:
+        return f"idempotency:{self.tenant_id}:{key}"
+
+    def _use_fallback(self, error: Optional[Exception] = None) -> IdempotencyService:
+        if error is not None:
+            redis_breaker.record_failure()
+            logger.warning(
+                f"Redis unavailable for idempotency, using database: {error}",
+                extra={"tenant_id": str(self.tenant_id)}
+            )
+        self._fallback = IdempotencyService(self.db, self.tenant_id)
+        return self._fallback
+
+    async def claim(self, key: str) -> Optional[bytes]:
+        """
+        Claim key for this request, or return the response of the request that holds it
+
+        Returns:
+            Cached response JSON, or None once this request owns the key
+
+        Raises:
+            IdempotencyInFlight: The owner did not finish within IDEMPOTENCY_WAIT_SECONDS
+        """
+        if self._fallback:
+            return await self._fallback.claim(key)
+        if not redis_breaker.allow_request():
+            return await self._use_fallback().claim(key)
+
+        try:
+            response = await self._claim(key)
+        except RedisError as e:
+            return await self._use_fallback(e).claim(key)
+        except IdempotencyInFlight:
+            redis_breaker.record_success(0)
+            raise
+        except BaseException:
+            redis_breaker.release()
+            raise
+        redis_breaker.record_success(0)
+        return response
+
+    async def _claim(self, key: str) -> Optional[bytes]:
+        """The Redis side of claim(); RedisError propagates"""
+        redis_key = self._key(key)
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        interval = settings.IDEMPOTENCY_POLL_INTERVAL_MS / 1000
+        waited = False
+        while True:
+            if await self.redis.set(
+                redis_key, _PENDING + self._token, nx=True, ex=settings.IDEMPOTENCY_LOCK_TTL_SECONDS
+            ):
+                return None
+
+            value = await self.redis.get(redis_key)
+            if value is not None and value.startswith(_DONE):
+                try:
+                    response = codec.decode(value[len(_DONE):])
+                except codec.CodecError as e:
+                    # Written by a worker with a codec this one lacks: drop
+                    # it (unless replaced meanwhile) and claim the key
+                    logger.warning(
+                        f"Dropping undecodable idempotent response for {key}: {e}",
+                        extra={"tenant_id": str(self.tenant_id)}
+                    )
+                    await self.redis.eval(_RELEASE_SCRIPT, 1, redis_key, value)
+                    continue
+                logger.info(
+                    f"Idempotency key hit: {key}",
+                    extra={"tenant_id": str(self.tenant_id), "waited": waited}
+                )
+                return response
+
+            if value is None:
+                continue  # released or expired between SET and GET: try to claim it
+
+            if time.monotonic() >= deadline:
+                raise IdempotencyInFlight()
+            waited = True
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, 0.5)
+
+    async def cache_response(
+        self,
+        key: str,
+        response: bytes,
+        ttl_seconds: Optional[int] = None,
+        commit: bool = True
+    ):
+        """
+        Store the completed response JSON (replaces the claim) with a native TTL
+        """
+        if self._fallback:
+            return await self._fallback.cache_response(key, response, ttl_seconds, commit)
+
+        ttl = ttl_seconds or settings.IDEMPOTENCY_TTL_SECONDS
+        payload = _DONE + encode_response(response)
+        try:
+            await self.redis.set(self._key(key), payload, ex=ttl)
+        except RedisError as e:
+            # The turn is already committed; duplicates reprocess once the claim expires
+            redis_breaker.record_failure()
+            logger.error(
+                f"Failed to cache idempotent response for {key}: {e}",
+                extra={"tenant_id": str(self.tenant_id)}
+            )
+            return
+
+        logger.info(
+            f"Idempotency key cached: {key}",
+            extra={"tenant_id": str(self.tenant_id), "ttl_seconds": ttl}
+        )
+
+    async def refresh(self, key: str):
+        """
+        Push back the expiry of this request's claim by IDEMPOTENCY_LOCK_TTL_SECONDS
+        """
+        if self._fallback:
+            return
+        try:
+            refreshed = await self.redis.eval(
+                _REFRESH_SCRIPT, 1, self._key(key), _PENDING + self._token, settings.IDEMPOTENCY_LOCK_TTL_SECONDS
+            )
+        except RedisError as e:
+            logger.warning(
+                f"Failed to refresh idempotency claim for {key}: {e}",
+                extra={"tenant_id": str(self.tenant_id)}
+            )
+            return
+        if not refreshed:
+            logger.warning(
+                f"Idempotency claim for {key} expired while processing",
+                extra={"tenant_id": str(self.tenant_id)}
+            )
+
+    async def release(self, key: str):
+        """
+        Drop this request's claim so a retry can proceed (processing failed)
+        """
+        if self._fallback:
+            return
+        try:
+            await self.redis.eval(_RELEASE_SCRIPT, 1, self._key(key), _PENDING + self._token)
+        except RedisError as e:
+            logger.warning(
+                f"Failed to release idempotency claim for {key}: {e}",
+                extra={"tenant_id": str(self.tenant_id)}
+            )
+
+
+def get_idempotency_store(db: AsyncSession, tenant_id: UUID):
+    """
+    Idempotency store for one request, per IDEMPOTENCY_BACKEND
+    """
+    if settings.IDEMPOTENCY_BACKEND == "redis":
+        return RedisIdempotencyStore(db, tenant_id)
+    return IdempotencyService(db, tenant_id)
@@ -0,0 +1,148 @@
+"""
+Background sweeper for expired idempotency keys
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.idempotency import IdempotencyKey
+from app.utils.database import AsyncSessionLocal
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+async def delete_expired_batch(db: AsyncSession, batch_size: int, now: Optional[datetime] = None) -> int:
+    """
+    Delete up to batch_size expired keys (oldest first) and commit
+
+    The batch is picked through the expires_at index; SKIP LOCKED lets
+    sweepers in several workers run side by side without blocking.
+
+    Returns:
+        Number of rows deleted
+    """
+    now = now or datetime.utcnow()
+    expired = (
+        select(IdempotencyKey.key)
+        .where(IdempotencyKey.expires_at < now)
+        .order_by(IdempotencyKey.expires_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    result = await db.execute(
+        delete(IdempotencyKey)
+        .where(IdempotencyKey.key.in_(expired))
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount or 0
+
+
+class IdempotencySweeper:
+    """
+    Periodically deletes expired idempotency_keys rows in bounded batches
+
+    Each run deletes batches of IDEMPOTENCY_SWEEP_BATCH_SIZE rows, one short
+    transaction each, until a batch comes back short or
+    IDEMPOTENCY_SWEEP_MAX_BATCHES is reached; the rest waits for the next
+    run. Counters are exposed on /api/ops/idempotency-sweeper.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: float = 300,
+        batch_size: int = 1000,
+        max_batches: int = 100
+    ):
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+
+        # Counters
+        self.runs = 0
+        self.failed_runs = 0
+        self.total_deleted = 0
+        self.last_run_at: Optional[datetime] = None
+        self.last_deleted = 0
+        self.last_batches = 0
+        self.last_duration_ms = 0
+        self.last_error: Optional[str] = None
+
+    async def run_once(self) -> int:
+        """
+        Sweep until no expired rows remain or the batch cap is hit
+
+        Returns:
+            Rows deleted in this run
+        """
+        start = time.perf_counter()
+        deleted = 0
+        batches = 0
+        now = datetime.utcnow()
+        try:
+            async with AsyncSessionLocal() as db:
+                while batches < self.max_batches:
+                    count = await delete_expired_batch(db, self.batch_size, now)
+                    batches += 1
+                    deleted += count
+                    if count < self.batch_size:
+                        break
+                    await asyncio.sleep(0)  # let request handlers run between batches
+            self.last_error = None
+        except Exception as e:
+            self.failed_runs += 1
+            self.last_error = str(e)
+            logger.error(f"Idempotency sweep failed: {e}", exc_info=True)
+        finally:
+            self.runs += 1
+            self.total_deleted += deleted
+            self.last_run_at = now
+            self.last_deleted = deleted
+            self.last_batches = batches
+            self.last_duration_ms = int((time.perf_counter() - start) * 1000)
+
+        logger.info(
+            "Idempotency sweep finished",
+            extra={
+                "deleted": deleted,
+                "batches": batches,
+                "duration_ms": self.last_duration_ms
+            }
+        )
+        return deleted
+
+    async def run_forever(self):
+        """Sweep every interval_seconds until cancelled (application lifespan)"""
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval_seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters for the ops endpoint"""
+        return {
+            "interval_seconds": self.interval_seconds,
+            "batch_size": self.batch_size,
+            "max_batches": self.max_batches,
+            "runs": self.runs,
+            "failed_runs": self.failed_runs,
+            "total_deleted": self.total_deleted,
+            "last_run_at": self.last_run_at,
+            "last_deleted": self.last_deleted,
+            "last_batches": self.last_batches,
+            "last_duration_ms": self.last_duration_ms,
+            "last_error": self.last_error,
+        }
+
+
+# One sweeper per worker process
+idempotency_sweeper = IdempotencySweeper(
+    interval_seconds=settings.IDEMPOTENCY_SWEEP_INTERVAL_SECONDS,
+    batch_size=settings.IDEMPOTENCY_SWEEP_BATCH_SIZE,
+    max_batches=settings.IDEMPOTENCY_SWEEP_MAX_BATCHES
+)
@@ -0,0 +1 @@
+# Invoice data backends
@@ -0,0 +1,69 @@
+"""
+Invoice backend interface
+"""
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.services.tools.result_cache import invalidate_tool_results
+
+# Fields every backend returns (JSON-serializable: amount is a float, dates are ISO strings)
+INVOICE_FIELDS = ("id", "amount", "status", "due_date", "customer", "description", "payment_date")
+
+
+class InvoiceBackend(ABC):
+    """
+    Invoice storage, partitioned by tenant company_key
+
+    Lookups by id are the hot path (one per tool call); customer and
+    status lookups are served from secondary indexes.
+    """
+
+    @abstractmethod
+    async def get(self, company_key: str, invoice_id: str) -> Optional[Dict[str, Any]]:
+        """Invoice by id, or None"""
+
+    @abstractmethod
+    async def by_customer(self, company_key: str, customer: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Invoices of a customer (case-insensitive exact match)"""
+
+    @abstractmethod
+    async def by_status(self, company_key: str, status: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Invoices with a status ('paid' | 'pending' | 'overdue')"""
+
+    @abstractmethod
+    async def invoice_ids(self, company_key: str, limit: int = 5) -> List[str]:
+        """Some invoice ids of a company (empty if it has no data)"""
+
+    async def bulk_load(self, company_key: str, invoices: Iterable[Dict[str, Any]]) -> int:
+        """
+        Insert or replace invoices; returns the number loaded
+
+        Implementations call invalidate_lookups() once the data is written.
+
+        Raises:
+            NotImplementedError: Read-only backends (snapshots are built offline)
+        """
+        raise NotImplementedError(f"{type(self).__name__} is read-only")
+
+    async def aclose(self) -> None:
+        """Release resources (application shutdown)"""
+
+    @staticmethod
+    def invalidate_lookups(company_key: str) -> int:
+        """
+        Drop this worker's cached invoice_lookup results for a company
+
+        Other workers keep theirs until the tool's cache TTL runs out.
+        """
+        return invalidate_tool_results("invoice_lookup", company_key)
+
+
+def normalize_invoice(invoice: Dict[str, Any]) -> Dict[str, Any]:
+    """Invoice dict with exactly INVOICE_FIELDS, in JSON-friendly types"""
+    record = {field: invoice.get(field) for field in INVOICE_FIELDS}
+    record["amount"] = float(record["amount"] or 0)
+    for field in ("due_date", "payment_date"):
+        value = record[field]
+        if value is not None and not isinstance(value, str):
+            record[field] = value.isoformat()
+    return record
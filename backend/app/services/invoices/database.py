@@ -0,0 +1,115 @@
+"""
+Database invoice backend (the `invoices` table: Postgres, or SQLite locally)
+"""
+from datetime import date, datetime
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.invoice import Invoice
+from app.services.invoices.base import InvoiceBackend, normalize_invoice
+from app.utils import database
+
+# Rows per INSERT (9 columns; stays under Postgres' 32767 bind parameters)
+_LOAD_BATCH_SIZE = 2000
+
+
+def _to_dict(invoice: Invoice) -> Dict[str, Any]:
+    return normalize_invoice({
+        "id": invoice.id,
+        "amount": invoice.amount,
+        "status": invoice.status,
+        "due_date": invoice.due_date,
+        "customer": invoice.customer,
+        "description": invoice.description,
+        "payment_date": invoice.payment_date,
+    })
+
+
+def _to_date(value: Optional[str]) -> Optional[date]:
+    return date.fromisoformat(value) if value else None
+
+
+class DatabaseInvoiceBackend(InvoiceBackend):
+    """
+    Invoices in the application database
+
+    Lookups by id use the (company_key, id) primary key; customer and
+    status lookups use ix_invoices_company_customer / _status.
+    """
+
+    def __init__(self, session_factory: Optional[Callable[[], AsyncSession]] = None):
+        self._session_factory = session_factory
+
+    def _session(self) -> AsyncSession:
+        return (self._session_factory or database.AsyncSessionLocal)()
+
+    async def get(self, company_key: str, invoice_id: str) -> Optional[Dict[str, Any]]:
+        async with self._session() as db:
+            invoice = await db.get(Invoice, (company_key, invoice_id))
+            return _to_dict(invoice) if invoice else None
+
+    async def _select(self, query) -> List[Dict[str, Any]]:
+        async with self._session() as db:
+            result = await db.execute(query)
+            return [_to_dict(invoice) for invoice in result.scalars().all()]
+
+    async def by_customer(self, company_key: str, customer: str, limit: int = 50) -> List[Dict[str, Any]]:
+        return await self._select(
+            select(Invoice)
+            .where(Invoice.company_key == company_key, func.lower(Invoice.customer) == customer.lower())
+            .limit(limit)
+        )
+
+    async def by_status(self, company_key: str, status: str, limit: int = 50) -> List[Dict[str, Any]]:
+        return await self._select(
+            select(Invoice).where(Invoice.company_key == company_key, Invoice.status == status).limit(limit)
+        )
+
+    async def invoice_ids(self, company_key: str, limit: int = 5) -> List[str]:
+        async with self._session() as db:
+            result = await db.execute(
+                select(Invoice.id).where(Invoice.company_key == company_key).order_by(Invoice.id).limit(limit)
+            )
+            return list(result.scalars().all())
+
+    async def bulk_load(self, company_key: str, invoices: Iterable[Dict[str, Any]]) -> int:
+        """Upsert invoices in multi-row INSERT batches, one transaction"""
+        total = 0
+        rows = (self._row(company_key, invoice) for invoice in invoices)
+        async with self._session() as db:
+            dialect = db.bind.dialect.name
+            insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            while batch := list(islice(rows, _LOAD_BATCH_SIZE)):
+                statement = insert(Invoice).values(batch)
+                statement = statement.on_conflict_do_update(
+                    index_elements=["company_key", "id"],
+                    set_={
+                        column: statement.excluded[column]
+                        for column in ("customer", "status", "amount", "due_date",
+                                       "description", "payment_date", "updated_at")
+                    }
+                )
+                await db.execute(statement)
+                total += len(batch)
+            await db.commit()
+        self.invalidate_lookups(company_key)
+        return total
+
+    @staticmethod
+    def _row(company_key: str, invoice: Dict[str, Any]) -> Dict[str, Any]:
+        record = normalize_invoice(invoice)
+        return {
+            "company_key": company_key,
+            "id": record["id"],
+            "customer": record["customer"],
+            "status": record["status"],
+            "amount": record["amount"],
+            "due_date": _to_date(record["due_date"]),
+            "description": record["description"],
+            "payment_date": _to_date(record["payment_date"]),
+            "updated_at": datetime.utcnow(),
+        }
@@ -0,0 +1,53 @@
+"""
+Invoice backend factory
+"""
+from typing import Callable, Dict, Optional
+
+from app.config import settings
+from app.services.invoices.base import InvoiceBackend
+from app.services.invoices.database import DatabaseInvoiceBackend
+from app.services.invoices.demo import DEMO_INVOICES
+from app.services.invoices.memory import InMemoryInvoiceBackend
+from app.services.invoices.snapshot import SnapshotInvoiceBackend
+from app.services.tools.result_cache import invalidate_tool_results
+
+INVOICE_BACKENDS: Dict[str, Callable[[], InvoiceBackend]] = {
+    "memory": lambda: InMemoryInvoiceBackend(DEMO_INVOICES),
+    "database": DatabaseInvoiceBackend,
+    "snapshot": lambda: SnapshotInvoiceBackend(settings.INVOICE_SNAPSHOT_PATH),
+}
+
+# Process-wide backend (a snapshot is mapped once per worker)
+_backend: Optional[InvoiceBackend] = None
+
+
+def get_invoice_backend() -> InvoiceBackend:
+    """
+    The configured invoice backend (settings.INVOICE_BACKEND), created on first use
+
+    Raises:
+        ValueError: If the backend name is not supported
+    """
+    global _backend
+    if _backend is None:
+        factory = INVOICE_BACKENDS.get(settings.INVOICE_BACKEND)
+        if factory is None:
+            raise ValueError(f"Unsupported invoice backend: {settings.INVOICE_BACKEND}")
+        _backend = factory()
+    return _backend
+
+
+def set_invoice_backend(backend: Optional[InvoiceBackend]):
+    """Replace the process-wide backend (tests, reloading a snapshot)"""
+    global _backend
+    _backend = backend
+    # Cached invoice_lookup results came from the previous data
+    invalidate_tool_results("invoice_lookup")
+
+
+async def close_invoice_backend():
+    """Release the backend (application shutdown)"""
+    global _backend
+    if _backend is not None:
+        await _backend.aclose()
+        _backend = None
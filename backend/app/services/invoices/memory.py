@@ -0,0 +1,52 @@
+"""
+In-memory invoice backend (demo data, tests)
+"""
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.services.invoices.base import InvoiceBackend, normalize_invoice
+
+
+class InMemoryInvoiceBackend(InvoiceBackend):
+    """Dicts per company with customer/status indexes; local to the process"""
+
+    def __init__(self, invoices: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None):
+        self._invoices: Dict[str, Dict[str, Dict[str, Any]]] = defaultdict(dict)
+        self._by_customer: Dict[tuple, List[str]] = defaultdict(list)
+        self._by_status: Dict[tuple, List[str]] = defaultdict(list)
+        for company_key, company_invoices in (invoices or {}).items():
+            self._load(company_key, company_invoices.values())
+
+    def _load(self, company_key: str, invoices: Iterable[Dict[str, Any]]) -> int:
+        company = self._invoices[company_key]
+        count = 0
+        for invoice in invoices:
+            record = normalize_invoice(invoice)
+            previous = company.get(record["id"])
+            if previous:
+                self._by_customer[(company_key, (previous["customer"] or "").lower())].remove(record["id"])
+                self._by_status[(company_key, previous["status"])].remove(record["id"])
+            company[record["id"]] = record
+            self._by_customer[(company_key, (record["customer"] or "").lower())].append(record["id"])
+            self._by_status[(company_key, record["status"])].append(record["id"])
+            count += 1
+        return count
+
+    async def get(self, company_key: str, invoice_id: str) -> Optional[Dict[str, Any]]:
+        return self._invoices.get(company_key, {}).get(invoice_id)
+
+    async def by_customer(self, company_key: str, customer: str, limit: int = 50) -> List[Dict[str, Any]]:
+        ids = self._by_customer.get((company_key, customer.lower()), [])[:limit]
+        return [self._invoices[company_key][invoice_id] for invoice_id in ids]
+
+    async def by_status(self, company_key: str, status: str, limit: int = 50) -> List[Dict[str, Any]]:
+        ids = self._by_status.get((company_key, status), [])[:limit]
+        return [self._invoices[company_key][invoice_id] for invoice_id in ids]
+
+    async def invoice_ids(self, company_key: str, limit: int = 5) -> List[str]:
+        return list(self._invoices.get(company_key, {}))[:limit]
+
+    async def bulk_load(self, company_key: str, invoices: Iterable[Dict[str, Any]]) -> int:
+        count = self._load(company_key, invoices)
+        self.invalidate_lookups(company_key)
+        return count
@@ -0,0 +1,217 @@
+"""
+Memory-mapped, read-only invoice snapshot
+
+A snapshot is one file built offline (scripts/load_invoices.py) and
+mapped read-only by every worker, so the OS page cache holds a single
+copy shared by all processes on the host. Layout (little-endian):
+
+  header    magic "INVSNAP1", then u64 slot_count, record_count,
+            customer_offset, status_offset, company_offset
+  slots     slot_count x (u64 key hash, u64 record offset); open addressing
+            with linear probing on hash(company_key, id); offset 0 = empty
+  records   u32 length + compact JSON (the invoice plus "_company")
+  customer  record_count x (u64 hash(company_key, lower(customer)), u64 offset),
+  status    record_count x (u64 hash(company_key, status), u64 offset),
+  company   record_count x (u64 hash(company_key), u64 offset),
+            all three sorted by hash for binary search
+
+Lookups by id are O(1): one hash, a probe or two and one JSON decode.
+Customer/status/company lookups are a binary search followed by a sequential
+read. Hashes are verified against the decoded record, so a 64-bit
+collision can never return another tenant's invoice.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.services.invoices.base import InvoiceBackend, normalize_invoice
+
+MAGIC = b"INVSNAP1"
+_HEADER = struct.Struct("<8sQQQQQ")
+_PAIR = struct.Struct("<QQ")
+_LENGTH = struct.Struct("<I")
+
+
+def _hash(*parts: str) -> int:
+    digest = hashlib.blake2b("\x00".join(parts).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1  # 0 is reserved
+
+
+def _slot_count(records: int) -> int:
+    """Power of two keeping the table at most half full"""
+    count = 8
+    while count < records * 2:
+        count *= 2
+    return count
+
+
+def build_snapshot(path: str, invoices: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+    """
+    Write a snapshot of (company_key, invoice) pairs to path; returns the record count
+
+    The file is written next to path and renamed into place, so readers
+    never see a partial snapshot. Later duplicates of an id replace earlier ones.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".invoices-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w+b") as out:
+            out.write(b"\0" * _HEADER.size)  # placeholder until counts are known
+
+            # Records go first into a scratch file; offsets are rebased once
+            # the slot table size is known
+            ids: Dict[int, int] = {}
+            record_offsets = array("Q")
+            customer_keys = array("Q")
+            status_keys = array("Q")
+            company_keys = array("Q")
+            with tempfile.TemporaryFile(dir=directory) as records:
+                for company_key, invoice in invoices:
+                    record = normalize_invoice(invoice)
+                    key = _hash(company_key, record["id"])
+                    payload = json.dumps({**record, "_company": company_key}, separators=(",", ":")).encode()
+                    offset = records.tell()
+                    records.write(_LENGTH.pack(len(payload)))
+                    records.write(payload)
+
+                    index = ids.get(key)
+                    if index is None:
+                        ids[key] = len(record_offsets)
+                        record_offsets.append(offset)
+                        customer_keys.append(_hash(company_key, (record["customer"] or "").lower()))
+                        status_keys.append(_hash(company_key, record["status"] or ""))
+                        company_keys.append(_hash(company_key))
+                    else:
+                        record_offsets[index] = offset
+                        customer_keys[index] = _hash(company_key, (record["customer"] or "").lower())
+                        status_keys[index] = _hash(company_key, record["status"] or "")
+
+                record_count = len(record_offsets)
+                slot_count = _slot_count(record_count)
+                records_base = _HEADER.size + slot_count * _PAIR.size
+
+                slots = array("Q", bytes(slot_count * _PAIR.size))
+                mask = slot_count - 1
+                for key, index in ids.items():
+                    slot = key & mask
+                    while slots[2 * slot]:
+                        slot = (slot + 1) & mask
+                    slots[2 * slot] = key
+                    slots[2 * slot + 1] = records_base + record_offsets[index]
+                out.write(slots.tobytes())
+
+                records.seek(0)
+                while chunk := records.read(1 << 20):
+                    out.write(chunk)
+
+            customer_offset = out.tell()
+            _write_index(out, customer_keys, record_offsets, records_base)
+            status_offset = out.tell()
+            _write_index(out, status_keys, record_offsets, records_base)
+            company_offset = out.tell()
+            _write_index(out, company_keys, record_offsets, records_base)
+
+            out.seek(0)
+            out.write(_HEADER.pack(
+                MAGIC, slot_count, record_count, customer_offset, status_offset, company_offset
+            ))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return record_count
+
+
+def _write_index(out, keys: array, record_offsets: array, records_base: int):
+    pairs = sorted(zip(keys, record_offsets))
+    flat = array("Q")
+    for key, offset in pairs:
+        flat.append(key)
+        flat.append(records_base + offset)
+    out.write(flat.tobytes())
+
+
+class SnapshotInvoiceBackend(InvoiceBackend):
+    """Read-only invoice lookups against a memory-mapped snapshot file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, self.slot_count, self.record_count,
+         self._customer_offset, self._status_offset, self._company_offset) = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} is not an invoice snapshot")
+        self._mask = self.slot_count - 1
+
+    def _record(self, offset: int) -> Dict[str, Any]:
+        (length,) = _LENGTH.unpack_from(self._map, offset)
+        start = offset + _LENGTH.size
+        return json.loads(self._map[start:start + length])
+
+    def lookup(self, company_key: str, invoice_id: str) -> Optional[Dict[str, Any]]:
+        """Synchronous id lookup (no I/O beyond page faults)"""
+        key = _hash(company_key, invoice_id)
+        slot = key & self._mask
+        while True:
+            slot_key, offset = _PAIR.unpack_from(self._map, _HEADER.size + slot * _PAIR.size)
+            if not slot_key:
+                return None
+            if slot_key == key:
+                record = self._record(offset)
+                if record.pop("_company") == company_key and record["id"] == invoice_id:
+                    return record
+            slot = (slot + 1) & self._mask
+
+    def _scan_index(self, base: int, key: int, limit: int, matches) -> List[Dict[str, Any]]:
+        """Records under key in a sorted (hash, offset) index"""
+        low, high = 0, self.record_count
+        while low < high:
+            middle = (low + high) // 2
+            if _PAIR.unpack_from(self._map, base + middle * _PAIR.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        found = []
+        for position in range(low, self.record_count):
+            entry_key, offset = _PAIR.unpack_from(self._map, base + position * _PAIR.size)
+            if entry_key != key or len(found) >= limit:
+                break
+            record = self._record(offset)
+            if matches(record):
+                record.pop("_company")
+                found.append(record)
+        return found
+
+    async def get(self, company_key: str, invoice_id: str) -> Optional[Dict[str, Any]]:
+        return self.lookup(company_key, invoice_id)
+
+    async def by_customer(self, company_key: str, customer: str, limit: int = 50) -> List[Dict[str, Any]]:
+        customer = customer.lower()
+        return self._scan_index(
+            self._customer_offset, _hash(company_key, customer), limit,
+            lambda r: r["_company"] == company_key and (r["customer"] or "").lower() == customer
+        )
+
+    async def by_status(self, company_key: str, status: str, limit: int = 50) -> List[Dict[str, Any]]:
+        return self._scan_index(
+            self._status_offset, _hash(company_key, status), limit,
+            lambda r: r["_company"] == company_key and r["status"] == status
+        )
+
+    async def invoice_ids(self, company_key: str, limit: int = 5) -> List[str]:
+        records = self._scan_index(
+            self._company_offset, _hash(company_key), limit, lambda r: r["_company"] == company_key
+        )
+        return [record["id"] for record in records]
+
+    async def aclose(self) -> None:
+        self._map.close()
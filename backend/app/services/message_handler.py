@@ -2,19 +2,26 @@
 Message handling service - orchestrates vendor calls, billing, and tools
 """
 import time
-from typing import Optional
-from uuid import UUID
-from sqlalchemy.orm import Session
+import uuid
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Optional, Tuple, Union
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 
-from app.models.session import Session as SessionModel, Message
-from app.models.agent import Agent
-from app.services.vendors.base import VendorRequest
-from app.services.reliability.resilient_caller import ResilientVendorCaller
+from app.models.session import Message
+from app.services.vendors.base import VendorRequest, StreamChunk
+from app.services.reliability.resilient_caller import ResilientVendorCaller, AllVendorsFailed
 from app.services.billing.metering import create_usage_event
-from app.services.idempotency import IdempotencyService
-from app.services.tools.executor import ToolExecutor
+from app.services.billing.rollups import fold_usage_rollups
+from app.services.idempotency import get_idempotency_store
+from app.services.history import get_conversation_history
+from app.services.request_context import RequestContext
+from app.services.response_cache import (
+    CachedResponse, response_cache, response_cache_key, response_cache_ttl
+)
+from app.services.tools.executor import ToolExecutor, tool_registry
 from app.schemas.session import MessageResponse
+from app.config import settings
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -23,191 +30,394 @@ logger = get_logger(__name__)
 class MessageHandler:
     """
     Handles message processing with vendor calls, billing, and tool execution
+
+    A chat turn is written as a single unit of work: the user message,
+    ProviderCall rows, tool audit rows, assistant message, usage event and
+    idempotency record are added to the session and committed once at the
+    end; the usage rollups are folded afterwards in a short transaction of
+    their own. Primary keys and timestamps are generated client-side, so nothing
+    needs to be refreshed after the commit.
+
+    The tenant, session and agent come from the request's context and
+    are never reloaded here.
     """
 
-    def __init__(
-        self,
-        db: Session,
-        tenant_id: UUID,
-        session: SessionModel,
-        correlation_id: Optional[str]
-    ):
+    def __init__(self, db: AsyncSession, context: RequestContext):
         self.db = db
-        self.tenant_id = tenant_id
-        self.session = session
-        self.correlation_id = correlation_id
+        self.context = context
+        self.tenant_id = context.tenant_id
+        self.session = context.session
+        self.agent = context.agent
+        self.correlation_id = context.correlation_id
+        self._idempotency = None
+        self._response_cache_ttl: Optional[int] = None
+
+    def _hedge_percentile(self) -> Optional[float]:
+        """
+        Hedging percentile from the agent's config, or None when not opted in
+
+        Agent.config: {"hedging": {"enabled": true, "percentile": 95}}
+        """
+        hedging = (self.agent.config or {}).get("hedging") or {}
+        if not hedging.get("enabled"):
+            return None
+        return float(hedging.get("percentile", settings.VENDOR_HEDGE_PERCENTILE))
+
+    async def _claim(self, idempotency_key: str) -> Optional[bytes]:
+        """
+        Claim the idempotency key for this turn
 
-        # Load agent
-        self.agent = db.query(Agent).filter(Agent.id == session.agent_id).first()
+        Returns:
+            The response JSON of an earlier (or concurrent, once finished)
+            request with the same key, or None if this turn should be processed
+        """
+        # End the read transaction the request context was loaded in: a
+        # duplicate may wait here for IDEMPOTENCY_WAIT_SECONDS and must not
+        # hold a pooled connection meanwhile (nothing is pending yet)
+        await self.db.commit()
+        self._idempotency = get_idempotency_store(self.db, self.tenant_id)
+        return await self._idempotency.claim(idempotency_key)
+
+    async def _release(self, idempotency_key: Optional[str]):
+        """Give up the claim after a failed turn so a retry can run"""
+        if idempotency_key and self._idempotency:
+            await self._idempotency.release(idempotency_key)
 
     async def handle_message(
         self,
         user_message: str,
-        idempotency_key: Optional[str] = None
-    ) -> MessageResponse:
+        idempotency_key: Optional[str] = None,
+        raw_replay: bool = False
+    ) -> Union[MessageResponse, bytes]:
         """
         Process user message and return assistant response
+
+        With raw_replay, a replayed idempotent response is returned as the
+        stored JSON bytes instead of being parsed back into a MessageResponse.
         """
         # Check idempotency
         if idempotency_key:
-            idempotency_service = IdempotencyService(self.db, self.tenant_id)
-            cached_response = idempotency_service.get_cached_response(idempotency_key)
+            cached_response = await self._claim(idempotency_key)
             if cached_response:
-                return MessageResponse(**cached_response)
+                if raw_replay:
+                    return cached_response
+                return MessageResponse.model_validate_json(cached_response)
+
+        try:
+            return await self._answer(user_message, idempotency_key)
+        except BaseException:
+            await self._release(idempotency_key)
+            raise
 
+    async def _answer(self, user_message: str, idempotency_key: Optional[str]) -> MessageResponse:
+        """
+        Run a (claimed) turn: vendor call, tool lookup, persistence
+        """
+        vendor_request = await self._start_turn(user_message)
         start_time = time.time()
 
+        cache_key = self._response_cache_key(user_message, vendor_request)
+        if cache_key:
+            cached = await response_cache.get(cache_key, self._response_cache_ttl)
+            if cached:
+                return await self._persist_cache_hit(cached, start_time, idempotency_key)
+
+        # Call vendor with resilience
+        caller = self._vendor_caller()
+
+        try:
+            vendor_response = await caller.call_with_fallback(
+                primary_provider=self.agent.primary_provider,
+                fallback_provider=self.agent.fallback_provider,
+                request=vendor_request
+            )
+        except AllVendorsFailed:
+            # Keep the user message and provider call audit trail
+            await self.db.commit()
+            raise
+
+        total_latency = int((time.time() - start_time) * 1000)
+        # Bill the vendor that actually answered (fallback or hedge winner)
+        provider_used = vendor_response.provider or self.agent.primary_provider
+
+        if cache_key:
+            await response_cache.set(cache_key, CachedResponse(
+                vendor_response.text, provider_used, vendor_response.tokens_in, vendor_response.tokens_out
+            ), self._response_cache_ttl)
+
+        # Check for tool calls
+        tools_called = []
+        response_text = vendor_response.text
+
+        intents = tool_registry.detect(user_message, self.agent.enabled_tools)
+        if intents:
+            tool_executor = ToolExecutor(self.db, self.context, autocommit=False)
+            results = await tool_executor.execute_many(
+                [(intent.tool.name, intent.params) for intent in intents]
+            )
+            replies = []
+            for intent, tool_result in zip(intents, results):
+                if tool_result:
+                    if intent.tool.name not in tools_called:
+                        tools_called.append(intent.tool.name)
+                    replies.append(intent.tool.format_result(tool_result))
+            if replies:
+                # Replace AI response with tool-enhanced response
+                response_text = "\n\n".join(replies)
+
+        return await self._persist_turn(
+            response_text=response_text,
+            provider_used=provider_used,
+            tokens_in=vendor_response.tokens_in,
+            tokens_out=vendor_response.tokens_out,
+            total_latency=total_latency,
+            tools_called=tools_called,
+            idempotency_key=idempotency_key
+        )
+
+    async def stream_message(
+        self,
+        user_message: str,
+        idempotency_key: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Process user message, yielding the assistant response as it is generated
+
+        Yields ("delta", {"text": ...}) events as tokens arrive, then one
+        ("message", MessageResponse) once the turn has been persisted; a
+        replayed idempotent response is yielded as its stored JSON bytes. The
+        turn is written in one transaction after the stream ends; a stream
+        that fails or is abandoned by the client keeps only the user message
+        and the provider call audit trail. Messages that trigger a tool
+        are answered in one piece, since the tool output replaces the
+        vendor's text.
+        """
+        if idempotency_key:
+            cached_response = await self._claim(idempotency_key)
+            if cached_response:
+                yield "message", cached_response
+                return
+
+        try:
+            async with aclosing(self._stream_answer(user_message, idempotency_key)) as events:
+                async for event in events:
+                    yield event
+        except BaseException:
+            # Includes the client going away (generator closed mid-stream)
+            await self._release(idempotency_key)
+            raise
+
+    async def _stream_answer(
+        self,
+        user_message: str,
+        idempotency_key: Optional[str]
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """Run a (claimed) streaming turn"""
+        if self._may_call_tools(user_message):
+            response = await self._answer(user_message, idempotency_key)
+            yield "delta", {"text": response.content}
+            yield "message", response
+            return
+
+        vendor_request = await self._start_turn(user_message)
+        start_time = time.time()
+
+        cache_key = self._response_cache_key(user_message, vendor_request)
+        if cache_key:
+            cached = await response_cache.get(cache_key, self._response_cache_ttl)
+            if cached:
+                response = await self._persist_cache_hit(cached, start_time, idempotency_key)
+                yield "delta", {"text": response.content}
+                yield "message", response
+                return
+
+        caller = self._vendor_caller()
+
+        parts = []
+        final = StreamChunk(done=True)  # replaced by the vendor's done chunk
+        refresh_at = time.monotonic() + settings.IDEMPOTENCY_LOCK_TTL_SECONDS / 3
+        try:
+            async with aclosing(caller.stream_with_fallback(
+                primary_provider=self.agent.primary_provider,
+                fallback_provider=self.agent.fallback_provider,
+                request=vendor_request
+            )) as chunks:
+                async for chunk in chunks:
+                    if chunk.done:
+                        final = chunk
+                        continue
+                    parts.append(chunk.text)
+                    yield "delta", {"text": chunk.text}
+                    # An answer may stream for longer than the claim lives;
+                    # keep it so a retry waits instead of running a second turn
+                    if idempotency_key and time.monotonic() >= refresh_at:
+                        await self._idempotency.refresh(idempotency_key)
+                        refresh_at = time.monotonic() + settings.IDEMPOTENCY_LOCK_TTL_SECONDS / 3
+        except BaseException:
+            # AllVendorsFailed, a mid-stream failure or the client going away
+            # (stream closed, 'cancelled' row logged): keep the user message
+            # and provider call audit trail
+            await self.db.commit()
+            raise
+
+        provider_used = final.provider or self.agent.primary_provider
+        if cache_key:
+            await response_cache.set(cache_key, CachedResponse(
+                "".join(parts), provider_used, final.tokens_in or 0, final.tokens_out or 0
+            ), self._response_cache_ttl)
+
+        response = await self._persist_turn(
+            response_text="".join(parts),
+            provider_used=provider_used,
+            tokens_in=final.tokens_in or 0,
+            tokens_out=final.tokens_out or 0,
+            total_latency=int((time.time() - start_time) * 1000),
+            tools_called=[],
+            idempotency_key=idempotency_key
+        )
+
+        yield "message", response
+
+    async def _start_turn(self, user_message: str) -> VendorRequest:
+        """
+        Stage the user message and build the vendor request
+        """
+        history = await get_conversation_history(self.db, self.session.id, self.agent)
+
+        # End the read-only transaction so no pooled connection is held
+        # while the vendor call is in flight (nothing is pending yet)
+        await self.db.commit()
+
         # Create user message
         user_msg = Message(
+            id=uuid.uuid4(),
             session_id=self.session.id,
             role="user",
             content=user_message,
-            correlation_id=self.correlation_id
+            correlation_id=self.correlation_id,
+            created_at=datetime.utcnow()
         )
         self.db.add(user_msg)
-        self.db.commit()
 
-        # Prepare vendor request
-        vendor_request = VendorRequest(
+        return VendorRequest(
             system_prompt=self.agent.system_prompt,
-            user_message=user_message
+            user_message=user_message,
+            conversation_history=history
         )
 
-        # Call vendor with resilience
-        caller = ResilientVendorCaller(
-            tenant_id=str(self.tenant_id),
-            session_id=str(self.session.id),
-            correlation_id=self.correlation_id,
-            db=self.db
-        )
-
-        vendor_response = await caller.call_with_fallback(
-            primary_provider=self.agent.primary_provider,
-            fallback_provider=self.agent.fallback_provider,
-            request=vendor_request
+    def _vendor_caller(self) -> ResilientVendorCaller:
+        """Vendor caller that leaves its rows in this turn's transaction"""
+        return ResilientVendorCaller(
+            self.context,
+            db=self.db,
+            autocommit=False,
+            hedge_percentile=self._hedge_percentile()
         )
 
-        total_latency = int((time.time() - start_time) * 1000)
+    def _response_cache_key(self, user_message: str, vendor_request: VendorRequest) -> Optional[str]:
+        """
+        Response cache key for this turn, or None if the agent has not opted
+        in or the message may trigger a tool (tool output is live data)
+        """
+        self._response_cache_ttl = response_cache_ttl(self.agent)
+        if self._response_cache_ttl is None or self._may_call_tools(user_message):
+            return None
+        return response_cache_key(self.tenant_id, self.agent.primary_provider, vendor_request)
 
-        # Check for tool calls
-        tools_called = []
-        response_text = vendor_response.text
+    async def _persist_cache_hit(
+        self,
+        cached: CachedResponse,
+        start_time: float,
+        idempotency_key: Optional[str]
+    ) -> MessageResponse:
+        """Persist a turn answered from the response cache (billed at zero cost)"""
+        logger.info(
+            "Response cache hit",
+            extra={"agent_id": str(self.agent.id), "correlation_id": self.correlation_id}
+        )
+        return await self._persist_turn(
+            response_text=cached.text,
+            provider_used=cached.provider,
+            tokens_in=0,
+            tokens_out=0,
+            total_latency=int((time.time() - start_time) * 1000),
+            tools_called=[],
+            idempotency_key=idempotency_key,
+            event_type="cache_hit",
+            usage_metadata={"cached_tokens_in": cached.tokens_in, "cached_tokens_out": cached.tokens_out}
+        )
 
-        # Check if message contains invoice-related keywords or invoice ID patterns
-        has_invoice_keyword = any(keyword in user_message.lower() for keyword in ["invoice", "inv-", "inv "])
-
-        if self.agent.enabled_tools and has_invoice_keyword:
-            # Simple tool detection (in production, use function calling)
-            import re
-
-            # Extract invoice ID from message
-            # Supports formats: "INV-TC-001", "INV-HF-007", "inv-tc-1", etc.
-            invoice_id = None
-
-            # Try to find INV-XX-XXX format (company-specific invoices)
-            # Matches: INV-TC-001, INV-HF-007, etc.
-            inv_match = re.search(r'INV-[A-Z]+-\d+', user_message, re.IGNORECASE)
-            if inv_match:
-                invoice_id = inv_match.group(0).upper()
-            else:
-                # Try legacy INV-XXX format
-                inv_match = re.search(r'INV-?\d+', user_message, re.IGNORECASE)
-                if inv_match:
-                    invoice_id = inv_match.group(0).upper()
-                    if '-' not in invoice_id:
-                        # Add dash if missing (e.g., "INV001" -> "INV-001")
-                        invoice_id = re.sub(r'(INV)(\d+)', r'\1-\2', invoice_id)
-                else:
-                    # Try to find just numbers after "invoice", "inv", "order", "id"
-                    num_match = re.search(r'(?:invoice|inv|order|id)\s*[:\-#]?\s*(\d+)', user_message, re.IGNORECASE)
-                    if num_match:
-                        num = num_match.group(1).zfill(3)  # Pad to 3 digits
-                        invoice_id = f"INV-{num}"
-
-            # Only call tool if invoice ID was found
-            if invoice_id:
-                tool_executor = ToolExecutor(self.db, self.tenant_id, self.agent.id, self.session.id)
-                tool_result = await tool_executor.execute_tool(
-                    "invoice_lookup",
-                    {"invoice_id": invoice_id}
-                )
-            else:
-                tool_result = None
-
-            if tool_result:
-                tools_called.append("invoice_lookup")
-                if tool_result.get("success"):
-                    invoice = tool_result.get('invoice')
-                    # Replace AI response with tool-enhanced response
-                    status_emoji = {
-                        'paid': '✅',
-                        'pending': '⏳',
-                        'overdue': '⚠️'
-                    }.get(invoice['status'], '📄')
-
-                    response_text = (
-                        f"I found the invoice you requested:\n\n"
-                        f"📄 Invoice ID: {invoice['id']}\n"
-                        f"👤 Customer: {invoice.get('customer', 'N/A')}\n"
-                        f"📝 Description: {invoice.get('description', 'N/A')}\n"
-                        f"💰 Amount: ${invoice['amount']:,.2f}\n"
-                        f"{status_emoji} Status: {invoice['status'].upper()}\n"
-                        f"📅 Due Date: {invoice['due_date']}"
-                    )
-
-                    if invoice.get('payment_date'):
-                        response_text += f"\n💳 Paid On: {invoice['payment_date']}"
-                else:
-                    # Invoice not found
-                    error_msg = tool_result.get("error", "Invoice not found")
-                    response_text = f"❌ {error_msg}"
+    def _may_call_tools(self, user_message: str) -> bool:
+        """Check if the message mentions a trigger of one of the agent's tools"""
+        return tool_registry.may_trigger(user_message, self.agent.enabled_tools)
 
+    async def _persist_turn(
+        self,
+        response_text: str,
+        provider_used: str,
+        tokens_in: int,
+        tokens_out: int,
+        total_latency: int,
+        tools_called: list,
+        idempotency_key: Optional[str],
+        event_type: str = "message",
+        usage_metadata: Optional[dict] = None
+    ) -> MessageResponse:
+        """
+        Add the assistant message, usage event and idempotency record, commit
+        the turn, then fold the event into the usage rollups
+        """
         # Create assistant message
         assistant_msg = Message(
+            id=uuid.uuid4(),
             session_id=self.session.id,
             role="assistant",
             content=response_text,
-            provider_used=self.agent.primary_provider,  # Track which vendor was used
-            tokens_in=vendor_response.tokens_in,
-            tokens_out=vendor_response.tokens_out,
+            provider_used=provider_used,  # Track which vendor was used
+            tokens_in=tokens_in,
+            tokens_out=tokens_out,
             latency_ms=total_latency,
             tools_called=tools_called,
-            correlation_id=self.correlation_id
+            correlation_id=self.correlation_id,
+            created_at=datetime.utcnow()
         )
         self.db.add(assistant_msg)
-        self.db.commit()
-        self.db.refresh(assistant_msg)
 
         # Create usage event
-        usage_event = create_usage_event(
+        usage_event = await create_usage_event(
             db=self.db,
             tenant_id=self.tenant_id,
             agent_id=self.agent.id,
             session_id=self.session.id,
             message_id=assistant_msg.id,
-            provider=self.agent.primary_provider,
-            tokens_in=vendor_response.tokens_in,
-            tokens_out=vendor_response.tokens_out
+            provider=provider_used,
+            tokens_in=tokens_in,
+            tokens_out=tokens_out,
+            event_type=event_type,
+            metadata=usage_metadata,
+            commit=False
         )
+        assistant_msg.cost_usd = usage_event.cost_usd
 
-        # Build response
-        response_data = {
-            "id": assistant_msg.id,
-            "session_id": assistant_msg.session_id,
-            "role": assistant_msg.role,
-            "content": assistant_msg.content,
-            "provider_used": assistant_msg.provider_used,
-            "tokens_in": assistant_msg.tokens_in,
-            "tokens_out": assistant_msg.tokens_out,
-            "latency_ms": assistant_msg.latency_ms,
-            "tools_called": assistant_msg.tools_called,
-            "correlation_id": assistant_msg.correlation_id,
-            "cost_usd": usage_event.cost_usd,
-            "created_at": assistant_msg.created_at
-        }
-
-        # Cache for idempotency
-        if idempotency_key:
-            idempotency_service.cache_response(idempotency_key, response_data)
+        response = MessageResponse.model_validate(assistant_msg)
+
+        # Cache for idempotency (database store: inside the turn's transaction),
+        # serialized once so replays are served without re-validation
+        idempotency = self._idempotency if idempotency_key else None
+        if idempotency:
+            payload = response.model_dump_json().encode()
+        if idempotency and idempotency.writes_in_transaction:
+            await idempotency.cache_response(idempotency_key, payload, commit=False)
+
+        # Flush the whole turn in one transaction
+        await self.db.commit()
+
+        # Redis store: publish only once the turn is durable
+        if idempotency and not idempotency.writes_in_transaction:
+            await idempotency.cache_response(idempotency_key, payload)
+
+        # Rollups are shared by every turn of the tenant/agent/provider, so
+        # their row locks stay out of the turn's transaction
+        await fold_usage_rollups(self.db, [usage_event])
 
-        return MessageResponse(**response_data)
+        return response
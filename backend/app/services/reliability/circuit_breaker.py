@@ -0,0 +1,215 @@
+"""
+Per-provider circuit breaker
+"""
+import time
+from collections import deque
+from enum import Enum
+from typing import Any, Callable, Dict, Optional
+
+from app.config import settings
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is short-circuited because the breaker is open"""
+    def __init__(self, provider: str):
+        self.provider = provider
+        super().__init__(f"Circuit breaker open for {provider}")
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open circuit breaker over a rolling window of calls
+
+    CLOSED: calls pass; the breaker trips once the window holds at least
+        min_calls outcomes and either the failure rate or the slow-call
+        rate reaches its threshold.
+    OPEN: calls are rejected until open_seconds have elapsed.
+    HALF_OPEN: up to half_open_probes trial calls pass; a fast success
+        closes the breaker, a failure or slow call re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window_size: int = 20,
+        min_calls: int = 5,
+        failure_rate_threshold: float = 0.5,
+        slow_call_ms: int = 5000,
+        slow_call_rate_threshold: float = 0.8,
+        open_seconds: float = 30.0,
+        half_open_probes: int = 1,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_ms = slow_call_ms
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self._clock = clock
+
+        # (failed, slow) per completed call
+        self._outcomes: deque = deque(maxlen=window_size)
+        self.state = CircuitState.CLOSED
+        self.opened_at: Optional[float] = None
+        self._probes_in_flight = 0
+
+        # Counters
+        self.total_calls = 0
+        self.total_failures = 0
+        self.rejected_calls = 0
+        self.times_opened = 0
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a call may be attempted (reserves a probe slot when half-open)
+        """
+        if self.state == CircuitState.OPEN:
+            if self._clock() - self.opened_at < self.open_seconds:
+                self.rejected_calls += 1
+                return False
+            self._transition(CircuitState.HALF_OPEN)
+
+        if self.state == CircuitState.HALF_OPEN:
+            if self._probes_in_flight >= self.half_open_probes:
+                self.rejected_calls += 1
+                return False
+            self._probes_in_flight += 1
+
+        return True
+
+    def record_success(self, latency_ms: int):
+        """Record a completed call"""
+        self.total_calls += 1
+        slow = latency_ms >= self.slow_call_ms
+
+        if self.state == CircuitState.HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            if slow:
+                self._trip()
+            else:
+                self._transition(CircuitState.CLOSED)
+            return
+
+        self._record(failed=False, slow=slow)
+
+    def record_failure(self):
+        """Record a failed call (error or timeout)"""
+        self.total_calls += 1
+        self.total_failures += 1
+
+        if self.state == CircuitState.HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            self._trip()
+            return
+
+        self._record(failed=True, slow=False)
+
+    def release(self):
+        """Give back a reserved probe slot for a call that never completed"""
+        if self.state == CircuitState.HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def _record(self, failed: bool, slow: bool):
+        # Outcomes of calls that started before the breaker opened are ignored
+        if self.state != CircuitState.CLOSED:
+            return
+
+        self._outcomes.append((failed, slow))
+        if len(self._outcomes) < self.min_calls:
+            return
+
+        failure_rate, slow_rate = self._rates()
+        if failure_rate >= self.failure_rate_threshold or slow_rate >= self.slow_call_rate_threshold:
+            self._trip()
+
+    def _rates(self):
+        if not self._outcomes:
+            return 0.0, 0.0
+        count = len(self._outcomes)
+        failures = sum(1 for failed, _ in self._outcomes if failed)
+        slow = sum(1 for _, is_slow in self._outcomes if is_slow)
+        return failures / count, slow / count
+
+    def _trip(self):
+        self.times_opened += 1
+        self._transition(CircuitState.OPEN)
+
+    def _transition(self, state: CircuitState):
+        if state == self.state:
+            return
+
+        previous = self.state
+        self.state = state
+        if state == CircuitState.OPEN:
+            self.opened_at = self._clock()
+            self._probes_in_flight = 0
+        elif state == CircuitState.HALF_OPEN:
+            self._probes_in_flight = 0
+        elif state == CircuitState.CLOSED:
+            self.opened_at = None
+            self._outcomes.clear()
+
+        logger.warning(
+            f"Circuit breaker {self.name}: {previous.value} -> {state.value}",
+            extra={"provider": self.name}
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current state and counters for the ops endpoint"""
+        failure_rate, slow_rate = self._rates()
+        retry_in = None
+        if self.state == CircuitState.OPEN:
+            retry_in = max(0.0, self.open_seconds - (self._clock() - self.opened_at))
+
+        return {
+            "provider": self.name,
+            "state": self.state.value,
+            "window_calls": len(self._outcomes),
+            "failure_rate": round(failure_rate, 4),
+            "slow_call_rate": round(slow_rate, 4),
+            "total_calls": self.total_calls,
+            "total_failures": self.total_failures,
+            "rejected_calls": self.rejected_calls,
+            "times_opened": self.times_opened,
+            "retry_in_seconds": round(retry_in, 2) if retry_in is not None else None,
+        }
+
+
+# Shared per-provider breakers (process-wide)
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(provider: str) -> CircuitBreaker:
+    """
+    Get the shared circuit breaker for a provider
+    """
+    breaker = _breakers.get(provider)
+    if breaker is None:
+        breaker = CircuitBreaker(
+            name=provider,
+            window_size=settings.CIRCUIT_BREAKER_WINDOW_SIZE,
+            min_calls=settings.CIRCUIT_BREAKER_MIN_CALLS,
+            failure_rate_threshold=settings.CIRCUIT_BREAKER_FAILURE_RATE,
+            slow_call_ms=settings.CIRCUIT_BREAKER_SLOW_CALL_MS,
+            slow_call_rate_threshold=settings.CIRCUIT_BREAKER_SLOW_CALL_RATE,
+            open_seconds=settings.CIRCUIT_BREAKER_OPEN_SECONDS,
+            half_open_probes=settings.CIRCUIT_BREAKER_HALF_OPEN_PROBES
+        )
+        _breakers[provider] = breaker
+    return breaker
+
+
+def get_all_circuit_breakers() -> Dict[str, CircuitBreaker]:
+    """All breakers created so far"""
+    return dict(_breakers)
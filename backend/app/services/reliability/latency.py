@@ -0,0 +1,120 @@
+"""
+Rolling per-provider latency histograms and adaptive timeouts
+"""
+import bisect
+import math
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+
+# Log-spaced bucket upper bounds: 1ms .. ~2min, ~10% apart
+_BUCKET_GROWTH = 1.1
+_BUCKET_BOUNDS: List[float] = [
+    _BUCKET_GROWTH ** i for i in range(int(math.log(120_000) / math.log(_BUCKET_GROWTH)) + 2)
+]
+
+
+class LatencyWindow:
+    """
+    Histogram of the most recent call latencies for one provider
+
+    Latencies fall into log-spaced buckets; the last `size` observations
+    are kept in a ring so evicted samples are subtracted from their bucket.
+    Percentiles are read off the cumulative counts and reported as the
+    bucket's upper bound (within ~10%, rounded up).
+    """
+
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._ring: deque = deque(maxlen=size)
+        self._counts = [0] * len(_BUCKET_BOUNDS)
+        self._lock = threading.Lock()
+
+    def record(self, latency_ms: float):
+        """Record an observed latency"""
+        bucket = min(bisect.bisect_left(_BUCKET_BOUNDS, max(latency_ms, 1)), len(_BUCKET_BOUNDS) - 1)
+        with self._lock:
+            if len(self._ring) == self._ring.maxlen:
+                self._counts[self._ring[0]] -= 1
+            self._ring.append(bucket)
+            self._counts[bucket] += 1
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """
+        Latency (ms) at the given percentile, or None until min_samples are recorded
+        """
+        with self._lock:
+            total = len(self._ring)
+            if total < self.min_samples:
+                return None
+
+            rank = max(1, math.ceil(pct / 100 * total))
+            seen = 0
+            for bucket, count in enumerate(self._counts):
+                seen += count
+                if seen >= rank:
+                    return _BUCKET_BOUNDS[bucket]
+        return _BUCKET_BOUNDS[-1]
+
+    def __len__(self) -> int:
+        return len(self._ring)
+
+
+# Shared per-provider windows (process-wide)
+_windows: Dict[str, LatencyWindow] = {}
+
+
+def get_latency_window(provider: str) -> LatencyWindow:
+    """
+    Get the shared latency window for a provider
+    """
+    window = _windows.get(provider)
+    if window is None:
+        window = LatencyWindow(
+            size=settings.VENDOR_LATENCY_WINDOW_SIZE,
+            min_samples=settings.VENDOR_LATENCY_MIN_SAMPLES
+        )
+        _windows[provider] = window
+    return window
+
+
+def get_all_latency_windows() -> Dict[str, LatencyWindow]:
+    """All windows created so far"""
+    return dict(_windows)
+
+
+def adaptive_timeout(provider: str) -> float:
+    """
+    Per-attempt timeout (seconds) for a provider
+
+    p<VENDOR_TIMEOUT_PERCENTILE> of recent latency times VENDOR_TIMEOUT_FACTOR,
+    clamped to [VENDOR_TIMEOUT_MIN_SECONDS, VENDOR_TIMEOUT_SECONDS]. Falls back
+    to the static VENDOR_TIMEOUT_SECONDS until enough samples are recorded or
+    when adaptive timeouts are disabled.
+    """
+    ceiling = float(settings.VENDOR_TIMEOUT_SECONDS)
+    if not settings.VENDOR_ADAPTIVE_TIMEOUT:
+        return ceiling
+
+    latency_ms = get_latency_window(provider).percentile(settings.VENDOR_TIMEOUT_PERCENTILE)
+    if latency_ms is None:
+        return ceiling
+
+    timeout = latency_ms / 1000 * settings.VENDOR_TIMEOUT_FACTOR
+    return min(ceiling, max(settings.VENDOR_TIMEOUT_MIN_SECONDS, timeout))
+
+
+def latency_snapshot(provider: str) -> Dict[str, Any]:
+    """Percentiles and current timeout for the ops endpoint"""
+    window = get_latency_window(provider)
+    p50, p95, p99 = (window.percentile(pct) for pct in (50, 95, 99))
+    return {
+        "provider": provider,
+        "samples": len(window),
+        "p50_ms": round(p50) if p50 is not None else None,
+        "p95_ms": round(p95) if p95 is not None else None,
+        "p99_ms": round(p99) if p99 is not None else None,
+        "timeout_seconds": round(adaptive_timeout(provider), 3),
+    }
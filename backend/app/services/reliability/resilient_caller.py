@@ -2,20 +2,19 @@
 Resilient vendor caller with timeout, retry, and fallback
 """
 import asyncio
+import random
 import time
-from typing import Optional
-from tenacity import (
-    retry,
-    stop_after_attempt,
-    wait_exponential,
-    retry_if_exception_type,
-    RetryError
-)
-from sqlalchemy.orm import Session
-
-from app.services.vendors.base import VendorAdapter, VendorRequest, NormalizedResponse
+from contextlib import aclosing
+from typing import AsyncIterator, Dict, Optional, Set, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.vendors.base import VendorAdapter, VendorRequest, NormalizedResponse, StreamChunk
 from app.services.vendors.factory import get_vendor_adapter
+from app.services.reliability.circuit_breaker import get_circuit_breaker, CircuitOpenError
+from app.services.reliability.retry_budget import retry_budget
+from app.services.reliability.latency import get_latency_window, adaptive_timeout
 from app.models.usage import ProviderCall
+from app.services.request_context import RequestContext
 from app.config import settings
 from app.utils.logger import get_logger
 
@@ -27,6 +26,34 @@ class VendorCallTimeout(Exception):
     pass
 
 
+class DeadlineExceeded(VendorCallTimeout):
+    """Raised when the per-request deadline leaves no time for another attempt"""
+    pass
+
+
+class VendorStreamError(Exception):
+    """Raised when a vendor stream ends before producing any data"""
+    pass
+
+
+class _HedgeLost(Exception):
+    """A hedged call that answered after the race was already won"""
+    def __init__(self, attempt_number: int, latency_ms: int):
+        self.attempt_number = attempt_number
+        self.latency_ms = latency_ms
+        super().__init__("Hedge race already won")
+
+
+class _OpenStream:
+    """A vendor stream whose first chunk has arrived"""
+    def __init__(self, first: StreamChunk, chunks: AsyncIterator[StreamChunk], start_time: float):
+        self.first = first
+        self.chunks = chunks
+        self.start_time = start_time
+        self.provider: Optional[str] = None
+        self.attempt_number = 0
+
+
 class AllVendorsFailed(Exception):
     """Raised when both primary and fallback vendors fail"""
     def __init__(self, primary_error: str, fallback_error: Optional[str] = None):
@@ -41,23 +68,61 @@ class AllVendorsFailed(Exception):
 class ResilientVendorCaller:
     """
     Handles vendor calls with timeout, retry, and fallback logic
+
+    Each attempt's timeout adapts to the provider's recent latency (see
+    latency.adaptive_timeout), capped by VENDOR_TIMEOUT_SECONDS.
+
+    One retry loop per provider, bounded three ways: VENDOR_MAX_RETRIES
+    attempts, a per-request deadline shared by the primary and the fallback,
+    and the process-wide retry budget. attempt_number in ProviderCall is the
+    sequence number of the vendor call within the request; marker rows
+    ('fallback', 'circuit_open') carry the number of the last call made
+    before them.
+
+    Every attempt goes through the provider's shared circuit breaker; while
+    it is open the provider is skipped without retries, so traffic goes
+    straight to the fallback.
+
+    With hedge_percentile set, the fallback is fired in parallel once the
+    primary has been outstanding longer than that percentile of its recent
+    latency. The first answer wins and the other call is cancelled (one
+    'cancelled' row per losing provider); failed attempts of either side
+    keep their rows. Hedges draw from the retry budget.
     """
 
     def __init__(
         self,
-        tenant_id: str,
-        session_id: str,
-        correlation_id: str,
-        db: Session
+        context: RequestContext,
+        db: AsyncSession,
+        autocommit: bool = True,
+        hedge_percentile: Optional[float] = None
     ):
-        self.tenant_id = tenant_id
-        self.session_id = session_id
-        self.correlation_id = correlation_id
+        self.context = context
+        self.tenant_id = context.tenant_id
+        self.session_id = context.session_id
+        self.correlation_id = context.correlation_id
         self.db = db
+        # When False, ProviderCall rows are only added to the session and the
+        # caller commits them together with the rest of its unit of work
+        self.autocommit = autocommit
         self.timeout_seconds = settings.VENDOR_TIMEOUT_SECONDS
         self.max_retries = settings.VENDOR_MAX_RETRIES
-
-    def _log_provider_call(
+        self.deadline_seconds = settings.VENDOR_REQUEST_DEADLINE_SECONDS
+        # Opt-in hedging: latency percentile of the primary after which the
+        # fallback is raced against it (None disables hedging)
+        self.hedge_percentile = hedge_percentile
+
+        # Per call_with_fallback() state
+        self._deadline = 0.0
+        self._attempts = 0
+        self._hedging = False
+        self._winner: Optional[str] = None
+        # Providers already logged as 'cancelled' in the current race
+        self._cancelled: Set[str] = set()
+        # provider -> (attempt_number, start_time) of the call in flight
+        self._in_flight: Dict[str, Tuple[int, float]] = {}
+
+    async def _log_provider_call(
         self,
         provider: str,
         attempt_number: int,
@@ -78,8 +143,15 @@ class ResilientVendorCaller:
             latency_ms=latency_ms,
             error_message=error_message
         )
+        if self._hedging and status == "cancelled":
+            # A loser is reported once, however its calls were cut short
+            if provider in self._cancelled:
+                return
+            self._cancelled.add(provider)
         self.db.add(provider_call)
-        self.db.commit()
+        # Racing hedge tasks share the session; the race commits once at the end
+        if self.autocommit and not self._hedging:
+            await self.db.commit()
 
         logger.info(
             f"Provider call logged",
@@ -91,74 +163,153 @@ class ResilientVendorCaller:
             }
         )
 
+    def _remaining(self) -> float:
+        """Seconds left before the per-request deadline"""
+        return self._deadline - time.monotonic()
+
     async def _call_with_timeout(
         self,
         vendor: VendorAdapter,
-        request: VendorRequest
+        request: VendorRequest,
+        timeout: float
     ) -> NormalizedResponse:
         """Call vendor with timeout"""
         try:
             response = await asyncio.wait_for(
                 vendor.call(request),
-                timeout=self.timeout_seconds
+                timeout=timeout
             )
             return response
         except asyncio.TimeoutError:
-            raise VendorCallTimeout(f"Vendor call timed out after {self.timeout_seconds}s")
+            raise VendorCallTimeout(f"Vendor call timed out after {timeout:.2f}s")
 
-    async def _call_with_retry(
+    async def _open_stream(
         self,
         vendor: VendorAdapter,
         request: VendorRequest,
-        attempt_offset: int = 0
-    ) -> NormalizedResponse:
-        """Call vendor with exponential backoff retry"""
-
-        @retry(
-            stop=stop_after_attempt(self.max_retries),
-            wait=wait_exponential(
-                multiplier=1,
-                min=settings.VENDOR_RETRY_MIN_WAIT,
-                max=settings.VENDOR_RETRY_MAX_WAIT
-            ),
-            retry=retry_if_exception_type((
-                VendorCallTimeout,
-                Exception  # Catch all vendor exceptions
-            )),
-            reraise=True
+        timeout: float
+    ) -> _OpenStream:
+        """Start a vendor stream and wait (with timeout) for its first chunk"""
+        start_time = time.time()
+        chunks = vendor.stream(request)
+        try:
+            first = await asyncio.wait_for(anext(chunks, None), timeout=timeout)
+        except asyncio.TimeoutError:
+            await chunks.aclose()
+            raise VendorCallTimeout(f"Vendor stream produced no data after {timeout:.2f}s")
+        except BaseException:
+            await chunks.aclose()
+            raise
+
+        if first is None:
+            await chunks.aclose()
+            raise VendorStreamError("Vendor stream ended without data")
+        return _OpenStream(first, chunks, start_time)
+
+    def _retry_delay(self, attempt: int) -> Optional[float]:
+        """
+        Backoff before the next attempt on this provider, or None to stop
+
+        Exponential backoff with jitter. Stops after max_retries attempts,
+        when the sleep would run past the deadline, or when the retry budget
+        is spent.
+        """
+        if attempt >= self.max_retries:
+            return None
+
+        ceiling = min(
+            settings.VENDOR_RETRY_MAX_WAIT,
+            settings.VENDOR_RETRY_MIN_WAIT * 2 ** (attempt - 1)
         )
-        async def _retry_call(attempt_number: int):
+        delay = random.uniform(settings.VENDOR_RETRY_MIN_WAIT, ceiling)
+        if delay >= self._remaining():
+            return None
+
+        if not retry_budget.try_acquire_retry():
+            logger.warning(
+                "Retry budget exhausted, not retrying",
+                extra={"correlation_id": self.correlation_id}
+            )
+            return None
+
+        return delay
+
+    async def _call_with_retry(
+        self,
+        vendor: VendorAdapter,
+        request: VendorRequest,
+        stream: bool = False
+    ):
+        """
+        Call vendor with bounded exponential backoff retry
+
+        With stream=True an attempt succeeds once the first chunk arrives and
+        an _OpenStream is returned; its terminal ProviderCall row is logged by
+        _relay_stream when the stream ends.
+        """
+        breaker = get_circuit_breaker(vendor.name)
+        retry_budget.record_request()
+
+        attempt = 0
+        while True:
+            attempt += 1
+            remaining = self._remaining()
+            if remaining <= 0:
+                await self._log_provider_call(
+                    provider=vendor.name,
+                    attempt_number=self._attempts,
+                    status="error",
+                    error_message="Request deadline exceeded"
+                )
+                raise DeadlineExceeded(f"Request deadline of {self.deadline_seconds}s exceeded")
+
+            # Short-circuit (no retries) while the provider's breaker is open
+            if not breaker.allow_request():
+                await self._log_provider_call(
+                    provider=vendor.name,
+                    attempt_number=self._attempts,
+                    status="circuit_open"
+                )
+                raise CircuitOpenError(vendor.name)
+
+            self._attempts += 1
+            attempt_number = self._attempts
+            timeout = min(self.timeout_seconds, adaptive_timeout(vendor.name), remaining)
             start_time = time.time()
+            self._in_flight[vendor.name] = (attempt_number, start_time)
             try:
                 logger.info(
                     f"Calling {vendor.name} (attempt {attempt_number})",
                     extra={"provider": vendor.name, "correlation_id": self.correlation_id}
                 )
-
-                response = await self._call_with_timeout(vendor, request)
-                latency_ms = int((time.time() - start_time) * 1000)
-
-                # Log success
-                self._log_provider_call(
-                    provider=vendor.name,
-                    attempt_number=attempt_number + attempt_offset,
-                    status="success",
-                    http_status=200,
-                    latency_ms=latency_ms
-                )
-
-                return response
+                if stream:
+                    response = await self._open_stream(vendor, request, timeout)
+                else:
+                    response = await self._call_with_timeout(vendor, request, timeout)
+
+            except asyncio.CancelledError:
+                # Lost a hedge race; give back a half-open probe slot if held.
+                # Censored sample, as for timeouts: the slow calls a hedge
+                # abandons must still count, or the hedge delay keeps shrinking
+                breaker.release()
+                get_latency_window(vendor.name).record(int((time.time() - start_time) * 1000))
+                raise
 
             except Exception as e:
+                self._in_flight.pop(vendor.name, None)
                 latency_ms = int((time.time() - start_time) * 1000)
+                breaker.record_failure()
+                if isinstance(e, VendorCallTimeout):
+                    # Censored sample: lets the timeout grow back when a vendor slows down
+                    get_latency_window(vendor.name).record(latency_ms)
                 http_status = getattr(e, 'status_code', None) or 500
                 error_msg = str(e)
+                delay = self._retry_delay(attempt)
 
-                # Log retry
-                self._log_provider_call(
+                await self._log_provider_call(
                     provider=vendor.name,
-                    attempt_number=attempt_number + attempt_offset,
-                    status="retry",
+                    attempt_number=attempt_number,
+                    status="retry" if delay is not None else "error",
                     http_status=http_status,
                     latency_ms=latency_ms,
                     error_message=error_msg
@@ -169,16 +320,258 @@ class ResilientVendorCaller:
                     extra={"provider": vendor.name, "correlation_id": self.correlation_id}
                 )
 
-                raise
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+
+            self._in_flight.pop(vendor.name, None)
+            latency_ms = int((time.time() - start_time) * 1000)
+            breaker.record_success(latency_ms)
+
+            if stream:
+                # latency_ms is time to first chunk here, not comparable with
+                # whole-call latencies; the relay records the total instead
+                response.provider = vendor.name
+                response.attempt_number = attempt_number
+                return response
+
+            get_latency_window(vendor.name).record(latency_ms)
+
+            if self._hedging:
+                # Both calls can complete in the same loop tick; first one wins
+                if self._winner is not None:
+                    raise _HedgeLost(attempt_number, latency_ms)
+                self._winner = vendor.name
+
+            response.provider = vendor.name
+            await self._log_provider_call(
+                provider=vendor.name,
+                attempt_number=attempt_number,
+                status="success",
+                http_status=200,
+                latency_ms=latency_ms
+            )
+
+            return response
+
+    def _hedge_delay(self, primary_provider: str, fallback_provider: Optional[str]) -> Optional[float]:
+        """
+        Seconds to wait on the primary before hedging, or None to not hedge
+        """
+        if self.hedge_percentile is None or not fallback_provider or fallback_provider == primary_provider:
+            return None
+
+        latency_ms = get_latency_window(primary_provider).percentile(self.hedge_percentile)
+        if latency_ms is None:
+            return None  # not enough history yet
+
+        return max(latency_ms, settings.VENDOR_HEDGE_MIN_DELAY_MS) / 1000
+
+    async def _call_hedged(
+        self,
+        primary_vendor: VendorAdapter,
+        fallback_vendor: VendorAdapter,
+        request: VendorRequest,
+        hedge_delay: float
+    ) -> NormalizedResponse:
+        """
+        Race the fallback against a slow primary
+
+        Raises the primary's error if it fails before the hedge fires (the
+        caller then falls back as usual), or AllVendorsFailed if both fail.
+
+        ProviderCall rows: every attempt of either provider is logged (failed
+        attempts keep their 'retry'/'error' rows even when the other side
+        wins), plus at most one 'cancelled' row per losing provider. The
+        race's rows are committed together when it ends.
+        """
+        self._hedging = True
+        self._winner = None
+        self._cancelled = set()
+        primary = asyncio.create_task(self._call_with_retry(primary_vendor, request))
+        tasks: Dict[asyncio.Task, str] = {primary: primary_vendor.name}
+        errors: Dict[str, str] = {}
+
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+            if done:
+                tasks.clear()
+                return primary.result()
+
+            if not retry_budget.try_acquire_retry():
+                logger.warning(
+                    "Retry budget exhausted, not hedging",
+                    extra={"correlation_id": self.correlation_id}
+                )
+                return await primary
+
+            logger.info(
+                f"Hedging {primary_vendor.name} with {fallback_vendor.name} after {hedge_delay:.3f}s",
+                extra={"provider": fallback_vendor.name, "correlation_id": self.correlation_id}
+            )
+            tasks[asyncio.create_task(self._call_with_retry(fallback_vendor, request))] = fallback_vendor.name
+
+            while tasks:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                winner = None
+                for task in done:
+                    provider = tasks.pop(task)
+                    try:
+                        response = task.result()
+                    except _HedgeLost as e:
+                        await self._log_provider_call(
+                            provider=provider,
+                            attempt_number=e.attempt_number,
+                            status="cancelled",
+                            latency_ms=e.latency_ms
+                        )
+                    except Exception as e:
+                        errors[provider] = str(e)
+                    else:
+                        winner = response
+
+                if winner is not None:
+                    await self._cancel_losers(tasks)
+                    tasks.clear()
+                    return winner
+
+            raise AllVendorsFailed(errors.get(primary_vendor.name), errors.get(fallback_vendor.name))
+
+        finally:
+            for task in tasks:
+                task.cancel()
+            self._hedging = False
+            self._in_flight.clear()
+            if self.autocommit:
+                await self.db.commit()
+
+    async def _cancel_losers(self, tasks: Dict[asyncio.Task, str]):
+        """Cancel the calls that lost the race and log the one in flight"""
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        for provider in tasks.values():
+            in_flight = self._in_flight.pop(provider, None)
+            if in_flight is None:
+                continue  # was backing off between retries, nothing to cancel
+            attempt_number, start_time = in_flight
+            await self._log_provider_call(
+                provider=provider,
+                attempt_number=attempt_number,
+                status="cancelled",
+                latency_ms=int((time.time() - start_time) * 1000)
+            )
+
+    async def _relay_stream(self, opened: _OpenStream) -> AsyncIterator[StreamChunk]:
+        """
+        Relay an opened stream, logging the attempt's outcome when it ends
+
+        The outcome is recorded however the relay ends: 'success', 'error'
+        (which also counts against the provider's circuit breaker) or
+        'cancelled' when the consumer abandons the stream (client disconnect).
+        Completed and abandoned streams add a latency sample, the latter
+        censored like a timeout.
+        """
+        status = "cancelled"
+        error: Optional[Exception] = None
+        try:
+            yield opened.first
+            while True:
+                # Idle timeout between chunks (the per-request deadline covers
+                # time to first chunk; a long answer may legitimately exceed it)
+                try:
+                    chunk = await asyncio.wait_for(anext(opened.chunks, None), timeout=self.timeout_seconds)
+                except asyncio.TimeoutError:
+                    raise VendorCallTimeout(f"Vendor stream stalled for {self.timeout_seconds}s")
+                if chunk is None:
+                    break
+                if chunk.done:
+                    chunk.provider = opened.provider
+                yield chunk
+            status = "success"
+        except Exception as e:
+            status, error = "error", e
+            get_circuit_breaker(opened.provider).record_failure()
+            logger.error(
+                f"{opened.provider} stream failed (attempt {opened.attempt_number}): {e}",
+                extra={"provider": opened.provider, "correlation_id": self.correlation_id}
+            )
+            raise
+        finally:
+            await opened.chunks.aclose()
+
+            latency_ms = int((time.time() - opened.start_time) * 1000)
+            if error is None or isinstance(error, VendorCallTimeout):
+                get_latency_window(opened.provider).record(latency_ms)
+            if error is not None:
+                http_status = getattr(error, 'status_code', None) or 500
+            else:
+                http_status = 200 if status == "success" else None
+            await self._log_provider_call(
+                provider=opened.provider,
+                attempt_number=opened.attempt_number,
+                status=status,
+                http_status=http_status,
+                latency_ms=latency_ms,
+                error_message=str(error) if error is not None else None
+            )
+
+    async def stream_with_fallback(
+        self,
+        primary_provider: str,
+        fallback_provider: Optional[str],
+        request: VendorRequest
+    ) -> AsyncIterator[StreamChunk]:
+        """
+        Streaming counterpart of call_with_fallback
+
+        Retries and fallback apply until the first chunk arrives. Once text
+        has been relayed the stream is committed to that provider, and a
+        failure mid-stream is raised to the consumer. Hedging does not apply.
+
+        Yields:
+            StreamChunk instances; chunk.done marks the final chunk with usage
+
+        Raises:
+            AllVendorsFailed: If no provider produced a first chunk
+        """
+        self._deadline = time.monotonic() + self.deadline_seconds
+        self._attempts = 0
+
+        errors = []
+        for provider in (primary_provider, fallback_provider):
+            if not provider:
+                continue
+            if errors:
+                logger.info(
+                    f"Falling back to: {provider}",
+                    extra={"provider": provider, "correlation_id": self.correlation_id}
+                )
+                await self._log_provider_call(
+                    provider=provider,
+                    attempt_number=self._attempts,
+                    status="fallback"
+                )
 
-        # Try with retries
-        for attempt in range(1, self.max_retries + 1):
             try:
-                return await _retry_call(attempt)
-            except RetryError as e:
-                if attempt == self.max_retries:
-                    # All retries exhausted
-                    raise e.last_attempt.exception()
+                opened = await self._call_with_retry(get_vendor_adapter(provider), request, stream=True)
+            except Exception as e:
+                errors.append(str(e))
+                logger.error(
+                    f"Vendor {provider} failed to start stream: {e}",
+                    extra={"provider": provider, "correlation_id": self.correlation_id}
+                )
+                continue
+
+            # Closed explicitly so an abandoned stream is logged right away
+            async with aclosing(self._relay_stream(opened)) as relay:
+                async for chunk in relay:
+                    yield chunk
+            return
+
+        raise AllVendorsFailed(*errors)
 
     async def call_with_fallback(
         self,
@@ -200,6 +593,9 @@ class ResilientVendorCaller:
         Raises:
             AllVendorsFailed: If both primary and fallback fail
         """
+        self._deadline = time.monotonic() + self.deadline_seconds
+        self._attempts = 0
+
         primary_vendor = get_vendor_adapter(primary_provider)
         primary_error = None
 
@@ -209,8 +605,15 @@ class ResilientVendorCaller:
                 f"Trying primary vendor: {primary_provider}",
                 extra={"provider": primary_provider, "correlation_id": self.correlation_id}
             )
+            hedge_delay = self._hedge_delay(primary_provider, fallback_provider)
+            if hedge_delay is not None:
+                fallback_vendor = get_vendor_adapter(fallback_provider)
+                return await self._call_hedged(primary_vendor, fallback_vendor, request, hedge_delay)
             return await self._call_with_retry(primary_vendor, request)
 
+        except AllVendorsFailed:
+            raise
+
         except Exception as e:
             primary_error = str(e)
             logger.error(
@@ -218,14 +621,6 @@ class ResilientVendorCaller:
                 extra={"provider": primary_provider, "correlation_id": self.correlation_id}
             )
 
-            # Log failure
-            self._log_provider_call(
-                provider=primary_provider,
-                attempt_number=self.max_retries,
-                status="error",
-                error_message=primary_error
-            )
-
         # Try fallback if configured
         if not fallback_provider:
             raise AllVendorsFailed(primary_error)
@@ -235,10 +630,9 @@ class ResilientVendorCaller:
             extra={"provider": fallback_provider, "correlation_id": self.correlation_id}
         )
 
-        # Log fallback attempt
-        self._log_provider_call(
+        await self._log_provider_call(
             provider=fallback_provider,
-            attempt_number=1,
+            attempt_number=self._attempts,
             status="fallback"
         )
 
@@ -246,11 +640,7 @@ class ResilientVendorCaller:
         fallback_error = None
 
         try:
-            return await self._call_with_retry(
-                fallback_vendor,
-                request,
-                attempt_offset=self.max_retries  # Continue attempt numbering
-            )
+            return await self._call_with_retry(fallback_vendor, request)
 
         except Exception as e:
             fallback_error = str(e)
@@ -259,12 +649,4 @@ class ResilientVendorCaller:
                 extra={"provider": fallback_provider, "correlation_id": self.correlation_id}
             )
 
-            # Log fallback failure
-            self._log_provider_call(
-                provider=fallback_provider,
-                attempt_number=self.max_retries,
-                status="error",
-                error_message=fallback_error
-            )
-
         raise AllVendorsFailed(primary_error, fallback_error)
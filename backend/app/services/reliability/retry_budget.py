@@ -0,0 +1,96 @@
+"""
+Process-wide retry budget
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict
+
+from app.config import settings
+
+
+class RetryBudget:
+    """
+    Caps retries at a fraction of recent traffic
+
+    Every first attempt is recorded as a request; a retry is allowed only
+    while retries in the sliding window stay below
+    ``ratio * requests + min_retries_per_second * window_seconds``. The
+    floor keeps low-traffic workers able to retry, the ratio keeps a
+    partial outage from multiplying load on a struggling vendor.
+    """
+
+    def __init__(
+        self,
+        ratio: float = 0.1,
+        min_retries_per_second: float = 1.0,
+        window_seconds: float = 10.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.ratio = ratio
+        self.min_retries_per_second = min_retries_per_second
+        self.window_seconds = window_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self._requests: deque = deque()
+        self._retries: deque = deque()
+
+        # Counters
+        self.total_requests = 0
+        self.total_retries = 0
+        self.rejected_retries = 0
+
+    def record_request(self):
+        """Record a first attempt"""
+        with self._lock:
+            now = self._clock()
+            self._prune(now)
+            self._requests.append(now)
+            self.total_requests += 1
+
+    def try_acquire_retry(self) -> bool:
+        """
+        Reserve a retry if the budget allows it
+        """
+        with self._lock:
+            now = self._clock()
+            self._prune(now)
+            if len(self._retries) >= self._allowed():
+                self.rejected_retries += 1
+                return False
+            self._retries.append(now)
+            self.total_retries += 1
+            return True
+
+    def _allowed(self) -> float:
+        return self.ratio * len(self._requests) + self.min_retries_per_second * self.window_seconds
+
+    def _prune(self, now: float):
+        cutoff = now - self.window_seconds
+        for window in (self._requests, self._retries):
+            while window and window[0] <= cutoff:
+                window.popleft()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current window and counters for the ops endpoint"""
+        with self._lock:
+            self._prune(self._clock())
+            return {
+                "ratio": self.ratio,
+                "window_seconds": self.window_seconds,
+                "window_requests": len(self._requests),
+                "window_retries": len(self._retries),
+                "retries_allowed": int(self._allowed()),
+                "total_requests": self.total_requests,
+                "total_retries": self.total_retries,
+                "rejected_retries": self.rejected_retries,
+            }
+
+
+# Shared across all providers and requests in this process
+retry_budget = RetryBudget(
+    ratio=settings.VENDOR_RETRY_BUDGET_RATIO,
+    min_retries_per_second=settings.VENDOR_RETRY_BUDGET_MIN_PER_SECOND,
+    window_seconds=settings.VENDOR_RETRY_BUDGET_WINDOW_SECONDS
+)
@@ -0,0 +1,68 @@
+"""
+Request-scoped context for message handling
+
+The entities a message request works on: the tenant resolved by
+get_current_tenant, the session and its agent (loaded together, once,
+by the endpoint) and the correlation id. MessageHandler, ToolExecutor,
+ResilientVendorCaller and VoiceMessageHandler take this instead of ids,
+so nothing the request already holds is fetched again.
+"""
+from dataclasses import dataclass
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.agent import Agent
+from app.models.session import Session as SessionModel
+from app.models.tenant import Tenant
+
+
+@dataclass(frozen=True)
+class RequestContext:
+    tenant: Tenant
+    agent: Agent
+    session: SessionModel
+    correlation_id: Optional[str] = None
+
+    @property
+    def tenant_id(self) -> UUID:
+        return self.tenant.id
+
+    @property
+    def agent_id(self) -> UUID:
+        return self.agent.id
+
+    @property
+    def session_id(self) -> UUID:
+        return self.session.id
+
+    @property
+    def company_key(self) -> Optional[str]:
+        return self.tenant.company_key
+
+
+async def load_request_context(
+    db: AsyncSession,
+    tenant: Tenant,
+    session_id: UUID,
+    correlation_id: Optional[str]
+) -> Optional[RequestContext]:
+    """
+    Load a tenant's session together with its agent (one query)
+
+    Returns:
+        RequestContext, or None if the session does not exist or belongs
+        to another tenant
+    """
+    result = await db.execute(
+        select(SessionModel, Agent)
+        .join(Agent, Agent.id == SessionModel.agent_id)
+        .where(SessionModel.id == session_id, SessionModel.tenant_id == tenant.id)
+    )
+    row = result.first()
+    if row is None:
+        return None
+    session, agent = row
+    return RequestContext(tenant=tenant, agent=agent, session=session, correlation_id=correlation_id)
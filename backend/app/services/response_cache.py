@@ -0,0 +1,111 @@
+"""
+Exact-match vendor response cache (opt-in per agent)
+
+Agent.config: {"response_cache": {"enabled": true, "ttl_seconds": 3600}}
+
+Answers are keyed on a hash of the provider/model, system prompt,
+conversation history and normalized user message, so a cached answer is
+only reused for the same prompt in the same context. Lookups go to an
+in-process LRU first and then to Redis, which shares answers between
+workers; a Redis failure is treated as a miss.
+"""
+import hashlib
+import json
+import re
+from typing import NamedTuple, Optional
+from uuid import UUID
+
+from redis.exceptions import RedisError
+
+from app.config import settings
+from app.models.agent import Agent
+from app.services.vendors.base import VendorRequest
+from app.services.vendors.factory import VENDORS
+from app.utils.cache import TTLCache
+from app.utils.logger import get_logger
+from app.utils.redis_client import get_redis
+
+logger = get_logger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = " \t\n.,!?;:"
+
+
+class CachedResponse(NamedTuple):
+    text: str
+    provider: str
+    tokens_in: int  # usage of the original vendor call
+    tokens_out: int
+
+
+def response_cache_ttl(agent: Agent) -> Optional[int]:
+    """
+    TTL (seconds) for the agent's cached responses, or None when not opted in
+    """
+    config = (agent.config or {}).get("response_cache") or {}
+    if not config.get("enabled"):
+        return None
+    return int(config.get("ttl_seconds", settings.RESPONSE_CACHE_TTL_SECONDS))
+
+
+def normalize_message(text: str) -> str:
+    """Case-fold, collapse whitespace and drop surrounding punctuation"""
+    return _WHITESPACE.sub(" ", text.casefold()).strip(_EDGE_PUNCTUATION)
+
+
+def response_cache_key(tenant_id: UUID, provider: str, request: VendorRequest) -> str:
+    """Cache key for a vendor request sent to provider"""
+    vendor = VENDORS.get(provider)
+    digest = hashlib.sha256("\x1f".join((
+        provider,
+        vendor.model_name if vendor else "",
+        request.system_prompt,
+        json.dumps(request.conversation_history, separators=(",", ":")),
+        normalize_message(request.user_message),
+    )).encode()).hexdigest()
+    return f"response_cache:{tenant_id}:{digest}"
+
+
+class ResponseCache:
+    """In-process LRU in front of Redis"""
+
+    def __init__(self, max_size: int, ttl_seconds: float, redis=None):
+        self.local = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self._redis = redis
+
+    @property
+    def redis(self):
+        return self._redis if self._redis is not None else get_redis()
+
+    async def get(self, key: str, ttl_seconds: int) -> Optional[CachedResponse]:
+        """Cached response for key, or None"""
+        cached = self.local.get(key)
+        if cached is not None:
+            return cached
+
+        try:
+            value = await self.redis.get(key)
+        except RedisError as e:
+            logger.warning(f"Response cache unavailable: {e}")
+            return None
+        if value is None:
+            return None
+
+        cached = CachedResponse(*json.loads(value))
+        self.local.set(key, cached, ttl_seconds=min(ttl_seconds, self.local.ttl_seconds))
+        return cached
+
+    async def set(self, key: str, response: CachedResponse, ttl_seconds: int):
+        """Store response in both tiers"""
+        self.local.set(key, response, ttl_seconds=min(ttl_seconds, self.local.ttl_seconds))
+        try:
+            await self.redis.set(key, json.dumps(response), ex=ttl_seconds)
+        except RedisError as e:
+            logger.warning(f"Failed to store cached response: {e}")
+
+
+# Shared per worker process; the Redis tier is shared by all workers
+response_cache = ResponseCache(
+    max_size=settings.RESPONSE_CACHE_MAX_SIZE,
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS
+)
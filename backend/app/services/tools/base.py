@@ -2,9 +2,11 @@
 Base tool interface
 """
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 from pydantic import BaseModel
 
+from app.services.tools.result_cache import invalidate_tool_results
+
 
 class ToolParameter(BaseModel):
     name: str
@@ -14,7 +16,21 @@ class ToolParameter(BaseModel):
 
 
 class Tool(ABC):
-    """Abstract base class for all tools"""
+    """
+    Abstract base class for all tools
+
+    Tools that can be triggered from chat declare `triggers` (keywords,
+    matched case-insensitively as substrings) and implement
+    extract_params(); see app.services.tools.intents.
+    """
+
+    triggers: Tuple[str, ...] = ()
+    # Per-tool limits for ToolExecutor.execute_many (None: TOOL_* settings)
+    timeout_seconds: Optional[float] = None
+    max_concurrency: Optional[int] = None
+    # Seconds a successful result is reused for identical params within a
+    # company (None: never cached); see app.services.tools.result_cache
+    cache_ttl_seconds: Optional[float] = None
 
     @property
     @abstractmethod
@@ -34,3 +50,30 @@ class Tool(ABC):
     @abstractmethod
     async def execute(self, params: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
         pass
+
+    def extract_params(self, message: str) -> Optional[Dict[str, Any]]:
+        """
+        Parameters for this tool found in a message, or None if it cannot run
+        """
+        return None
+
+    def extract_calls(self, message: str) -> List[Dict[str, Any]]:
+        """
+        Parameters of every call a message asks for (default: at most one)
+        """
+        params = self.extract_params(message)
+        return [params] if params is not None else []
+
+    def invalidate_cache(self, company_key: Optional[str] = None, params: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Drop cached results of this tool; call when the data behind it changes
+
+        Only affects this worker process (others expire by TTL).
+        """
+        return invalidate_tool_results(self.name, company_key, params)
+
+    def format_result(self, result: Dict[str, Any]) -> str:
+        """Reply text for a tool result (replaces the vendor's answer)"""
+        if result.get("success"):
+            return str(result)
+        return f"❌ {result.get('error', 'Tool failed')}"
@@ -1,32 +1,87 @@
 """
 Tool executor with audit logging
 """
+import asyncio
 import time
-from typing import Dict, Any, Optional
+import uuid
+from datetime import datetime
+from typing import Dict, Any, Hashable, List, Optional, Tuple
 from uuid import UUID
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.models.tool import ToolExecution
+from app.services.request_context import RequestContext
+from app.services.tools.base import Tool
+from app.services.tools.intents import ToolRegistry
 from app.services.tools.invoice_lookup import InvoiceLookupTool
+from app.services.tools.result_cache import tool_cache_key, tool_result_cache
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Every tool an agent can enable; each declares its own chat triggers
+tool_registry = ToolRegistry([
+    InvoiceLookupTool(),
+])
+
+# Per-tool concurrency limits (process-wide)
+_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+def get_tool_semaphore(tool: Tool) -> asyncio.Semaphore:
+    """Shared semaphore capping concurrent executions of a tool"""
+    semaphore = _semaphores.get(tool.name)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(tool.max_concurrency or settings.TOOL_MAX_CONCURRENCY)
+        _semaphores[tool.name] = semaphore
+    return semaphore
 
 
 class ToolExecutor:
-    """Executes tools with audit logging"""
+    """
+    Executes tools with audit logging
 
-    TOOLS = {
-        "invoice_lookup": InvoiceLookupTool()
-    }
+    execute_many() runs the independent calls of one message concurrently,
+    each under its tool's timeout and concurrency cap, and adds all audit
+    rows in one batch once they have finished.
 
-    def __init__(self, db: Session, tenant_id: UUID, agent_id: UUID, session_id: UUID):
+    Tools with a cache_ttl_seconds reuse recent successful results for the
+    same company and params; those calls are still audited, with cached=True.
+    """
+
+    def __init__(self, db: AsyncSession, context: RequestContext, autocommit: bool = True):
         self.db = db
-        self.tenant_id = tenant_id
-        self.agent_id = agent_id
-        self.session_id = session_id
+        self.context = context
+        self.tenant_id = context.tenant_id
+        self.agent_id = context.agent_id
+        self.session_id = context.session_id
+        # When False, audit rows are left for the caller's transaction
+        self.autocommit = autocommit
+
+    def _tool_context(self) -> Dict[str, Any]:
+        """Context passed to Tool.execute (company_key comes from the request's tenant)"""
+        return {
+            "tenant_id": str(self.tenant_id),
+            "agent_id": str(self.agent_id),
+            "session_id": str(self.session_id),
+            "company_key": self.context.company_key,
+            "correlation_id": self.context.correlation_id
+        }
+
+    @staticmethod
+    def _cache_key(tool: Tool, params: Dict[str, Any], company_key: Optional[str]) -> Optional[Hashable]:
+        """Result cache key for a call, or None if the tool's results are not cached"""
+        if not tool.cache_ttl_seconds or not company_key or not tool_result_cache.ttl_seconds:
+            return None
+        return tool_cache_key(company_key, tool.name, params)
 
-        # Load tenant to get company_key
-        from app.models.tenant import Tenant
-        self.tenant = db.query(Tenant).filter(Tenant.id == tenant_id).first()
-        self.company_key = self.tenant.company_key if self.tenant else None
+    @staticmethod
+    def _cache_result(tool: Tool, key: Optional[Hashable], result: Dict[str, Any]):
+        """Cache a successful result (failures are always retried)"""
+        if key is not None and result.get("success"):
+            ttl = min(tool.cache_ttl_seconds, tool_result_cache.ttl_seconds)
+            tool_result_cache.set(key, result, ttl_seconds=ttl)
 
     async def execute_tool(
         self,
@@ -35,7 +90,7 @@ class ToolExecutor:
         message_id: Optional[UUID] = None
     ) -> Optional[Dict[str, Any]]:
         """Execute tool with audit"""
-        tool = self.TOOLS.get(tool_name)
+        tool = tool_registry.get(tool_name)
         if not tool:
             return None
 
@@ -51,21 +106,24 @@ class ToolExecutor:
             status="pending"
         )
         self.db.add(execution)
-        self.db.flush()
+        if self.autocommit:
+            await self.db.flush()
 
         try:
-            context = {
-                "tenant_id": str(self.tenant_id),
-                "agent_id": str(self.agent_id),
-                "session_id": str(self.session_id),
-                "company_key": self.company_key
-            }
-            result = await tool.execute(params, context)
+            context = self._tool_context()
+            cache_key = self._cache_key(tool, params, context["company_key"])
+            result = tool_result_cache.get(cache_key) if cache_key is not None else None
+            if result is not None:
+                execution.cached = True
+            else:
+                result = await tool.execute(params, context)
+                self._cache_result(tool, cache_key, result)
 
             execution.status = "success"
             execution.result = result
             execution.latency_ms = int((time.time() - start_time) * 1000)
-            self.db.commit()
+            if self.autocommit:
+                await self.db.commit()
 
             return result
 
@@ -73,5 +131,99 @@ class ToolExecutor:
             execution.status = "error"
             execution.error_message = str(e)
             execution.latency_ms = int((time.time() - start_time) * 1000)
-            self.db.commit()
+            if self.autocommit:
+                await self.db.commit()
             raise
+
+    async def _run_call(
+        self,
+        tool: Tool,
+        params: Dict[str, Any],
+        context: Dict[str, Any],
+        execution: ToolExecution
+    ) -> Dict[str, Any]:
+        """One call of execute_many(); failures become error results"""
+        cache_key = self._cache_key(tool, params, context["company_key"])
+        if cache_key is not None:
+            result = tool_result_cache.get(cache_key)
+            if result is not None:
+                execution.status = "success"
+                execution.result = result
+                execution.cached = True
+                execution.latency_ms = 0
+                return result
+
+        timeout = tool.timeout_seconds or settings.TOOL_TIMEOUT_SECONDS
+        start_time = time.time()
+        try:
+            # The timeout covers waiting for a slot too, so a saturated
+            # tool cannot stall the turn
+            async with asyncio.timeout(timeout):
+                async with get_tool_semaphore(tool):
+                    result = await tool.execute(params, context)
+            execution.status = "success"
+            execution.result = result
+            self._cache_result(tool, cache_key, result)
+            return result
+        except TimeoutError:
+            execution.status = "error"
+            execution.error_message = f"Timed out after {timeout}s"
+        except Exception as e:
+            execution.status = "error"
+            execution.error_message = str(e)
+        finally:
+            execution.latency_ms = int((time.time() - start_time) * 1000)
+
+        logger.warning(
+            f"Tool {tool.name} failed: {execution.error_message}",
+            extra={"tool_name": tool.name, "session_id": str(self.session_id)}
+        )
+        return {"success": False, "error": f"Could not complete {tool.name}, please try again"}
+
+    async def execute_many(
+        self,
+        calls: List[Tuple[str, Dict[str, Any]]],
+        message_id: Optional[UUID] = None
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Execute independent tool calls concurrently with audit
+
+        Args:
+            calls: (tool_name, params) pairs
+            message_id: Message the calls belong to (optional)
+
+        Returns:
+            One result per call, in order: the tool's result, an error result
+            ({"success": False, ...}) if it failed or timed out, or None for
+            an unknown tool
+        """
+        context = self._tool_context()
+
+        executions: List[ToolExecution] = []
+        tasks: List[Optional[asyncio.Task]] = []
+        async with asyncio.TaskGroup() as group:
+            for tool_name, params in calls:
+                tool = tool_registry.get(tool_name)
+                if not tool:
+                    tasks.append(None)
+                    continue
+                execution = ToolExecution(
+                    id=uuid.uuid4(),
+                    tenant_id=self.tenant_id,
+                    agent_id=self.agent_id,
+                    session_id=self.session_id,
+                    message_id=message_id,
+                    tool_name=tool_name,
+                    parameters=params,
+                    status="pending",
+                    cached=False,
+                    created_at=datetime.utcnow()
+                )
+                executions.append(execution)
+                tasks.append(group.create_task(self._run_call(tool, params, context, execution)))
+
+        self.db.add_all(executions)
+        if self.autocommit:
+            await self.db.commit()
+
+        return [task.result() if task else None for task in tasks]
@@ -0,0 +1,132 @@
+"""
+Tool intent detection
+
+Each tool declares trigger keywords and how to pull its parameters out of
+a message. All triggers of all registered tools are compiled into one
+Aho-Corasick automaton, so finding candidate tools is a single pass over
+the message no matter how many tools exist; only the candidates' extractors
+(precompiled regexes) then run.
+"""
+from collections import deque
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set
+
+from app.config import settings
+from app.services.tools.base import Tool
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton mapping keywords to tags (case-insensitive substrings)
+    """
+
+    def __init__(self, keywords: Dict[str, Iterable[str]]):
+        # Trie transitions, failure links and tags emitted per state
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[FrozenSet[str]] = [frozenset()]
+
+        outputs: List[Set[str]] = [set()]
+        for keyword, tags in keywords.items():
+            state = 0
+            for ch in keyword.lower():
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    outputs.append(set())
+                state = nxt
+            outputs[state].update(tags)
+
+        # Breadth-first: a state's failure link is the longest proper suffix
+        # that is also a trie path; it inherits that state's tags. Missing
+        # transitions are then filled in from the failure state, turning the
+        # trie into a DFA so matching never follows failure links.
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in list(self._goto[state].items()):
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(ch, 0)
+                outputs[child] |= outputs[self._fail[child]]
+            if state:
+                for ch, target in self._goto[self._fail[state]].items():
+                    self._goto[state].setdefault(ch, target)
+
+        self._out = [frozenset(tags) for tags in outputs]
+
+    def match(self, text: str) -> Set[str]:
+        """Tags of every keyword occurring in text"""
+        goto, out = self._goto, self._out
+        found: Set[str] = set()
+        state = 0
+        for ch in text.lower():
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found |= out[state]
+        return found
+
+
+class ToolIntent(NamedTuple):
+    tool: Tool
+    params: Dict[str, Any]
+
+
+class ToolRegistry:
+    """
+    Registered tools and the shared trigger matcher
+
+    The matcher is rebuilt lazily after a registration.
+    """
+
+    def __init__(self, tools: Iterable[Tool] = ()):
+        self._tools: Dict[str, Tool] = {}
+        self._matcher: Optional[KeywordMatcher] = None
+        for tool in tools:
+            self.register(tool)
+
+    def register(self, tool: Tool):
+        """Add (or replace) a tool"""
+        self._tools[tool.name] = tool
+        self._matcher = None
+
+    def get(self, name: str) -> Optional[Tool]:
+        return self._tools.get(name)
+
+    @property
+    def tools(self) -> Dict[str, Tool]:
+        return dict(self._tools)
+
+    def _candidates(self, message: str, enabled_tools: Iterable[str]) -> List[str]:
+        """Enabled tools whose triggers occur in message, in registration order"""
+        if self._matcher is None:
+            keywords: Dict[str, Set[str]] = {}
+            for tool in self._tools.values():
+                for trigger in tool.triggers:
+                    keywords.setdefault(trigger.lower(), set()).add(tool.name)
+            self._matcher = KeywordMatcher(keywords)
+
+        matched = self._matcher.match(message)
+        if not matched:
+            return []
+        enabled = set(enabled_tools or ())
+        return [name for name in self._tools if name in matched and name in enabled]
+
+    def may_trigger(self, message: str, enabled_tools: Iterable[str]) -> bool:
+        """True if message mentions a trigger of any enabled tool"""
+        return bool(enabled_tools) and bool(self._candidates(message, enabled_tools))
+
+    def detect(self, message: str, enabled_tools: Iterable[str]) -> List[ToolIntent]:
+        """Tools to run for message, with the parameters extracted from it"""
+        if not enabled_tools:
+            return []
+        intents = []
+        for name in self._candidates(message, enabled_tools):
+            tool = self._tools[name]
+            calls = tool.extract_calls(message)[:settings.TOOL_MAX_CALLS_PER_MESSAGE]
+            intents.extend(ToolIntent(tool, params) for params in calls)
+        return intents
@@ -1,140 +1,66 @@
 """
 Invoice Lookup Tool with Company-Specific Data
 """
-from typing import Dict, Any, List
+import re
+from typing import Dict, Any, List, Optional
+from app.services.invoices.demo import DEMO_INVOICES
+from app.services.invoices.factory import get_invoice_backend
 from app.services.tools.base import Tool, ToolParameter
 
+# Company-specific IDs: INV-TC-001, INV-HF-007, inv-tc-1
+_COMPANY_INVOICE_ID = re.compile(r'INV-[A-Z]+-\d+', re.IGNORECASE)
+# Legacy IDs: INV-001, INV001
+_LEGACY_INVOICE_ID = re.compile(r'INV-?(\d+)', re.IGNORECASE)
+# A bare number after "invoice", "inv", "order", "id": "invoice #12"
+_REFERENCED_NUMBER = re.compile(r'(?:invoice|inv|order|id)\s*[:\-#]?\s*(\d+)', re.IGNORECASE)
+
+_STATUS_EMOJI = {
+    'paid': '✅',
+    'pending': '⏳',
+    'overdue': '⚠️'
+}
+
+
+def extract_invoice_ids(message: str) -> List[str]:
+    """Every distinct invoice ID mentioned in a message, in order"""
+    matches = [
+        (m.start(), m.group(0).upper()) for m in _COMPANY_INVOICE_ID.finditer(message)
+    ] + [
+        (m.start(), f"INV-{m.group(1)}") for m in _LEGACY_INVOICE_ID.finditer(message)
+    ]
+    if not matches:
+        invoice_id = extract_invoice_id(message)
+        return [invoice_id] if invoice_id else []
+    return list(dict.fromkeys(invoice_id for _, invoice_id in sorted(matches)))
+
+
+def extract_invoice_id(message: str) -> Optional[str]:
+    """Normalized invoice ID mentioned in a message, or None"""
+    match = _COMPANY_INVOICE_ID.search(message)
+    if match:
+        return match.group(0).upper()
+
+    match = _LEGACY_INVOICE_ID.search(message)
+    if match:
+        # Add dash if missing (e.g., "INV001" -> "INV-001")
+        return f"INV-{match.group(1)}"
+
+    match = _REFERENCED_NUMBER.search(message)
+    if match:
+        return f"INV-{match.group(1).zfill(3)}"  # Pad to 3 digits
+
+    return None
+
 
 class InvoiceLookupTool(Tool):
-    """Mock invoice lookup tool with company-specific data isolation"""
-
-    # Company-specific invoice data - completely separated
-    COMPANY_INVOICES = {
-        # TechCorp invoices - Software/SaaS company
-        "techcorp": {
-            "INV-TC-001": {
-                "id": "INV-TC-001",
-                "amount": 15000.00,
-                "status": "paid",
-                "due_date": "2025-01-15",
-                "customer": "Acme Solutions Inc",
-                "description": "Annual Enterprise License - Q1 2025",
-                "payment_date": "2025-01-10"
-            },
-            "INV-TC-002": {
-                "id": "INV-TC-002",
-                "amount": 8500.00,
-                "status": "pending",
-                "due_date": "2025-02-01",
-                "customer": "StartupHub Ltd",
-                "description": "Professional Plan - 50 seats",
-                "payment_date": None
-            },
-            "INV-TC-003": {
-                "id": "INV-TC-003",
-                "amount": 3200.00,
-                "status": "overdue",
-                "due_date": "2024-12-15",
-                "customer": "Global Tech Partners",
-                "description": "Consulting Services - November 2024",
-                "payment_date": None
-            },
-            "INV-TC-004": {
-                "id": "INV-TC-004",
-                "amount": 25000.00,
-                "status": "paid",
-                "due_date": "2025-01-20",
-                "customer": "Enterprise Corp",
-                "description": "Custom Development - Phase 1",
-                "payment_date": "2025-01-18"
-            },
-            "INV-TC-005": {
-                "id": "INV-TC-005",
-                "amount": 12000.00,
-                "status": "pending",
-                "due_date": "2025-02-10",
-                "customer": "MidSize Business Inc",
-                "description": "Premium Support Package - Q1 2025",
-                "payment_date": None
-            },
-            "INV-TC-006": {
-                "id": "INV-TC-006",
-                "amount": 5500.00,
-                "status": "overdue",
-                "due_date": "2024-11-30",
-                "customer": "SmallBiz LLC",
-                "description": "Integration Services",
-                "payment_date": None
-            }
-        },
-
-        # HealthFirst invoices - Healthcare company
-        "healthfirst": {
-            "INV-HF-001": {
-                "id": "INV-HF-001",
-                "amount": 45000.00,
-                "status": "paid",
-                "due_date": "2025-01-10",
-                "customer": "City General Hospital",
-                "description": "Medical Equipment Supply - December 2024",
-                "payment_date": "2025-01-08"
-            },
-            "INV-HF-002": {
-                "id": "INV-HF-002",
-                "amount": 28500.00,
-                "status": "pending",
-                "due_date": "2025-02-05",
-                "customer": "Wellness Clinic Network",
-                "description": "Pharmaceutical Supplies - January 2025",
-                "payment_date": None
-            },
-            "INV-HF-003": {
-                "id": "INV-HF-003",
-                "amount": 12750.00,
-                "status": "overdue",
-                "due_date": "2024-12-20",
-                "customer": "Community Health Center",
-                "description": "Diagnostic Equipment Maintenance",
-                "payment_date": None
-            },
-            "INV-HF-004": {
-                "id": "INV-HF-004",
-                "amount": 67000.00,
-                "status": "paid",
-                "due_date": "2025-01-25",
-                "customer": "Regional Medical Center",
-                "description": "MRI Machine Installation",
-                "payment_date": "2025-01-22"
-            },
-            "INV-HF-005": {
-                "id": "INV-HF-005",
-                "amount": 19200.00,
-                "status": "pending",
-                "due_date": "2025-02-15",
-                "customer": "Private Practice Group",
-                "description": "Medical Software Licensing - Annual",
-                "payment_date": None
-            },
-            "INV-HF-006": {
-                "id": "INV-HF-006",
-                "amount": 8900.00,
-                "status": "overdue",
-                "due_date": "2024-11-15",
-                "customer": "Dental Associates",
-                "description": "Specialized Equipment Rental",
-                "payment_date": None
-            },
-            "INV-HF-007": {
-                "id": "INV-HF-007",
-                "amount": 34000.00,
-                "status": "paid",
-                "due_date": "2025-01-12",
-                "customer": "Emergency Care Facility",
-                "description": "Emergency Response Equipment",
-                "payment_date": "2025-01-11"
-            }
-        }
-    }
+    """Invoice lookup tool with company-specific data isolation (see app.services.invoices)"""
+
+    triggers = ("invoice", "inv-", "inv ")
+    # Invoice status changes (payments) show up within a minute
+    cache_ttl_seconds = 60
+
+    # Demo data (the in-memory backend's contents)
+    COMPANY_INVOICES = DEMO_INVOICES
 
     @property
     def name(self) -> str:
@@ -162,23 +88,46 @@ class InvoiceLookupTool(Tool):
                 "error": "Unable to determine company context. Please ensure tenant has a company_key configured."
             }
 
-        # Get company-specific invoices
-        company_invoices = self.COMPANY_INVOICES.get(company_key, {})
-
-        if not company_invoices:
-            return {
-                "success": False,
-                "error": f"No invoice data available for company: {company_key}"
-            }
-
-        invoice = company_invoices.get(invoice_id)
+        backend = get_invoice_backend()
+        invoice = await backend.get(company_key, invoice_id)
 
         if not invoice:
             # List available invoices for this company
-            available = list(company_invoices.keys())
+            available = await backend.invoice_ids(company_key, limit=5)
+            if not available:
+                return {
+                    "success": False,
+                    "error": f"No invoice data available for company: {company_key}"
+                }
             return {
                 "success": False,
-                "error": f"Invoice {invoice_id} not found. Available invoices: {', '.join(available[:5])}"
+                "error": f"Invoice {invoice_id} not found. Available invoices: {', '.join(available)}"
             }
 
         return {"success": True, "invoice": invoice}
+
+    def extract_params(self, message: str) -> Optional[Dict[str, Any]]:
+        invoice_id = extract_invoice_id(message)
+        return {"invoice_id": invoice_id} if invoice_id else None
+
+    def extract_calls(self, message: str) -> List[Dict[str, Any]]:
+        return [{"invoice_id": invoice_id} for invoice_id in extract_invoice_ids(message)]
+
+    def format_result(self, result: Dict[str, Any]) -> str:
+        if not result.get("success"):
+            return f"❌ {result.get('error', 'Invoice not found')}"
+
+        invoice = result["invoice"]
+        status_emoji = _STATUS_EMOJI.get(invoice['status'], '📄')
+        text = (
+            f"I found the invoice you requested:\n\n"
+            f"📄 Invoice ID: {invoice['id']}\n"
+            f"👤 Customer: {invoice.get('customer') or 'N/A'}\n"
+            f"📝 Description: {invoice.get('description') or 'N/A'}\n"
+            f"💰 Amount: ${invoice['amount']:,.2f}\n"
+            f"{status_emoji} Status: {invoice['status'].upper()}\n"
+            f"📅 Due Date: {invoice['due_date']}"
+        )
+        if invoice.get('payment_date'):
+            text += f"\n💳 Paid On: {invoice['payment_date']}"
+        return text
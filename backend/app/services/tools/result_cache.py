@@ -0,0 +1,48 @@
+"""
+Tool result cache
+
+Successful results of tools that declare Tool.cache_ttl_seconds are
+reused for identical calls within a company (the tenant's data
+partition), keyed on (company_key, tool_name, canonical params). The
+cache is per worker process: Tool.invalidate_cache() drops entries here
+when a tool's data changes, and the TTL bounds staleness elsewhere.
+"""
+import json
+from typing import Any, Dict, Hashable, Optional
+
+from app.config import settings
+from app.utils.cache import TTLCache
+
+# Shared per worker process; TOOL_RESULT_CACHE_MAX_TTL_SECONDS caps per-tool TTLs
+tool_result_cache = TTLCache(
+    max_size=settings.TOOL_RESULT_CACHE_MAX_SIZE,
+    ttl_seconds=settings.TOOL_RESULT_CACHE_MAX_TTL_SECONDS
+)
+
+
+def tool_cache_key(company_key: str, tool_name: str, params: Dict[str, Any]) -> Hashable:
+    """Cache key for a call (params compared independent of key order)"""
+    return (company_key, tool_name, json.dumps(params, sort_keys=True, separators=(",", ":"), default=str))
+
+
+def invalidate_tool_results(
+    tool_name: str,
+    company_key: Optional[str] = None,
+    params: Optional[Dict[str, Any]] = None
+) -> int:
+    """
+    Drop cached results of a tool
+
+    Args:
+        tool_name: Tool whose results to drop
+        company_key: Only this company's results (default: every company)
+        params: Only the result of this call (requires company_key)
+
+    Returns:
+        Number of entries removed
+    """
+    if company_key is not None and params is not None:
+        return int(tool_result_cache.delete(tool_cache_key(company_key, tool_name, params)))
+    return tool_result_cache.delete_where(
+        lambda key, _result: key[1] == tool_name and company_key in (None, key[0])
+    )
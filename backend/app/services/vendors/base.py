@@ -2,7 +2,7 @@
 Base vendor adapter interface
 """
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, Optional
 from pydantic import BaseModel
 
 
@@ -10,6 +10,7 @@ class VendorRequest(BaseModel):
     """Normalized request to vendor"""
     system_prompt: str
     user_message: str
+    # Earlier turns, oldest first: [{"role": "user" | "assistant", "content": ...}]
     conversation_history: list = []
 
 
@@ -19,6 +20,16 @@ class NormalizedResponse(BaseModel):
     tokens_in: int
     tokens_out: int
     latency_ms: int
+    provider: Optional[str] = None  # set by ResilientVendorCaller to the vendor that answered
+
+
+class StreamChunk(BaseModel):
+    """Incremental piece of a streamed response; the last chunk carries usage"""
+    text: str = ""
+    done: bool = False
+    tokens_in: Optional[int] = None
+    tokens_out: Optional[int] = None
+    provider: Optional[str] = None  # set on the done chunk by ResilientVendorCaller
 
 
 class VendorAdapter(ABC):
@@ -27,6 +38,9 @@ class VendorAdapter(ABC):
     Implements Strategy pattern for different AI providers
     """
 
+    # Model identifier sent to the vendor (part of response cache keys)
+    model_name: str = ""
+
     @property
     @abstractmethod
     def name(self) -> str:
@@ -71,3 +85,29 @@ class VendorAdapter(ABC):
         """
         raw_response = await self.send_message(request)
         return self.normalize_response(raw_response)
+
+    async def stream(self, request: VendorRequest) -> AsyncIterator[StreamChunk]:
+        """
+        Stream the response as text deltas, ending with a done chunk carrying usage
+
+        Default implementation for vendors without native streaming: one
+        call, relayed as a single delta.
+
+        Args:
+            request: Normalized vendor request
+
+        Yields:
+            StreamChunk instances
+        """
+        response = await self.call(request)
+        yield StreamChunk(text=response.text)
+        yield StreamChunk(done=True, tokens_in=response.tokens_in, tokens_out=response.tokens_out)
+
+    async def aclose(self) -> None:
+        """
+        Release long-lived client resources (connection pools)
+
+        Adapters are shared process-wide by the factory registry and closed
+        on application shutdown. Default is a no-op.
+        """
+        pass
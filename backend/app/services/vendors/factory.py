@@ -1,31 +1,53 @@
 """
 Vendor factory - creates vendor adapter instances
 """
+from typing import Dict, Type
 from app.services.vendors.base import VendorAdapter
 from app.services.vendors.vendor_a import VendorA
 from app.services.vendors.vendor_b import VendorB
 
 
+VENDORS: Dict[str, Type[VendorAdapter]] = {
+    "vendorA": VendorA,
+    "vendorB": VendorB,
+}
+
+# Process-wide adapter registry: one long-lived client (and connection
+# pool) per provider instead of a fresh client and TLS handshake per call
+_adapters: Dict[str, VendorAdapter] = {}
+
+
 def get_vendor_adapter(provider: str) -> VendorAdapter:
     """
-    Factory function to get vendor adapter instance
+    Factory function to get the shared vendor adapter instance
 
     Args:
         provider: Vendor identifier ('vendorA' or 'vendorB')
 
     Returns:
-        VendorAdapter instance
+        VendorAdapter instance (created on first use, then reused)
 
     Raises:
         ValueError: If provider is not supported
     """
-    vendors = {
-        "vendorA": VendorA,
-        "vendorB": VendorB,
-    }
+    adapter = _adapters.get(provider)
+    if adapter is not None:
+        return adapter
 
-    vendor_class = vendors.get(provider)
+    vendor_class = VENDORS.get(provider)
     if not vendor_class:
         raise ValueError(f"Unsupported vendor: {provider}")
 
-    return vendor_class()
+    adapter = vendor_class()
+    _adapters[provider] = adapter
+    return adapter
+
+
+async def close_vendor_adapters():
+    """
+    Close all registered adapters (application shutdown)
+    """
+    adapters = list(_adapters.values())
+    _adapters.clear()
+    for adapter in adapters:
+        await adapter.aclose()
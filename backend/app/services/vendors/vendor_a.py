@@ -2,9 +2,10 @@
 VendorA implementation - OpenAI GPT-4o-mini
 """
 import time
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, List
+import httpx
 from openai import AsyncOpenAI
-from app.services.vendors.base import VendorAdapter, VendorRequest, NormalizedResponse
+from app.services.vendors.base import VendorAdapter, VendorRequest, NormalizedResponse, StreamChunk
 from app.config import settings
 from app.utils.logger import get_logger
 
@@ -14,18 +15,42 @@ logger = get_logger(__name__)
 class VendorA(VendorAdapter):
     """
     VendorA - OpenAI GPT-4o-mini implementation
+
+    Owns one AsyncOpenAI client backed by a keep-alive (HTTP/2 when enabled)
+    connection pool; instances are meant to be reused via the factory.
     """
 
+    model_name = "gpt-4o-mini"
+
     def __init__(self):
         api_key = settings.OPENAI_API_KEY
         if not api_key:
             raise ValueError("OPENAI_API_KEY not configured in settings")
-        self.client = AsyncOpenAI(api_key=api_key)
+        self.http_client = httpx.AsyncClient(
+            http2=settings.VENDOR_HTTP2,
+            limits=httpx.Limits(
+                max_connections=settings.VENDOR_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.VENDOR_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=settings.VENDOR_HTTP_KEEPALIVE_EXPIRY
+            ),
+            timeout=httpx.Timeout(settings.VENDOR_TIMEOUT_SECONDS)
+        )
+        # Retries are owned by ResilientVendorCaller; SDK retries would compound them
+        self.client = AsyncOpenAI(api_key=api_key, http_client=self.http_client, max_retries=0)
 
     @property
     def name(self) -> str:
         return "vendorA"
 
+    @staticmethod
+    def _messages(request: VendorRequest) -> List[Dict[str, str]]:
+        """System prompt, conversation history, then the new user message"""
+        return [
+            {"role": "system", "content": request.system_prompt},
+            *request.conversation_history,
+            {"role": "user", "content": request.user_message}
+        ]
+
     async def send_message(self, request: VendorRequest) -> Dict[str, Any]:
         """
         Call OpenAI GPT-4o-mini API
@@ -34,11 +59,8 @@ class VendorA(VendorAdapter):
 
         try:
             response = await self.client.chat.completions.create(
-                model="gpt-4o-mini",  # ChatGPT-4o-mini
-                messages=[
-                    {"role": "system", "content": request.system_prompt},
-                    {"role": "user", "content": request.user_message}
-                ],
+                model=self.model_name,
+                messages=self._messages(request),
                 temperature=0.7,
                 max_tokens=500
             )
@@ -59,6 +81,46 @@ class VendorA(VendorAdapter):
             logger.error(f"VendorA (GPT-4o-mini): Error - {str(e)}")
             raise
 
+    async def stream(self, request: VendorRequest) -> AsyncIterator[StreamChunk]:
+        """
+        Stream GPT-4o-mini tokens as they are generated
+        """
+        start_time = time.time()
+        tokens_in = tokens_out = 0
+
+        try:
+            stream = await self.client.chat.completions.create(
+                model=self.model_name,
+                messages=self._messages(request),
+                temperature=0.7,
+                max_tokens=500,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+
+            try:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield StreamChunk(text=chunk.choices[0].delta.content)
+                    if chunk.usage:
+                        # Final chunk (include_usage) has no choices
+                        tokens_in = chunk.usage.prompt_tokens
+                        tokens_out = chunk.usage.completion_tokens
+            finally:
+                await stream.close()
+
+            actual_latency = int((time.time() - start_time) * 1000)
+            logger.info(f"VendorA (GPT-4o-mini): Stream complete - latency={actual_latency}ms, tokens={tokens_in}/{tokens_out}")
+            yield StreamChunk(done=True, tokens_in=tokens_in, tokens_out=tokens_out)
+
+        except Exception as e:
+            logger.error(f"VendorA (GPT-4o-mini): Stream error - {str(e)}")
+            raise
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP connection pool"""
+        await self.client.close()
+
     def normalize_response(self, raw_response: Dict[str, Any]) -> NormalizedResponse:
         """
         Normalize VendorA response format
@@ -2,9 +2,9 @@
 VendorB implementation - Google Gemini 2.5 Flash
 """
 import time
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator
 import google.generativeai as genai
-from app.services.vendors.base import VendorAdapter, VendorRequest, NormalizedResponse
+from app.services.vendors.base import VendorAdapter, VendorRequest, NormalizedResponse, StreamChunk
 from app.config import settings
 from app.utils.logger import get_logger
 
@@ -14,19 +14,34 @@ logger = get_logger(__name__)
 class VendorB(VendorAdapter):
     """
     VendorB - Google Gemini 2.5 Flash implementation
+
+    genai.configure() sets process-global client state and the model keeps
+    its own gRPC channel, so a single instance is shared via the factory.
     """
 
+    model_name = "gemini-2.5-flash"
+
     def __init__(self):
         api_key = settings.GOOGLE_API_KEY
         if not api_key:
             raise ValueError("GOOGLE_API_KEY not configured in settings")
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        self.model = genai.GenerativeModel(self.model_name)
 
     @property
     def name(self) -> str:
         return "vendorB"
 
+    @staticmethod
+    def _prompt(request: VendorRequest) -> str:
+        """Combine system prompt, conversation history and user message"""
+        lines = [request.system_prompt, ""]
+        for turn in request.conversation_history:
+            speaker = "User" if turn["role"] == "user" else "Assistant"
+            lines.append(f"{speaker}: {turn['content']}")
+        lines.append(f"User: {request.user_message}")
+        return "\n".join(lines)
+
     async def send_message(self, request: VendorRequest) -> Dict[str, Any]:
         """
         Call Google Gemini 2.0 Flash API
@@ -34,8 +49,7 @@ class VendorB(VendorAdapter):
         start_time = time.time()
 
         try:
-            # Combine system prompt and user message
-            full_prompt = f"{request.system_prompt}\n\nUser: {request.user_message}"
+            full_prompt = self._prompt(request)
 
             response = await self.model.generate_content_async(
                 full_prompt,
@@ -73,6 +87,43 @@ class VendorB(VendorAdapter):
             logger.error(f"VendorB (Gemini 2.0 Flash): Error - {str(e)}")
             raise
 
+    async def stream(self, request: VendorRequest) -> AsyncIterator[StreamChunk]:
+        """
+        Stream Gemini tokens as they are generated
+        """
+        start_time = time.time()
+
+        try:
+            full_prompt = self._prompt(request)
+
+            response = await self.model.generate_content_async(
+                full_prompt,
+                generation_config={
+                    'temperature': 0.7,
+                    'max_output_tokens': 500,
+                },
+                stream=True
+            )
+
+            usage = None
+            async for chunk in response:
+                # .text raises on chunks without parts (e.g. the finish chunk)
+                if chunk.parts and chunk.text:
+                    yield StreamChunk(text=chunk.text)
+                # Cumulative usage; the last chunk's value is the total
+                usage = getattr(chunk, 'usage_metadata', None) or usage
+
+            input_tokens = usage.prompt_token_count if usage else 0
+            output_tokens = usage.candidates_token_count if usage else 0
+
+            actual_latency = int((time.time() - start_time) * 1000)
+            logger.info(f"VendorB (Gemini 2.0 Flash): Stream complete - latency={actual_latency}ms, tokens={input_tokens}/{output_tokens}")
+            yield StreamChunk(done=True, tokens_in=input_tokens, tokens_out=output_tokens)
+
+        except Exception as e:
+            logger.error(f"VendorB (Gemini 2.0 Flash): Stream error - {str(e)}")
+            raise
+
     def normalize_response(self, raw_response: Dict[str, Any]) -> NormalizedResponse:
         """
         Normalize VendorB response format
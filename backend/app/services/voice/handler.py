@@ -2,11 +2,10 @@
 Voice message handler - orchestrates STT, message processing, and TTS
 """
 from typing import BinaryIO
-from sqlalchemy.orm import Session
-from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.session import Session as SessionModel, Message
 from app.models.voice import VoiceArtifact
+from app.services.request_context import RequestContext
 from app.services.voice.stt import stt_service
 from app.services.voice.tts import tts_service
 from app.services.message_handler import MessageHandler
@@ -18,11 +17,10 @@ logger = get_logger(__name__)
 class VoiceMessageHandler:
     """Handles voice message flow: STT -> Message Processing -> TTS"""
 
-    def __init__(self, db: Session, tenant_id: UUID, session: SessionModel, correlation_id: str = None):
+    def __init__(self, db: AsyncSession, context: RequestContext):
         self.db = db
-        self.tenant_id = tenant_id
-        self.session = session
-        self.correlation_id = correlation_id
+        self.context = context
+        self.session = context.session
         self.logger = get_logger(__name__)
 
     async def handle_voice_message(
@@ -57,6 +55,10 @@ class VoiceMessageHandler:
             }
         """
         try:
+            # End the read transaction the request context was loaded in, so
+            # no pooled connection sits idle in transaction during STT
+            await self.db.commit()
+
             # Step 1: Transcribe audio to text (STT)
             self.logger.info(f"[Voice] Step 1: Starting STT for session {self.session.id}")
             stt_result = await stt_service.transcribe(audio_file, filename)
@@ -72,12 +74,7 @@ class VoiceMessageHandler:
 
             # Step 3: Process text message through normal message handler
             self.logger.info(f"[Voice] Step 3: Processing text message")
-            message_handler = MessageHandler(
-                db=self.db,
-                tenant_id=self.tenant_id,
-                session=self.session,
-                correlation_id=self.correlation_id
-            )
+            message_handler = MessageHandler(db=self.db, context=self.context)
 
             assistant_message = await message_handler.handle_message(
                 user_message=transcribed_text,
@@ -87,7 +84,10 @@ class VoiceMessageHandler:
             # Get the assistant's text response
             assistant_text = assistant_message.content
 
-            # Step 4: Convert assistant response to speech (TTS)
+            # Step 4: Convert assistant response to speech (TTS). The turn is
+            # committed; end any read left open (e.g. an idempotent replay)
+            # before the call, the artifacts are written after it
+            await self.db.commit()
             self.logger.info(f"[Voice] Step 4: Starting TTS for response")
             tts_result = await tts_service.synthesize(assistant_text)
             assistant_audio = tts_result["audio_data"]
@@ -122,7 +122,7 @@ class VoiceMessageHandler:
             )
             self.db.add(outgoing_artifact)
 
-            self.db.commit()
+            await self.db.commit()
 
             self.logger.info(f"[Voice] Voice artifacts saved to database")
 
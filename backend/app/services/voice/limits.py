@@ -0,0 +1,23 @@
+"""
+Concurrency limits for voice provider calls
+"""
+import asyncio
+
+from app.config import settings
+from app.middleware.error_handler import AppException
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+async def acquire_slot(slots: asyncio.Semaphore, service: str):
+    """
+    Wait for a concurrency slot, or fail fast with 503 when saturated
+
+    The caller releases the slot when its provider call finishes.
+    """
+    try:
+        await asyncio.wait_for(slots.acquire(), timeout=settings.VOICE_QUEUE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        logger.warning(f"{service} concurrency limit reached")
+        raise AppException(f"{service} service is busy, please retry", status_code=503)
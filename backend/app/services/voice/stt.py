@@ -1,21 +1,34 @@
 """
 Speech-to-Text service using OpenAI Whisper
 """
+import asyncio
 import time
-from typing import BinaryIO
-from openai import OpenAI
+from typing import BinaryIO, Optional
+from openai import AsyncOpenAI
 from app.config import settings
+from app.services.voice.limits import acquire_slot
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 
 class STTService:
-    """Speech-to-Text service using OpenAI Whisper API"""
-
-    def __init__(self):
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+    """
+    Speech-to-Text service using OpenAI Whisper API
+
+    Uses the async client so a multi-second transcription never blocks the
+    event loop; calls are bounded by a timeout and a per-process
+    concurrency limit.
+    """
+
+    def __init__(self, client: Optional[AsyncOpenAI] = None):
+        self.client = client or AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            timeout=settings.STT_TIMEOUT_SECONDS,
+            max_retries=settings.VOICE_MAX_RETRIES
+        )
         self.model = "whisper-1"
+        self._slots = asyncio.Semaphore(settings.VOICE_MAX_CONCURRENCY)
 
     async def transcribe(self, audio_file: BinaryIO, filename: str = "audio.wav") -> dict:
         """
@@ -33,13 +46,14 @@ class STTService:
                 "latency_ms": 1234
             }
         """
+        await acquire_slot(self._slots, "Speech-to-text")
         start_time = time.time()
 
         try:
             logger.info(f"Starting STT transcription for {filename}")
 
             # Call Whisper API
-            transcript = self.client.audio.transcriptions.create(
+            transcript = await self.client.audio.transcriptions.create(
                 model=self.model,
                 file=(filename, audio_file),
                 response_format="verbose_json"
@@ -63,6 +77,13 @@ class STTService:
             logger.error(f"STT failed after {latency_ms}ms: {type(e).__name__}: {str(e)}")
             raise Exception(f"Speech-to-text failed: {str(e)}")
 
+        finally:
+            self._slots.release()
+
+    async def aclose(self) -> None:
+        """Close the HTTP connection pool (application shutdown)"""
+        await self.client.close()
+
 
 # Singleton instance
 stt_service = STTService()
@@ -1,20 +1,31 @@
 """
 Text-to-Speech service using OpenAI TTS
 """
+import asyncio
 import time
-from io import BytesIO
-from openai import OpenAI
+from typing import Optional
+from openai import AsyncOpenAI
 from app.config import settings
+from app.services.voice.limits import acquire_slot
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 
 class TTSService:
-    """Text-to-Speech service using OpenAI TTS API"""
-
-    def __init__(self):
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+    """
+    Text-to-Speech service using OpenAI TTS API
+
+    Async client, timeout and per-process concurrency limit as in STTService.
+    """
+
+    def __init__(self, client: Optional[AsyncOpenAI] = None):
+        self.client = client or AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            timeout=settings.TTS_TIMEOUT_SECONDS,
+            max_retries=settings.VOICE_MAX_RETRIES
+        )
+        self._slots = asyncio.Semaphore(settings.VOICE_MAX_CONCURRENCY)
         self.model = "tts-1"  # Faster, lower latency
         # self.model = "tts-1-hd"  # Higher quality
         self.voice = "alloy"  # Options: alloy, echo, fable, onyx, nova, shimmer
@@ -34,13 +45,14 @@ class TTSService:
                 "latency_ms": 1234
             }
         """
+        await acquire_slot(self._slots, "Text-to-speech")
         start_time = time.time()
 
         try:
             logger.info(f"Starting TTS synthesis: {len(text)} chars, voice={voice or self.voice}")
 
             # Call TTS API
-            response = self.client.audio.speech.create(
+            response = await self.client.audio.speech.create(
                 model=self.model,
                 voice=voice or self.voice,
                 input=text,
@@ -68,6 +80,13 @@ class TTSService:
             logger.error(f"TTS failed after {latency_ms}ms: {type(e).__name__}: {str(e)}")
             raise Exception(f"Text-to-speech failed: {str(e)}")
 
+        finally:
+            self._slots.release()
+
+    async def aclose(self) -> None:
+        """Close the HTTP connection pool (application shutdown)"""
+        await self.client.close()
+
 
 # Singleton instance
 tts_service = TTSService()
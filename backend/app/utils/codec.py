@@ -0,0 +1,99 @@
+"""
+Versioned binary codecs for stored response payloads
+
+A payload is the response's JSON bytes, exactly as it is served. Stored
+blobs start with one version byte naming the codec, so the codec can be
+changed without rewriting existing rows or keys:
+
+  0x01  json       stored as-is
+  0x02  json+zlib  zlib-compressed (stdlib)
+  0x03  json+zstd  zstandard-compressed (needs the optional `zstandard` package)
+  '{'   legacy     plain JSON written before blobs were versioned
+
+Payloads below the compression threshold are always written as 0x01;
+small responses do not shrink enough to pay for the compression call.
+"""
+import zlib
+from typing import Callable, Dict, NamedTuple
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+
+class Codec(NamedTuple):
+    name: str
+    version: int
+    compress: Callable[[bytes], bytes]
+    decompress: Callable[[bytes], bytes]
+
+
+def _identity(data: bytes) -> bytes:
+    return data
+
+
+JSON = Codec("json", 0x01, _identity, _identity)
+ZLIB = Codec("zlib", 0x02, lambda data: zlib.compress(data, 6), zlib.decompress)
+
+_CODECS: Dict[int, Codec] = {JSON.version: JSON, ZLIB.version: ZLIB}
+
+if zstandard is not None:
+    ZSTD = Codec(
+        "zstd",
+        0x03,
+        zstandard.ZstdCompressor(level=3).compress,
+        zstandard.ZstdDecompressor().decompress
+    )
+    _CODECS[ZSTD.version] = ZSTD
+
+_LEGACY_JSON = ord("{")
+
+# get_codec() runs on every stored response: warn about the zstd fallback once
+_warned_zstd_fallback = False
+
+
+class CodecError(ValueError):
+    """A blob cannot be decoded in this process"""
+
+
+def get_codec(name: str) -> Codec:
+    """
+    Codec by name ('json' | 'zlib' | 'zstd')
+
+    'zstd' degrades to 'zlib' when the zstandard package is not installed.
+    """
+    global _warned_zstd_fallback
+    for codec in _CODECS.values():
+        if codec.name == name:
+            return codec
+    if name == "zstd":
+        if not _warned_zstd_fallback:
+            _warned_zstd_fallback = True
+            logger.warning("zstandard is not installed, using zlib for stored payloads")
+        return ZLIB
+    raise ValueError(f"Unknown codec: {name}")
+
+
+def encode(payload: bytes, codec: Codec, min_compress_bytes: int = 0) -> bytes:
+    """Version byte + payload, compressed with codec if it is large enough"""
+    if len(payload) < min_compress_bytes:
+        codec = JSON
+    return bytes((codec.version,)) + codec.compress(payload)
+
+
+def decode(blob: bytes) -> bytes:
+    """JSON payload of a blob written by encode() (or a legacy plain JSON value)"""
+    if not blob:
+        raise CodecError("Empty payload")
+    version = blob[0]
+    if version == _LEGACY_JSON:
+        return bytes(blob)
+    codec = _CODECS.get(version)
+    if codec is None:
+        raise CodecError(f"No codec for version byte 0x{version:02x}")
+    return codec.decompress(bytes(blob[1:]))
@@ -0,0 +1,38 @@
+"""
+Weak ETags and conditional GET helpers
+"""
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Response
+
+
+def weak_etag(*parts: Any) -> str:
+    """
+    Weak ETag over the given version markers (timestamps, ids, counts, page params)
+    """
+    digest = hashlib.blake2b("|".join(str(part) for part in parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    If-None-Match check using weak comparison (RFC 9110 13.1.2)
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    """304 response carrying the current validator"""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
+
+def set_etag(response: Response, etag: str):
+    """Attach the validator to a full response; clients must revalidate before reuse"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
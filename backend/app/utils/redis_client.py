@@ -0,0 +1,32 @@
+"""
+Shared Redis client
+"""
+from typing import Optional
+
+from redis.asyncio import Redis
+
+from app.config import settings
+
+_client: Optional[Redis] = None
+
+
+def get_redis() -> Redis:
+    """
+    Get the process-wide Redis client (connection pool created on first use)
+    """
+    global _client
+    if _client is None:
+        _client = Redis.from_url(
+            settings.REDIS_URL,
+            socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT_SECONDS,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS
+        )
+    return _client
+
+
+async def close_redis():
+    """Close the shared client's connections (application shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,134 @@
+"""
+Benchmark - tool intent detection per message
+
+Runs a corpus of chat messages through:
+
+  inline   - the previous implementation: per-tool substring scans plus
+             invoice regexes compiled (cache lookup) inside the handler
+  registry - ToolRegistry: one Aho-Corasick pass over all triggers, then
+             only the candidate tools' precompiled extractors
+
+--tools adds synthetic tools (4 triggers each, all enabled) to show how
+each approach scales with the number of tools.
+
+Usage:
+    python scripts/benchmark_intents.py [--messages 20000] [--tools 50]
+"""
+import argparse
+import random
+import re
+import string
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.tools.base import Tool
+from app.services.tools.intents import ToolRegistry
+from app.services.tools.invoice_lookup import InvoiceLookupTool
+
+FILLER = [
+    "hi", "hello", "what", "is", "the", "status", "of", "my", "please", "can", "you",
+    "help", "me", "with", "account", "thanks", "when", "due", "payment", "question",
+]
+MENTIONS = ["invoice INV-TC-001", "inv-hf-7", "INV004", "invoice #12", "my invoice"]
+
+
+class SyntheticTool(Tool):
+    name = ""
+    description = "synthetic"
+    parameters = []
+
+    def __init__(self, index: int, rnd: random.Random):
+        self.name = f"tool_{index}"
+        self.triggers = tuple(
+            "".join(rnd.choices(string.ascii_lowercase, k=rnd.randint(6, 10))) for _ in range(4)
+        )
+
+    async def execute(self, params, context):
+        return {"success": True}
+
+    def extract_params(self, message):
+        return {}
+
+
+def inline_detect(message: str, tools) -> list:
+    """The handler's old approach, generalized to one keyword scan per tool"""
+    lowered = message.lower()
+    found = []
+    for tool in tools:
+        if not any(keyword in lowered for keyword in tool.triggers):
+            continue
+        if tool.name != "invoice_lookup":
+            found.append(tool.name)
+            continue
+        inv_match = re.search(r'INV-[A-Z]+-\d+', message, re.IGNORECASE)
+        if inv_match:
+            found.append(inv_match.group(0).upper())
+            continue
+        inv_match = re.search(r'INV-?\d+', message, re.IGNORECASE)
+        if inv_match:
+            invoice_id = inv_match.group(0).upper()
+            if '-' not in invoice_id:
+                invoice_id = re.sub(r'(INV)(\d+)', r'\1-\2', invoice_id)
+            found.append(invoice_id)
+            continue
+        num_match = re.search(r'(?:invoice|inv|order|id)\s*[:\-#]?\s*(\d+)', message, re.IGNORECASE)
+        if num_match:
+            found.append(f"INV-{num_match.group(1).zfill(3)}")
+    return found
+
+
+def build_corpus(count: int, tools, rnd: random.Random) -> list:
+    messages = []
+    for _ in range(count):
+        words = rnd.choices(FILLER, k=rnd.randint(6, 20))
+        roll = rnd.random()
+        if roll < 0.3:
+            words.insert(rnd.randrange(len(words)), rnd.choice(MENTIONS))
+        elif roll < 0.4 and len(tools) > 1:
+            words.insert(rnd.randrange(len(words)), rnd.choice(rnd.choice(tools[1:]).triggers))
+        messages.append(" ".join(words))
+    return messages
+
+
+def timed(fn, corpus) -> float:
+    start = time.perf_counter()
+    for message in corpus:
+        fn(message)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--tools", type=int, default=50, help="synthetic tools on top of invoice_lookup")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    print(f"\n{args.messages} messages\n")
+    print(f"{'tools':>6}{'inline':>14}{'registry':>14}{'speedup':>10}")
+
+    for tool_count in sorted({0, args.tools // 5, args.tools}):
+        tools = [InvoiceLookupTool()] + [SyntheticTool(i, rnd) for i in range(tool_count)]
+        enabled = [tool.name for tool in tools]
+        registry = ToolRegistry(tools)
+        corpus = build_corpus(args.messages, tools, rnd)
+        registry.detect(corpus[0], enabled)  # build the automaton outside the timing
+
+        inline = timed(lambda m: inline_detect(m, tools), corpus)
+        matched = timed(lambda m: registry.detect(m, enabled), corpus)
+        print(
+            f"{len(tools):>6}"
+            f"{inline / args.messages * 1e6:>11.1f}µs"
+            f"{matched / args.messages * 1e6:>11.1f}µs"
+            f"{inline / matched:>9.1f}x"
+        )
+    print()
+
+
+if __name__ == "__main__":
+    main()
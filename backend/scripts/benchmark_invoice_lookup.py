@@ -0,0 +1,120 @@
+"""
+Benchmark - invoice lookups by backend
+
+Generates N synthetic invoices spread over a few companies, loads them
+into each backend and times random lookups by id (hits and misses) and
+by customer/status:
+
+  memory   - InMemoryInvoiceBackend (dicts, per process)
+  snapshot - SnapshotInvoiceBackend (mmap file, shared page cache)
+  database - DatabaseInvoiceBackend on a temporary SQLite file (--database)
+
+Usage:
+    python scripts/benchmark_invoice_lookup.py [--invoices 1000000] [--lookups 20000] [--database]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.models.invoice import Invoice
+from app.services.invoices.database import DatabaseInvoiceBackend
+from app.services.invoices.memory import InMemoryInvoiceBackend
+from app.services.invoices.snapshot import SnapshotInvoiceBackend, build_snapshot
+
+COMPANIES = ["techcorp", "healthfirst", "retailco", "finserv"]
+STATUSES = ["paid", "pending", "overdue"]
+
+
+def synthetic_invoices(count: int, seed: int):
+    rnd = random.Random(seed)
+    for number in range(count):
+        company_key = COMPANIES[number % len(COMPANIES)]
+        yield company_key, {
+            "id": f"INV-{company_key[:2].upper()}-{number:07d}",
+            "amount": round(rnd.uniform(100, 50000), 2),
+            "status": rnd.choice(STATUSES),
+            "due_date": f"2025-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+            "customer": f"Customer {rnd.randint(0, count // 50)}",
+            "description": "Synthetic invoice",
+            "payment_date": None,
+        }
+
+
+async def timed(label: str, backend, keys, customers) -> None:
+    start = time.perf_counter()
+    for company_key, invoice_id in keys:
+        await backend.get(company_key, invoice_id)
+    by_id = (time.perf_counter() - start) / len(keys)
+
+    start = time.perf_counter()
+    for company_key, customer in customers:
+        await backend.by_customer(company_key, customer, limit=20)
+    by_customer = (time.perf_counter() - start) / len(customers)
+
+    start = time.perf_counter()
+    for company_key in COMPANIES * 25:
+        await backend.by_status(company_key, "overdue", limit=20)
+    by_status = (time.perf_counter() - start) / (len(COMPANIES) * 25)
+
+    print(f"{label:>10}{by_id * 1e6:>12.1f}µs{by_customer * 1e6:>13.1f}µs{by_status * 1e6:>13.1f}µs")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--invoices", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--database", action="store_true", help="also benchmark SQLite (slow to load)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    invoices = list(synthetic_invoices(args.invoices, args.seed))
+    keys = [(company_key, invoice["id"]) for company_key, invoice in rnd.choices(invoices, k=args.lookups)]
+    keys += [(rnd.choice(COMPANIES), f"INV-XX-{n}") for n in range(args.lookups // 10)]  # misses
+    rnd.shuffle(keys)
+    customers = [(company_key, invoice["customer"]) for company_key, invoice in rnd.choices(invoices, k=1000)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"\n{args.invoices} invoices, {len(keys)} id lookups\n")
+        print(f"{'backend':>10}{'by id':>14}{'by customer':>15}{'by status':>15}")
+
+        memory = InMemoryInvoiceBackend()
+        for company_key in COMPANIES:
+            await memory.bulk_load(company_key, (i for c, i in invoices if c == company_key))
+        await timed("memory", memory, keys, customers)
+        del memory
+
+        path = os.path.join(directory, "invoices.snap")
+        start = time.perf_counter()
+        build_snapshot(path, invoices)
+        build_seconds = time.perf_counter() - start
+        snapshot = SnapshotInvoiceBackend(path)
+        await timed("snapshot", snapshot, keys, customers)
+        await snapshot.aclose()
+
+        if args.database:
+            engine = create_async_engine(f"sqlite+aiosqlite:///{directory}/invoices.db")
+            async with engine.begin() as conn:
+                await conn.run_sync(Invoice.metadata.create_all, tables=[Invoice.__table__])
+            database = DatabaseInvoiceBackend(async_sessionmaker(engine, expire_on_commit=False))
+            for company_key in COMPANIES:
+                await database.bulk_load(company_key, (i for c, i in invoices if c == company_key))
+            await timed("database", database, keys, customers)
+            await engine.dispose()
+
+        size = os.path.getsize(path)
+        print(f"\nsnapshot: {size / 1e6:.0f} MB, built in {build_seconds:.1f}s\n")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
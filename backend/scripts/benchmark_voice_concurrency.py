@@ -0,0 +1,137 @@
+"""
+Benchmark - chat latency while voice (STT) requests are in flight
+
+Runs a stream of simulated chat turns alongside concurrent Whisper
+transcriptions and reports chat latency percentiles for:
+
+  blocking - the previous implementation (sync OpenAI client inside an
+             async def), which stalls the event loop for the whole call
+  async    - STTService on AsyncOpenAI
+
+The OpenAI API is replaced by an in-process httpx MockTransport that
+answers after --voice-seconds, so no network or API key is needed.
+
+Usage:
+    python scripts/benchmark_voice_concurrency.py [--voice-requests 4] [--chat-requests 200]
+"""
+import argparse
+import asyncio
+import io
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+
+from app.services.voice.stt import STTService
+
+WHISPER_RESPONSE = {"text": "what is the status of invoice INV-001", "language": "en", "duration": 2.5}
+
+
+class BlockingSTTService:
+    """The pre-async STT implementation: sync client called from a coroutine"""
+
+    def __init__(self, client: OpenAI):
+        self.client = client
+
+    async def transcribe(self, audio_file, filename: str = "audio.wav") -> dict:
+        transcript = self.client.audio.transcriptions.create(
+            model="whisper-1",
+            file=(filename, audio_file),
+            response_format="verbose_json"
+        )
+        return {"text": transcript.text}
+
+
+def build_services(voice_seconds: float):
+    def sync_handler(request: httpx.Request) -> httpx.Response:
+        time.sleep(voice_seconds)
+        return httpx.Response(200, json=WHISPER_RESPONSE)
+
+    async def async_handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(voice_seconds)
+        return httpx.Response(200, json=WHISPER_RESPONSE)
+
+    blocking = BlockingSTTService(OpenAI(
+        api_key="bench",
+        http_client=httpx.Client(transport=httpx.MockTransport(sync_handler))
+    ))
+    non_blocking = STTService(client=AsyncOpenAI(
+        api_key="bench",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(async_handler))
+    ))
+    return {"blocking": blocking, "async": non_blocking}
+
+
+async def chat_turn(scheduled_at: float, vendor_seconds: float) -> float:
+    """
+    A chat turn whose vendor call is already async; returns latency in ms
+
+    Measured from the turn's scheduled arrival, so time spent waiting for a
+    stalled event loop to even start the turn is counted.
+    """
+    await asyncio.sleep(vendor_seconds)
+    return (time.perf_counter() - scheduled_at) * 1000
+
+
+async def run_scenario(service, voice_requests: int, chat_requests: int, chat_interval: float, vendor_seconds: float):
+    async def chat_load():
+        start = time.perf_counter()
+        tasks = []
+        for i in range(chat_requests):
+            scheduled_at = start + i * chat_interval
+            await asyncio.sleep(max(0.0, scheduled_at - time.perf_counter()))
+            tasks.append(asyncio.create_task(chat_turn(scheduled_at, vendor_seconds)))
+        return await asyncio.gather(*tasks)
+
+    async def voice_load():
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            service.transcribe(io.BytesIO(b"\0" * 1024), "bench.wav")
+            for _ in range(voice_requests)
+        ))
+        return time.perf_counter() - start
+
+    chat_latencies, voice_seconds = await asyncio.gather(chat_load(), voice_load())
+    return sorted(chat_latencies), voice_seconds
+
+
+def percentile(ordered, pct: float) -> float:
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--voice-requests", type=int, default=4)
+    parser.add_argument("--voice-seconds", type=float, default=1.0, help="simulated Whisper latency")
+    parser.add_argument("--chat-requests", type=int, default=200)
+    parser.add_argument("--chat-interval", type=float, default=0.01, help="seconds between chat arrivals")
+    parser.add_argument("--vendor-seconds", type=float, default=0.05, help="simulated chat vendor latency")
+    args = parser.parse_args()
+
+    print(f"\n{args.voice_requests} concurrent STT calls ({args.voice_seconds}s each), "
+          f"{args.chat_requests} chat turns ({args.vendor_seconds * 1000:.0f}ms vendor latency)\n")
+    print(f"{'mode':<10}{'chat p50':>12}{'chat p95':>12}{'chat p99':>12}{'chat max':>12}{'voice wall':>14}")
+
+    for mode, service in build_services(args.voice_seconds).items():
+        latencies, voice_wall = await run_scenario(
+            service, args.voice_requests, args.chat_requests, args.chat_interval, args.vendor_seconds
+        )
+        print(
+            f"{mode:<10}"
+            f"{statistics.median(latencies):>10.0f}ms"
+            f"{percentile(latencies, 95):>10.0f}ms"
+            f"{percentile(latencies, 99):>10.0f}ms"
+            f"{latencies[-1]:>10.0f}ms"
+            f"{voice_wall:>13.2f}s"
+        )
+    print()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+"""
+Bulk-load invoice data
+
+Reads CSV (header row with company_key plus the invoice fields) or JSON
+Lines (one invoice object with company_key per line), or the built-in
+demo data, and either upserts it into the invoices table or builds a
+read-only snapshot file for INVOICE_BACKEND=snapshot.
+
+Snapshots are replaced atomically; restart the workers (or let them
+recycle) to map the new file. Running workers serve cached invoice_lookup
+results for up to the tool's cache TTL (60s) after a database load.
+
+Usage:
+    python scripts/load_invoices.py --demo --target database
+    python scripts/load_invoices.py invoices.csv --target snapshot [--output data/invoices.snap]
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+from itertools import groupby
+from pathlib import Path
+from typing import Any, Dict, Iterator, Tuple
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.utils.database import async_engine
+from app.services.invoices.database import DatabaseInvoiceBackend
+from app.services.invoices.demo import DEMO_INVOICES
+from app.services.invoices.snapshot import build_snapshot
+
+
+def read_invoices(path: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """(company_key, invoice) pairs from a .csv or .jsonl file, streamed"""
+    with open(path, newline="") as f:
+        if path.endswith(".csv"):
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for row in rows:
+            row = {key: (value if value != "" else None) for key, value in row.items()}
+            yield row.pop("company_key"), row
+
+
+def demo_invoices() -> Iterator[Tuple[str, Dict[str, Any]]]:
+    for company_key, invoices in DEMO_INVOICES.items():
+        for invoice in invoices.values():
+            yield company_key, invoice
+
+
+async def load_database(invoices: Iterator[Tuple[str, Dict[str, Any]]]) -> int:
+    # Consecutive rows of one company share a batch; sort input by company for large loads
+    backend = DatabaseInvoiceBackend()
+    total = 0
+    for company_key, rows in groupby(invoices, key=lambda pair: pair[0]):
+        total += await backend.bulk_load(company_key, (invoice for _, invoice in rows))
+    await async_engine.dispose()
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", nargs="?", help=".csv or .jsonl file")
+    parser.add_argument("--demo", action="store_true", help="load the built-in demo invoices")
+    parser.add_argument("--target", choices=("database", "snapshot"), required=True)
+    parser.add_argument("--output", default=settings.INVOICE_SNAPSHOT_PATH, help="snapshot path")
+    args = parser.parse_args()
+    if bool(args.path) == args.demo:
+        parser.error("pass either a file or --demo")
+
+    invoices = demo_invoices() if args.demo else read_invoices(args.path)
+    if args.target == "database":
+        total = asyncio.run(load_database(invoices))
+        print(f"✓ Loaded {total} invoices into the database")
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        total = build_snapshot(args.output, invoices)
+        print(f"✓ Wrote {total} invoices to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Rebuild usage rollups from usage_events
+
+Backfills usage_rollups after the migration and repairs drift for closed
+days. Rollups for the selected months are deleted and recomputed
+(ranges are widened to whole months). Run it once after upgrading to
+backfill the monthly rollups.
+
+Usage:
+    python scripts/rebuild_usage_rollups.py [--start-date 2025-12-01] [--end-date 2025-12-31] [--tenant-id UUID]
+"""
+import argparse
+import asyncio
+import sys
+from datetime import date
+from pathlib import Path
+from uuid import UUID
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.utils.database import AsyncSessionLocal, async_engine
+from app.services.billing.rollups import rebuild_usage_rollups
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--start-date", type=date.fromisoformat, default=None)
+    parser.add_argument("--end-date", type=date.fromisoformat, default=None)
+    parser.add_argument("--tenant-id", type=UUID, default=None)
+    args = parser.parse_args()
+
+    async with AsyncSessionLocal() as db:
+        rollups = await rebuild_usage_rollups(db, args.start_date, args.end_date, args.tenant_id)
+        await db.commit()
+    await async_engine.dispose()
+
+    print(f"✓ Rebuilt {rollups} usage rollups")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
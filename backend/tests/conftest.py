@@ -3,12 +3,12 @@ Pytest configuration and fixtures for integration and unit tests
 """
 import pytest
 import asyncio
-from sqlalchemy import create_engine, event
-from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import StaticPool
-from typing import Generator
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import NullPool
+from typing import AsyncGenerator
 import uuid
 
+from app.config import to_async_database_url
 from app.utils.database import Base
 from app.models.tenant import Tenant
 from app.models.agent import Agent
@@ -24,43 +24,44 @@ TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "postgresql://postgres:passwo
 
 
 @pytest.fixture(scope="function")
-def test_engine():
+async def test_engine():
     """Create a test database engine"""
-    engine = create_engine(
-        TEST_DATABASE_URL,
-        pool_pre_ping=True
+    engine = create_async_engine(
+        to_async_database_url(TEST_DATABASE_URL),
+        poolclass=NullPool
     )
 
     # Create all tables
-    Base.metadata.create_all(bind=engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
 
     yield engine
 
     # Drop all tables after test
-    Base.metadata.drop_all(bind=engine)
-    engine.dispose()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
 
 
 @pytest.fixture(scope="function")
-def db_session(test_engine) -> Generator[Session, None, None]:
+async def db_session(test_engine) -> AsyncGenerator[AsyncSession, None]:
     """Create a test database session"""
-    TestingSessionLocal = sessionmaker(
-        autocommit=False,
+    TestingSessionLocal = async_sessionmaker(
+        test_engine,
+        class_=AsyncSession,
         autoflush=False,
-        bind=test_engine
+        expire_on_commit=False
     )
 
-    session = TestingSessionLocal()
-
-    try:
-        yield session
-    finally:
-        session.rollback()
-        session.close()
+    async with TestingSessionLocal() as session:
+        try:
+            yield session
+        finally:
+            await session.rollback()
 
 
 @pytest.fixture(scope="function")
-def test_tenant(db_session: Session) -> Tenant:
+async def test_tenant(db_session: AsyncSession) -> Tenant:
     """Create a test tenant"""
     tenant = Tenant(
         id=uuid.uuid4(),
@@ -69,14 +70,14 @@ def test_tenant(db_session: Session) -> Tenant:
         api_key=generate_api_key()
     )
     db_session.add(tenant)
-    db_session.commit()
-    db_session.refresh(tenant)
+    await db_session.commit()
+    await db_session.refresh(tenant)
 
     return tenant
 
 
 @pytest.fixture(scope="function")
-def test_agent(db_session: Session, test_tenant: Tenant) -> Agent:
+async def test_agent(db_session: AsyncSession, test_tenant: Tenant) -> Agent:
     """Create a test agent"""
     agent = Agent(
         id=uuid.uuid4(),
@@ -88,14 +89,14 @@ def test_agent(db_session: Session, test_tenant: Tenant) -> Agent:
         enabled_tools=[]
     )
     db_session.add(agent)
-    db_session.commit()
-    db_session.refresh(agent)
+    await db_session.commit()
+    await db_session.refresh(agent)
 
     return agent
 
 
 @pytest.fixture(scope="function")
-def test_session(db_session: Session, test_tenant: Tenant, test_agent: Agent) -> SessionModel:
+async def test_session(db_session: AsyncSession, test_tenant: Tenant, test_agent: Agent) -> SessionModel:
     """Create a test conversation session"""
     session = SessionModel(
         id=uuid.uuid4(),
@@ -106,8 +107,8 @@ def test_session(db_session: Session, test_tenant: Tenant, test_agent: Agent) ->
         metadata={}
     )
     db_session.add(session)
-    db_session.commit()
-    db_session.refresh(session)
+    await db_session.commit()
+    await db_session.refresh(session)
 
     return session
 
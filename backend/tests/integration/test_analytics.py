@@ -0,0 +1,262 @@
+"""
+Integration tests for usage rollups and the analytics endpoints
+"""
+import pytest
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api import analytics
+from app.api.analytics import get_usage_analytics, get_top_agents, get_usage_timeseries
+from app.models.agent import Agent
+from app.models.session import Session as SessionModel
+from app.models.tenant import Tenant
+from app.middleware.error_handler import BadRequestException
+from app.models.usage import UsageEvent, UsageRollup
+from app.services.billing.rollups import count_sessions, rebuild_usage_rollups, record_usage_rollup
+
+
+async def add_event(db, tenant, agent, provider, created_at, tokens_in=10, tokens_out=20, cost="0.001000", session=None):
+    if session is None:
+        session = SessionModel(
+            id=uuid.uuid4(),
+            tenant_id=tenant.id,
+            agent_id=agent.id,
+            customer_id="analytics-customer",
+            channel="chat",
+            metadata={}
+        )
+        db.add(session)
+    event = UsageEvent(
+        id=uuid.uuid4(),
+        tenant_id=tenant.id,
+        agent_id=agent.id,
+        session_id=session.id,
+        provider=provider,
+        tokens_in=tokens_in,
+        tokens_out=tokens_out,
+        cost_usd=Decimal(cost),
+        event_type="message",
+        created_at=created_at
+    )
+    db.add(event)
+    await record_usage_rollup(db, event)
+    await db.commit()
+    return session
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_usage_analytics_respects_date_range(
+    db_session: AsyncSession,
+    test_tenant: Tenant,
+    test_agent: Agent
+):
+    """Test totals, sessions and the provider breakdown only count events in range"""
+    await add_event(db_session, test_tenant, test_agent, "vendorA", datetime(2024, 1, 10, 12))
+    await add_event(db_session, test_tenant, test_agent, "vendorB", datetime(2024, 1, 20, 23, 30), cost="0.002000")
+    await add_event(db_session, test_tenant, test_agent, "vendorA", datetime(2024, 2, 5))
+
+    result = await get_usage_analytics(
+        start_date=date(2024, 1, 1),
+        end_date=date(2024, 1, 20),
+        tenant=test_tenant,
+        db=db_session
+    )
+
+    assert result.total_sessions == 2
+    assert result.total_messages == 2
+    assert result.total_tokens_in == 20
+    assert result.total_tokens_out == 40
+    assert result.total_cost_usd == Decimal("0.003")
+    assert set(result.breakdown_by_provider) == {"vendorA", "vendorB"}
+    assert result.breakdown_by_provider["vendorB"].sessions == 1
+    assert result.breakdown_by_provider["vendorB"].cost_usd == Decimal("0.002")
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_usage_analytics_empty_range(db_session: AsyncSession, test_tenant: Tenant):
+    """Test an empty range returns zero totals"""
+    result = await get_usage_analytics(start_date=None, end_date=None, tenant=test_tenant, db=db_session)
+
+    assert result.total_sessions == 0
+    assert result.total_messages == 0
+    assert result.total_cost_usd == 0
+    assert result.breakdown_by_provider == {}
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_usage_analytics_reads_bounded_rows(
+    db_session: AsyncSession,
+    test_tenant: Tenant,
+    test_agent: Agent,
+    monkeypatch
+):
+    """Test long ranges read monthly rollups for whole months and daily ones only at the edges"""
+    day = datetime(2024, 1, 1, 12)
+    while day < datetime(2024, 7, 1):
+        # Deterministic session ids keep the sketch estimate reproducible
+        session = SessionModel(
+            id=uuid.uuid5(uuid.NAMESPACE_OID, day.isoformat()),
+            tenant_id=test_tenant.id,
+            agent_id=test_agent.id,
+            customer_id="analytics-customer",
+            channel="chat",
+            metadata={}
+        )
+        db_session.add(session)
+        await add_event(db_session, test_tenant, test_agent, "vendorA", day, session=session)
+        day += timedelta(days=1)
+
+    merged = []
+
+    def counting(sketches):
+        sketches = list(sketches)
+        merged.append(len(sketches))
+        return count_sessions(sketches)
+
+    monkeypatch.setattr(analytics, "count_sessions", counting)
+
+    result = await get_usage_analytics(
+        start_date=date(2024, 1, 10), end_date=date(2024, 6, 30), tenant=test_tenant, db=db_session
+    )
+    top = await get_top_agents(
+        limit=10, start_date=date(2024, 1, 10), end_date=date(2024, 6, 30), tenant=test_tenant, db=db_session
+    )
+
+    # 173 days in range: Jan 10-31 from daily rows, February-June from monthly rows
+    assert result.total_messages == 173
+    assert top.agents[0].total_tokens == 173 * 30
+    assert abs(result.total_sessions - 173) <= 173 * 0.05
+    assert max(merged) == 22 + 5
+
+    with pytest.raises(BadRequestException):
+        await get_usage_analytics(
+            start_date=date(2020, 1, 1), end_date=date(2024, 6, 30), tenant=test_tenant, db=db_session
+        )
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_rollups_accumulate_per_bucket(
+    db_session: AsyncSession,
+    test_tenant: Tenant,
+    test_agent: Agent
+):
+    """Test events fold into one hourly, daily and monthly row, with sessions counted once"""
+    session = await add_event(db_session, test_tenant, test_agent, "vendorA", datetime(2024, 3, 1, 9, 5))
+    await add_event(db_session, test_tenant, test_agent, "vendorA", datetime(2024, 3, 1, 9, 55), session=session)
+    await add_event(db_session, test_tenant, test_agent, "vendorA", datetime(2024, 3, 1, 14, 0))
+
+    rollups = (await db_session.execute(select(UsageRollup))).scalars().all()
+    by_bucket = {(r.granularity, r.bucket_start): r for r in rollups}
+
+    assert set(by_bucket) == {
+        ("hour", datetime(2024, 3, 1, 9)),
+        ("hour", datetime(2024, 3, 1, 14)),
+        ("day", datetime(2024, 3, 1)),
+        ("month", datetime(2024, 3, 1)),
+    }
+    nine = by_bucket[("hour", datetime(2024, 3, 1, 9))]
+    assert (nine.message_count, nine.tokens_in, nine.tokens_out) == (2, 20, 40)
+    day = by_bucket[("day", datetime(2024, 3, 1))]
+    assert day.message_count == 3
+    assert day.cost_usd == Decimal("0.003")
+    month = by_bucket[("month", datetime(2024, 3, 1))]
+    assert month.message_count == 3
+    assert month.session_sketch == day.session_sketch
+
+    top = await get_top_agents(
+        limit=10, start_date=date(2024, 3, 1), end_date=date(2024, 3, 31), tenant=test_tenant, db=db_session
+    )
+    assert len(top.agents) == 1
+    assert top.agents[0].agent_id == test_agent.id
+    assert top.agents[0].total_sessions == 2
+    assert top.agents[0].total_tokens == 90
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_rebuild_matches_incremental_rollups(
+    db_session: AsyncSession,
+    test_tenant: Tenant,
+    test_agent: Agent
+):
+    """Test rebuilding from raw events reproduces the incrementally maintained rollups"""
+    session = await add_event(db_session, test_tenant, test_agent, "vendorA", datetime(2024, 4, 2, 8))
+    await add_event(db_session, test_tenant, test_agent, "vendorB", datetime(2024, 4, 2, 8, 30), session=session)
+    await add_event(db_session, test_tenant, test_agent, "vendorA", datetime(2024, 4, 3, 10))
+
+    def snapshot(rows):
+        return sorted(
+            (r.granularity, r.bucket_start, r.provider, r.message_count, r.tokens_in, Decimal(r.cost_usd), r.session_sketch)
+            for r in rows
+        )
+
+    incremental = snapshot((await db_session.execute(select(UsageRollup))).scalars().all())
+
+    written = await rebuild_usage_rollups(db_session, date(2024, 4, 1), date(2024, 4, 30), test_tenant.id)
+    await db_session.commit()
+    db_session.expunge_all()
+
+    assert written == len(incremental) == 8
+    assert snapshot((await db_session.execute(select(UsageRollup))).scalars().all()) == incremental
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_usage_timeseries_is_zero_filled(
+    db_session: AsyncSession,
+    test_tenant: Tenant,
+    test_agent: Agent
+):
+    """Test hourly series cover every bucket in range, per provider, and are cached"""
+    analytics.timeseries_cache.clear()
+    await add_event(db_session, test_tenant, test_agent, "vendorA", datetime(2024, 6, 1, 3, 15))
+    await add_event(db_session, test_tenant, test_agent, "vendorB", datetime(2024, 6, 2, 22, 40), cost="0.002000")
+
+    result = await get_usage_timeseries(
+        bucket="hour",
+        group_by="provider",
+        start_date=date(2024, 6, 1),
+        end_date=date(2024, 6, 2),
+        tenant=test_tenant,
+        db=db_session
+    )
+
+    assert len(result.buckets) == 48
+    assert result.buckets[0] == datetime(2024, 6, 1, 0)
+    assert result.buckets[-1] == datetime(2024, 6, 2, 23)
+    series = {s.key: s for s in result.series}
+    assert set(series) == {"vendorA", "vendorB"}
+    assert series["vendorA"].messages[3] == 1
+    assert sum(series["vendorA"].messages) == 1
+    assert series["vendorB"].cost_usd[46] == Decimal("0.002")
+    assert all(len(s.tokens_in) == 48 for s in result.series)
+
+    # Same tenant and range is served from the cache
+    cached = await get_usage_timeseries(
+        bucket="hour",
+        group_by="provider",
+        start_date=date(2024, 6, 1),
+        end_date=date(2024, 6, 2),
+        tenant=test_tenant,
+        db=None
+    )
+    assert cached is result
+
+    by_agent = await get_usage_timeseries(
+        bucket="day",
+        group_by="agent",
+        start_date=date(2024, 5, 31),
+        end_date=date(2024, 6, 2),
+        tenant=test_tenant,
+        db=db_session
+    )
+    assert len(by_agent.series) == 1
+    assert by_agent.series[0].label == test_agent.name
+    assert by_agent.series[0].messages == [0, 1, 1]
@@ -0,0 +1,84 @@
+"""
+Integration tests for the per-session conversation history window
+"""
+import pytest
+from unittest.mock import AsyncMock, patch
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.session import Session as SessionModel
+from app.models.agent import Agent
+from app.models.tenant import Tenant
+from app.services.history import history_cache
+from app.services.message_handler import MessageHandler
+from app.services.request_context import load_request_context
+from app.services.vendors.base import NormalizedResponse
+
+
+async def run_turns(db_session, test_tenant, test_session, messages):
+    """Send messages one by one; return the VendorRequest of each turn"""
+    requests = []
+
+    async def answer(primary_provider, fallback_provider, request):
+        requests.append(request)
+        return NormalizedResponse(
+            text=f"reply {len(requests)}", tokens_in=10, tokens_out=10, latency_ms=5
+        )
+
+    with patch('app.services.message_handler.ResilientVendorCaller') as mock_caller_class:
+        mock_caller_class.return_value.call_with_fallback = AsyncMock(side_effect=answer)
+        for content in messages:
+            context = await load_request_context(db_session, test_tenant, test_session.id, "corr-history")
+            handler = MessageHandler(db_session, context)
+            await handler.handle_message(content)
+    return requests
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_history_grows_incrementally(
+    db_session: AsyncSession,
+    test_tenant: Tenant,
+    test_agent: Agent,
+    test_session: SessionModel
+):
+    """Test each turn sees the earlier turns and the window is reused, not rebuilt"""
+    history_cache.delete(test_session.id)
+
+    requests = await run_turns(db_session, test_tenant, test_session, ["first", "second", "third"])
+
+    assert requests[0].conversation_history == []
+    assert requests[1].conversation_history == [
+        {"role": "user", "content": "first"},
+        {"role": "assistant", "content": "reply 1"},
+    ]
+    assert [turn["content"] for turn in requests[2].conversation_history] == [
+        "first", "reply 1", "second", "reply 2"
+    ]
+    assert requests[2].user_message == "third"
+    # Token counts are cached per message: 2 tokens each for the four entries
+    assert history_cache.get(test_session.id).total_tokens == 8
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_history_is_trimmed_to_agent_budget(
+    db_session: AsyncSession,
+    test_tenant: Tenant,
+    test_agent: Agent,
+    test_session: SessionModel
+):
+    """Test the oldest turns are dropped once the agent's token budget is exceeded"""
+    test_agent.config = {"history": {"max_tokens": 25}}
+    await db_session.commit()
+    history_cache.delete(test_session.id)
+
+    long_message = "x" * 80  # 20 tokens
+    requests = await run_turns(
+        db_session, test_tenant, test_session, [long_message, "short", "last"]
+    )
+
+    # 20 + 2 tokens fit; adding "short" + "reply 2" (2 each) pushes the first message out
+    assert [turn["content"] for turn in requests[1].conversation_history] == [long_message, "reply 1"]
+    assert [turn["content"] for turn in requests[2].conversation_history] == [
+        "reply 1", "short", "reply 2"
+    ]
@@ -0,0 +1,61 @@
+"""
+Integration tests for the database idempotency store
+"""
+import pytest
+from unittest.mock import patch
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.idempotency import IdempotencyKey
+from app.models.session import Session as SessionModel
+from app.models.tenant import Tenant
+from app.services.idempotency import IdempotencyService
+from app.services.message_handler import MessageHandler
+from app.services.request_context import load_request_context
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_undecodable_response_is_dropped(db_session: AsyncSession, test_tenant: Tenant):
+    """Test a row written with a codec this process lacks is a miss, not an error"""
+    now = datetime.utcnow()
+    db_session.add(IdempotencyKey(
+        key="other-codec", tenant_id=test_tenant.id, response=b"\x7fdata",
+        created_at=now, expires_at=now + timedelta(hours=1)
+    ))
+    await db_session.commit()
+
+    store = IdempotencyService(db_session, test_tenant.id)
+    assert await store.claim("other-codec") is None
+
+    # The turn then stores its own response under the same key
+    await store.cache_response("other-codec", b'{"ok":true}')
+    assert await store.claim("other-codec") == b'{"ok":true}'
+    rows = (await db_session.execute(select(IdempotencyKey))).scalars().all()
+    assert len(rows) == 1
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_claim_waits_without_holding_a_connection(
+    db_session: AsyncSession,
+    test_tenant: Tenant,
+    test_session: SessionModel
+):
+    """Test the context's read transaction is over (connection returned) before a claim can wait"""
+    context = await load_request_context(db_session, test_tenant, test_session.id, "corr-claim")
+    assert db_session.in_transaction()
+
+    seen = {}
+
+    class WaitingStore:
+        async def claim(self, key):
+            seen["in_transaction"] = db_session.in_transaction()
+            return b'{"replayed":true}'
+
+    with patch("app.services.message_handler.get_idempotency_store", return_value=WaitingStore()):
+        handler = MessageHandler(db_session, context)
+        assert await handler.handle_message("hi", "dup-key", raw_replay=True) == b'{"replayed":true}'
+
+    assert seen == {"in_transaction": False}
@@ -0,0 +1,56 @@
+"""
+Integration tests for the expired idempotency key sweeper
+"""
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models.idempotency import IdempotencyKey
+from app.models.tenant import Tenant
+from app.services import idempotency_sweeper as sweeper_module
+from app.services.idempotency_sweeper import IdempotencySweeper
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_sweeper_deletes_expired_keys_in_batches(
+    db_session: AsyncSession,
+    test_tenant: Tenant,
+    test_engine,
+    monkeypatch
+):
+    """Test expired keys are removed in bounded batches, live keys are kept and counters move"""
+    monkeypatch.setattr(
+        sweeper_module, "AsyncSessionLocal",
+        async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+    )
+
+    now = datetime.utcnow()
+    for i in range(7):
+        db_session.add(IdempotencyKey(
+            key=f"expired-{i}", tenant_id=test_tenant.id, response=b"{}",
+            created_at=now - timedelta(days=2), expires_at=now - timedelta(hours=1, minutes=i)
+        ))
+    db_session.add(IdempotencyKey(
+        key="live", tenant_id=test_tenant.id, response=b"{}",
+        created_at=now, expires_at=now + timedelta(hours=1)
+    ))
+    await db_session.commit()
+
+    sweeper = IdempotencySweeper(batch_size=3, max_batches=2)
+
+    # Capped at two batches per run; the remainder waits for the next run
+    assert await sweeper.run_once() == 6
+    assert sweeper.last_batches == 2
+    assert await sweeper.run_once() == 1
+    assert sweeper.last_batches == 1
+
+    remaining = (await db_session.execute(select(IdempotencyKey.key))).scalars().all()
+    assert remaining == ["live"]
+
+    stats = sweeper.snapshot()
+    assert stats["runs"] == 2
+    assert stats["total_deleted"] == 7
+    assert stats["failed_runs"] == 0
+    assert stats["last_duration_ms"] >= 0
@@ -0,0 +1,47 @@
+"""
+Integration tests for the database invoice backend
+"""
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.services.invoices.database import DatabaseInvoiceBackend
+from app.services.invoices.demo import DEMO_INVOICES
+from app.services.tools.result_cache import tool_cache_key, tool_result_cache
+
+
+@pytest.fixture
+async def backend(test_engine):
+    backend = DatabaseInvoiceBackend(async_sessionmaker(test_engine, expire_on_commit=False))
+    for company_key, invoices in DEMO_INVOICES.items():
+        await backend.bulk_load(company_key, invoices.values())
+    return backend
+
+
+@pytest.mark.asyncio
+async def test_lookups(backend):
+    """Test id, customer and status lookups stay within the company"""
+    assert await backend.get("techcorp", "INV-TC-001") == DEMO_INVOICES["techcorp"]["INV-TC-001"]
+    assert await backend.get("healthfirst", "INV-TC-001") is None
+
+    found = await backend.by_customer("techcorp", "acme solutions inc")
+    assert [invoice["id"] for invoice in found] == ["INV-TC-001"]
+
+    pending = await backend.by_status("healthfirst", "pending")
+    assert sorted(invoice["id"] for invoice in pending) == ["INV-HF-002", "INV-HF-005"]
+
+    assert await backend.invoice_ids("healthfirst", limit=3) == ["INV-HF-001", "INV-HF-002", "INV-HF-003"]
+    assert await backend.invoice_ids("unknown") == []
+
+
+@pytest.mark.asyncio
+async def test_bulk_load_upserts(backend):
+    """Test reloading an existing id updates it in place and drops cached lookups"""
+    cache_key = tool_cache_key("techcorp", "invoice_lookup", {"invoice_id": "INV-TC-002"})
+    tool_result_cache.set(cache_key, {"success": True})
+
+    paid = dict(DEMO_INVOICES["techcorp"]["INV-TC-002"], status="paid", payment_date="2025-01-30")
+    assert await backend.bulk_load("techcorp", [paid]) == 1
+    assert tool_result_cache.delete(cache_key) is False
+
+    assert await backend.get("techcorp", "INV-TC-002") == paid
+    assert len(await backend.invoice_ids("techcorp", limit=50)) == 6
@@ -11,13 +11,16 @@ import pytest
 import uuid
 from decimal import Decimal
 from unittest.mock import AsyncMock, MagicMock, patch
-from sqlalchemy.orm import Session
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.session import Session as SessionModel, Message
 from app.models.agent import Agent
 from app.models.tenant import Tenant
-from app.models.usage import UsageEvent
+from app.models.usage import UsageEvent, UsageRollup
 from app.services.message_handler import MessageHandler
+from app.services.request_context import load_request_context
+from app.services.billing import rollups
 from app.services.billing.metering import calculate_cost, create_usage_event
 from app.services.vendors.base import NormalizedResponse
 
@@ -25,7 +28,7 @@ from app.services.vendors.base import NormalizedResponse
 @pytest.mark.integration
 @pytest.mark.asyncio
 async def test_message_creates_usage_event(
-    db_session: Session,
+    db_session: AsyncSession,
     test_tenant: Tenant,
     test_agent: Agent,
     test_session: SessionModel
@@ -55,12 +58,8 @@ async def test_message_creates_usage_event(
         mock_caller_class.return_value = mock_caller
 
         # Create message handler
-        handler = MessageHandler(
-            db=db_session,
-            tenant_id=test_tenant.id,
-            session=test_session,
-            correlation_id="test-correlation-001"
-        )
+        context = await load_request_context(db_session, test_tenant, test_session.id, "test-correlation-001")
+        handler = MessageHandler(db_session, context)
 
         # Send message
         user_content = "Hello, test message!"
@@ -74,18 +73,18 @@ async def test_message_creates_usage_event(
         assert response.content == mock_vendor_response.text
 
         # Verify user message was created in database
-        user_messages = db_session.query(Message).filter(
+        user_messages = (await db_session.execute(select(Message).where(
             Message.session_id == test_session.id,
             Message.role == "user"
-        ).all()
+        ))).scalars().all()
         assert len(user_messages) == 1
         assert user_messages[0].content == user_content
 
         # Verify assistant message was created in database
-        assistant_messages = db_session.query(Message).filter(
+        assistant_messages = (await db_session.execute(select(Message).where(
             Message.session_id == test_session.id,
             Message.role == "assistant"
-        ).all()
+        ))).scalars().all()
         assert len(assistant_messages) == 1
         assert assistant_messages[0].content == mock_vendor_response.text
         assert assistant_messages[0].tokens_in == 50
@@ -93,9 +92,9 @@ async def test_message_creates_usage_event(
         assert assistant_messages[0].provider_used == "vendorA"
 
         # Verify usage event was created with correct billing
-        usage_events = db_session.query(UsageEvent).filter(
+        usage_events = (await db_session.execute(select(UsageEvent).where(
             UsageEvent.session_id == test_session.id
-        ).all()
+        ))).scalars().all()
         assert len(usage_events) == 1
 
         usage_event = usage_events[0]
@@ -112,6 +111,7 @@ async def test_message_creates_usage_event(
         expected_cost = calculate_cost("vendorA", tokens_in=50, tokens_out=120)
         assert usage_event.cost_usd == expected_cost
         assert usage_event.cost_usd == Decimal("0.000340")
+        assert assistant_messages[0].cost_usd == usage_event.cost_usd
 
         # Verify event type
         assert usage_event.event_type == "message"
@@ -120,7 +120,7 @@ async def test_message_creates_usage_event(
 @pytest.mark.integration
 @pytest.mark.asyncio
 async def test_idempotency_prevents_double_billing(
-    db_session: Session,
+    db_session: AsyncSession,
     test_tenant: Tenant,
     test_agent: Agent,
     test_session: SessionModel
@@ -151,12 +151,8 @@ async def test_idempotency_prevents_double_billing(
         mock_caller.call_with_fallback = AsyncMock(return_value=mock_vendor_response)
         mock_caller_class.return_value = mock_caller
 
-        handler = MessageHandler(
-            db=db_session,
-            tenant_id=test_tenant.id,
-            session=test_session,
-            correlation_id="test-correlation-002"
-        )
+        context = await load_request_context(db_session, test_tenant, test_session.id, "test-correlation-002")
+        handler = MessageHandler(db_session, context)
 
         # First request - should create new message and billing event
         response1 = await handler.handle_message(
@@ -168,9 +164,9 @@ async def test_idempotency_prevents_double_billing(
         assert response1.content == mock_vendor_response.text
 
         # Verify first usage event created
-        usage_events_after_first = db_session.query(UsageEvent).filter(
+        usage_events_after_first = (await db_session.execute(select(UsageEvent).where(
             UsageEvent.session_id == test_session.id
-        ).all()
+        ))).scalars().all()
         assert len(usage_events_after_first) == 1
         first_event = usage_events_after_first[0]
         # Provider comes from agent's primary_provider
@@ -181,9 +177,9 @@ async def test_idempotency_prevents_double_billing(
         assert first_event.cost_usd == expected_cost
 
         # Count messages before second request
-        messages_after_first = db_session.query(Message).filter(
+        messages_after_first = (await db_session.execute(select(func.count()).select_from(Message).where(
             Message.session_id == test_session.id
-        ).count()
+        ))).scalar()
 
         # Second request with SAME idempotency key - should return cached response
         response2 = await handler.handle_message(
@@ -198,15 +194,15 @@ async def test_idempotency_prevents_double_billing(
         assert response2.tokens_out == response1.tokens_out
 
         # Verify NO new usage event created (still only 1)
-        usage_events_after_second = db_session.query(UsageEvent).filter(
+        usage_events_after_second = (await db_session.execute(select(UsageEvent).where(
             UsageEvent.session_id == test_session.id
-        ).all()
+        ))).scalars().all()
         assert len(usage_events_after_second) == 1  # Still only 1!
 
         # Verify NO new messages created (idempotent request should skip processing)
-        messages_after_second = db_session.query(Message).filter(
+        messages_after_second = (await db_session.execute(select(func.count()).select_from(Message).where(
             Message.session_id == test_session.id
-        ).count()
+        ))).scalar()
         assert messages_after_second == messages_after_first  # Same count
 
         # Verify the vendor was NOT called second time (cached response used)
@@ -217,7 +213,7 @@ async def test_idempotency_prevents_double_billing(
 @pytest.mark.integration
 @pytest.mark.asyncio
 async def test_different_providers_different_costs(
-    db_session: Session,
+    db_session: AsyncSession,
     test_tenant: Tenant
 ):
     """
@@ -238,8 +234,8 @@ async def test_different_providers_different_costs(
         enabled_tools=[]
     )
     db_session.add(agent_a)
-    db_session.commit()
-    db_session.refresh(agent_a)
+    await db_session.commit()
+    await db_session.refresh(agent_a)
 
     session_a = SessionModel(
         id=uuid.uuid4(),
@@ -250,8 +246,8 @@ async def test_different_providers_different_costs(
         metadata={}
     )
     db_session.add(session_a)
-    db_session.commit()
-    db_session.refresh(session_a)
+    await db_session.commit()
+    await db_session.refresh(session_a)
 
     # Test VendorA pricing ($0.002 per 1K tokens)
     mock_vendor_a_response = NormalizedResponse(
@@ -266,12 +262,8 @@ async def test_different_providers_different_costs(
         mock_caller.call_with_fallback = AsyncMock(return_value=mock_vendor_a_response)
         mock_caller_class.return_value = mock_caller
 
-        handler = MessageHandler(
-            db=db_session,
-            tenant_id=test_tenant.id,
-            session=session_a,
-            correlation_id="test-correlation-003"
-        )
+        context = await load_request_context(db_session, test_tenant, session_a.id, "test-correlation-003")
+        handler = MessageHandler(db_session, context)
 
         await handler.handle_message(
             user_message="Test VendorA pricing",
@@ -280,9 +272,9 @@ async def test_different_providers_different_costs(
 
         # Verify VendorA cost
         # (1000 + 1000) / 1000 * 0.002 = 0.004
-        vendor_a_events = db_session.query(UsageEvent).filter(
+        vendor_a_events = (await db_session.execute(select(UsageEvent).where(
             UsageEvent.provider == "vendorA"
-        ).all()
+        ))).scalars().all()
         assert len(vendor_a_events) == 1
         assert vendor_a_events[0].cost_usd == Decimal("0.004000")
 
@@ -297,8 +289,8 @@ async def test_different_providers_different_costs(
         enabled_tools=[]
     )
     db_session.add(agent_b)
-    db_session.commit()
-    db_session.refresh(agent_b)
+    await db_session.commit()
+    await db_session.refresh(agent_b)
 
     session_b = SessionModel(
         id=uuid.uuid4(),
@@ -309,8 +301,8 @@ async def test_different_providers_different_costs(
         metadata={}
     )
     db_session.add(session_b)
-    db_session.commit()
-    db_session.refresh(session_b)
+    await db_session.commit()
+    await db_session.refresh(session_b)
 
     # Test VendorB pricing ($0.003 per 1K tokens)
     mock_vendor_b_response = NormalizedResponse(
@@ -325,12 +317,8 @@ async def test_different_providers_different_costs(
         mock_caller.call_with_fallback = AsyncMock(return_value=mock_vendor_b_response)
         mock_caller_class.return_value = mock_caller
 
-        handler_b = MessageHandler(
-            db=db_session,
-            tenant_id=test_tenant.id,
-            session=session_b,
-            correlation_id="test-correlation-004"
-        )
+        context = await load_request_context(db_session, test_tenant, session_b.id, "test-correlation-004")
+        handler_b = MessageHandler(db_session, context)
 
         await handler_b.handle_message(
             user_message="Test VendorB pricing",
@@ -339,9 +327,9 @@ async def test_different_providers_different_costs(
 
         # Verify VendorB cost
         # (1000 + 1000) / 1000 * 0.003 = 0.006
-        vendor_b_events = db_session.query(UsageEvent).filter(
+        vendor_b_events = (await db_session.execute(select(UsageEvent).where(
             UsageEvent.provider == "vendorB"
-        ).all()
+        ))).scalars().all()
         assert len(vendor_b_events) == 1
         assert vendor_b_events[0].cost_usd == Decimal("0.006000")
 
@@ -352,8 +340,9 @@ async def test_different_providers_different_costs(
 
 
 @pytest.mark.integration
-def test_usage_event_direct_creation(
-    db_session: Session,
+@pytest.mark.asyncio
+async def test_usage_event_direct_creation(
+    db_session: AsyncSession,
     test_tenant: Tenant,
     test_agent: Agent,
     test_session: SessionModel
@@ -366,7 +355,7 @@ def test_usage_event_direct_creation(
     """
 
     # Create usage event directly
-    usage_event = create_usage_event(
+    usage_event = await create_usage_event(
         db=db_session,
         tenant_id=test_tenant.id,
         agent_id=test_agent.id,
@@ -388,6 +377,7 @@ def test_usage_event_direct_creation(
     assert usage_event.tokens_out == 300
     assert usage_event.event_type == "test_direct"
     assert usage_event.metadata == {"test": "direct_creation"}
+    assert usage_event.usage_metadata == {"test": "direct_creation"}
 
     # Verify cost calculation
     # (500 + 300) / 1000 * 0.002 = 0.001600
@@ -395,16 +385,17 @@ def test_usage_event_direct_creation(
     assert usage_event.cost_usd == expected_cost
 
     # Verify it's actually in the database
-    db_event = db_session.query(UsageEvent).filter(
+    db_event = (await db_session.execute(select(UsageEvent).where(
         UsageEvent.id == usage_event.id
-    ).first()
+    ))).scalars().first()
     assert db_event is not None
     assert db_event.cost_usd == expected_cost
 
 
 @pytest.mark.integration
-def test_cost_calculation_precision(
-    db_session: Session,
+@pytest.mark.asyncio
+async def test_cost_calculation_precision(
+    db_session: AsyncSession,
     test_tenant: Tenant,
     test_agent: Agent,
     test_session: SessionModel
@@ -417,7 +408,7 @@ def test_cost_calculation_precision(
     """
 
     # Test case with fractional result
-    usage_event = create_usage_event(
+    usage_event = await create_usage_event(
         db=db_session,
         tenant_id=test_tenant.id,
         agent_id=test_agent.id,
@@ -433,10 +424,73 @@ def test_cost_calculation_precision(
     assert usage_event.cost_usd == expected_cost
 
     # Verify precision is maintained in database
-    db_event = db_session.query(UsageEvent).filter(
+    db_event = (await db_session.execute(select(UsageEvent).where(
         UsageEvent.id == usage_event.id
-    ).first()
+    ))).scalars().first()
 
     # Convert to string to verify exact decimal places
     cost_str = str(db_event.cost_usd)
     assert cost_str == "0.001158"
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_message_turn_is_single_transaction(
+    db_session: AsyncSession,
+    test_tenant: Tenant,
+    test_agent: Agent,
+    test_session: SessionModel
+):
+    """
+    Integration test: A chat turn writes all of its rows in one commit
+
+    The only other commits allowed end read-only transactions: before
+    the idempotency claim (which may wait) and before the vendor call.
+    """
+    mock_vendor_response = NormalizedResponse(
+        text="Single transaction response.",
+        tokens_in=40,
+        tokens_out=60,
+        latency_ms=150
+    )
+
+    with patch('app.services.message_handler.ResilientVendorCaller') as mock_caller_class:
+        mock_caller = AsyncMock()
+        mock_caller.call_with_fallback = AsyncMock(return_value=mock_vendor_response)
+        mock_caller_class.return_value = mock_caller
+
+        context = await load_request_context(db_session, test_tenant, test_session.id, "test-correlation-005")
+        handler = MessageHandler(db_session, context)
+
+        with patch.object(db_session, "commit", wraps=db_session.commit) as commit_spy, \
+                patch.object(db_session, "refresh", wraps=db_session.refresh) as refresh_spy, \
+                patch.object(rollups, "record_usage_rollup", wraps=rollups.record_usage_rollup) as rollup_spy:
+            response = await handler.handle_message(
+                user_message="One transaction please",
+                idempotency_key="test-single-transaction-key"
+            )
+
+        assert commit_spy.call_count == 3
+        assert refresh_spy.call_count == 0
+        # Rollups are folded after the turn, outside its transaction
+        assert rollup_spy.call_count == 1
+        assert rollup_spy.call_args.args[0] is not db_session
+
+    # Everything from the turn is persisted, with client-side ids
+    messages = (await db_session.execute(select(Message).where(
+        Message.session_id == test_session.id
+    ))).scalars().all()
+    assert len(messages) == 2
+    assert response.id in {m.id for m in messages}
+
+    usage_event = (await db_session.execute(select(UsageEvent).where(
+        UsageEvent.session_id == test_session.id
+    ))).scalars().first()
+    assert usage_event.message_id == response.id
+    assert response.cost_usd == usage_event.cost_usd
+
+    day = (await db_session.execute(select(UsageRollup).where(
+        UsageRollup.agent_id == test_agent.id, UsageRollup.granularity == "day"
+    ))).scalar_one()
+    assert day.message_count == 1
+    assert day.cost_usd == usage_event.cost_usd
@@ -0,0 +1,108 @@
+"""
+Integration test for streamed chat turns
+
+Deltas are relayed as they arrive; the assistant message and usage event
+are written only once the stream has ended.
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.session import Session as SessionModel, Message
+from app.models.agent import Agent
+from app.models.tenant import Tenant
+from app.models.usage import UsageEvent
+from app.services.message_handler import MessageHandler
+from app.services.request_context import load_request_context
+from app.services.vendors.base import StreamChunk
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_streamed_message_persisted_when_stream_ends(
+    db_session: AsyncSession,
+    test_tenant: Tenant,
+    test_agent: Agent,
+    test_session: SessionModel
+):
+    """
+    Integration test: A streamed turn relays deltas, then bills the vendor that answered
+    """
+    async def fake_stream(**kwargs):
+        yield StreamChunk(text="Hello")
+        yield StreamChunk(text=", world")
+        yield StreamChunk(done=True, tokens_in=1000, tokens_out=1000, provider="vendorB")
+
+    async def assistant_count() -> int:
+        return len((await db_session.execute(select(Message).where(
+            Message.session_id == test_session.id,
+            Message.role == "assistant"
+        ))).scalars().all())
+
+    with patch('app.services.message_handler.ResilientVendorCaller') as mock_caller_class:
+        mock_caller = MagicMock()
+        mock_caller.stream_with_fallback = fake_stream
+        mock_caller_class.return_value = mock_caller
+
+        context = await load_request_context(db_session, test_tenant, test_session.id, "test-correlation-stream")
+        handler = MessageHandler(db_session, context)
+
+        events = []
+        async for event, data in handler.stream_message("Stream please"):
+            if event == "delta" and not events:
+                # Nothing is written while tokens are still arriving
+                assert await assistant_count() == 0
+            events.append((event, data))
+
+    assert [data["text"] for event, data in events if event == "delta"] == ["Hello", ", world"]
+    event, response = events[-1]
+    assert event == "message"
+    assert response.content == "Hello, world"
+    assert response.provider_used == "vendorB"
+
+    assert await assistant_count() == 1
+    usage_event = (await db_session.execute(select(UsageEvent).where(
+        UsageEvent.session_id == test_session.id
+    ))).scalars().one()
+    assert usage_event.message_id == response.id
+    assert usage_event.provider == "vendorB"
+    assert response.cost_usd == usage_event.cost_usd
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_long_stream_keeps_its_idempotency_claim(
+    db_session: AsyncSession,
+    test_tenant: Tenant,
+    test_session: SessionModel,
+    monkeypatch
+):
+    """Test a stream outlasting the claim TTL refreshes the claim while relaying"""
+    monkeypatch.setattr(settings, "IDEMPOTENCY_LOCK_TTL_SECONDS", 0.03)
+
+    async def slow_stream(**kwargs):
+        for text in ("one", "two", "three"):
+            await asyncio.sleep(0.02)
+            yield StreamChunk(text=text)
+        yield StreamChunk(done=True, tokens_in=1, tokens_out=1, provider="vendorA")
+
+    store = MagicMock(writes_in_transaction=False)
+    store.claim = AsyncMock(return_value=None)
+    store.refresh = AsyncMock()
+    store.cache_response = AsyncMock()
+
+    with patch('app.services.message_handler.ResilientVendorCaller') as mock_caller_class, \
+            patch('app.services.message_handler.get_idempotency_store', return_value=store):
+        mock_caller_class.return_value.stream_with_fallback = slow_stream
+
+        context = await load_request_context(db_session, test_tenant, test_session.id, "test-correlation-long")
+        handler = MessageHandler(db_session, context)
+        events = [event async for event, _ in handler.stream_message("Stream slowly", idempotency_key="long-key")]
+
+    assert events[-1] == "message"
+    assert store.refresh.await_count >= 2
+    store.refresh.assert_awaited_with("long-key")
+    store.cache_response.assert_awaited_once()
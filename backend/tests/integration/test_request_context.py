@@ -0,0 +1,45 @@
+"""
+Integration tests for loading the request context
+"""
+import pytest
+import uuid
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.middleware.auth import generate_api_key
+from app.models.agent import Agent
+from app.models.session import Session as SessionModel
+from app.models.tenant import Tenant
+from app.services.request_context import load_request_context
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_session_is_loaded_with_its_agent(
+    db_session: AsyncSession,
+    test_tenant: Tenant,
+    test_agent: Agent,
+    test_session: SessionModel
+):
+    """Test the context carries the request's tenant and the session's agent"""
+    context = await load_request_context(db_session, test_tenant, test_session.id, "corr-context")
+
+    assert context.tenant is test_tenant
+    assert context.session_id == test_session.id
+    assert context.agent_id == test_agent.id
+    assert context.company_key == "test-corp"
+    assert context.correlation_id == "corr-context"
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_other_tenants_sessions_are_not_found(
+    db_session: AsyncSession,
+    test_session: SessionModel
+):
+    """Test a session id of another tenant yields no context"""
+    other = Tenant(id=uuid.uuid4(), name="Other", company_key="other", api_key=generate_api_key())
+    db_session.add(other)
+    await db_session.commit()
+
+    assert await load_request_context(db_session, other, test_session.id, None) is None
+    assert await load_request_context(db_session, other, uuid.uuid4(), None) is None
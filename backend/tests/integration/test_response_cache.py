@@ -0,0 +1,107 @@
+"""
+Integration tests for the opt-in exact-match response cache
+"""
+import pytest
+from decimal import Decimal
+from unittest.mock import AsyncMock, patch
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.session import Session as SessionModel
+from app.models.agent import Agent
+from app.models.tenant import Tenant
+from app.models.usage import UsageEvent
+from app.services import message_handler
+from app.services.message_handler import MessageHandler
+from app.services.request_context import load_request_context
+from app.services.response_cache import ResponseCache, normalize_message
+from app.services.vendors.base import NormalizedResponse
+
+
+class DictRedis:
+    """GET/SET EX on a dict"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+        return True
+
+
+async def send(db_session, tenant, session, content, vendor):
+    with patch('app.services.message_handler.ResilientVendorCaller') as mock_caller_class:
+        mock_caller_class.return_value.call_with_fallback = vendor
+        context = await load_request_context(db_session, tenant, session.id, "corr-cache")
+        handler = MessageHandler(db_session, context)
+        return await handler.handle_message(content)
+
+
+@pytest.fixture
+async def caching_agent(db_session: AsyncSession, test_agent: Agent):
+    test_agent.config = {"response_cache": {"enabled": True}, "history": {"max_tokens": 0}}
+    await db_session.commit()
+    return test_agent
+
+
+def test_normalize_message():
+    """Test case, whitespace and edge punctuation do not change the key"""
+    assert normalize_message("  What are your\n HOURS?? ") == normalize_message("what are your hours")
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_repeat_question_is_served_from_cache(
+    db_session: AsyncSession,
+    test_tenant: Tenant,
+    caching_agent: Agent,
+    test_session: SessionModel,
+    monkeypatch
+):
+    """Test a repeated question skips the vendor and is billed as a zero-cost cache_hit"""
+    redis = DictRedis()
+    monkeypatch.setattr(message_handler, "response_cache", ResponseCache(10, 60, redis=redis))
+    vendor = AsyncMock(return_value=NormalizedResponse(
+        text="We are open 9-5.", tokens_in=40, tokens_out=8, latency_ms=300
+    ))
+
+    first = await send(db_session, test_tenant, test_session, "What are your hours?", vendor)
+    second = await send(db_session, test_tenant, test_session, "what are your   hours", vendor)
+
+    assert vendor.await_count == 1
+    assert second.content == first.content
+    assert second.cost_usd == Decimal("0")
+
+    events = (await db_session.execute(
+        select(UsageEvent).where(UsageEvent.session_id == test_session.id).order_by(UsageEvent.created_at)
+    )).scalars().all()
+    assert [e.event_type for e in events] == ["message", "cache_hit"]
+    assert events[1].cost_usd == Decimal("0")
+    assert events[1].usage_metadata == {"cached_tokens_in": 40, "cached_tokens_out": 8}
+
+    # Another worker (empty in-process tier) is answered from Redis
+    monkeypatch.setattr(message_handler, "response_cache", ResponseCache(10, 60, redis=redis))
+    await send(db_session, test_tenant, test_session, "What are your hours", vendor)
+    assert vendor.await_count == 1
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_agents_without_opt_in_always_call_vendor(
+    db_session: AsyncSession,
+    test_tenant: Tenant,
+    test_agent: Agent,
+    test_session: SessionModel,
+    monkeypatch
+):
+    """Test the cache is bypassed unless the agent enables it"""
+    monkeypatch.setattr(message_handler, "response_cache", ResponseCache(10, 60, redis=DictRedis()))
+    vendor = AsyncMock(return_value=NormalizedResponse(text="hi", tokens_in=1, tokens_out=1, latency_ms=1))
+
+    await send(db_session, test_tenant, test_session, "hello", vendor)
+    await send(db_session, test_tenant, test_session, "hello", vendor)
+
+    assert vendor.await_count == 2
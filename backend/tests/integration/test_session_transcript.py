@@ -0,0 +1,147 @@
+"""
+Integration tests for the paginated session transcript and conditional GETs
+"""
+import pytest
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+from fastapi import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.agents import list_agents
+from app.api.sessions import get_session
+from app.models.agent import Agent
+from app.middleware.error_handler import BadRequestException
+from app.models.session import Session as SessionModel, Message
+from app.models.tenant import Tenant
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_transcript_pages_follow_keyset_cursor(
+    db_session: AsyncSession,
+    test_tenant: Tenant,
+    test_session: SessionModel
+):
+    """Test pages cover every message once, in order, including created_at ties"""
+    base = datetime(2024, 1, 1, 12)
+    timestamps = [base, base, base + timedelta(seconds=1), base + timedelta(seconds=1), base + timedelta(seconds=2)]
+    for i, created_at in enumerate(timestamps):
+        db_session.add(Message(
+            id=uuid.uuid4(),
+            session_id=test_session.id,
+            role="assistant" if i % 2 else "user",
+            content=f"message {i}",
+            cost_usd=Decimal("0.001234") if i % 2 else None,
+            tools_called=[],
+            created_at=created_at
+        ))
+    await db_session.commit()
+
+    pages = []
+    after = None
+    while True:
+        page = await get_session(test_session.id, Response(), limit=2, after=after, if_none_match=None, tenant=test_tenant, db=db_session)
+        pages.append(page.messages)
+        after = page.next_cursor
+        if after is None:
+            break
+
+    assert [len(p) for p in pages] == [2, 2, 1]
+    messages = [m for p in pages for m in p]
+    assert len({m.id for m in messages}) == 5
+    assert [(m.created_at, m.id) for m in messages] == sorted((m.created_at, m.id) for m in messages)
+    assert sorted(m.content for m in messages) == [f"message {i}" for i in range(5)]
+    assert {m.cost_usd for m in messages} == {Decimal("0.001234"), Decimal("0")}
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_invalid_cursor_is_rejected(
+    db_session: AsyncSession,
+    test_tenant: Tenant,
+    test_session: SessionModel
+):
+    """Test a malformed cursor is a 400, not a server error"""
+    with pytest.raises(BadRequestException):
+        await get_session(test_session.id, Response(), limit=10, after="not-a-cursor", if_none_match=None, tenant=test_tenant, db=db_session)
+
+
+async def add_message(db, session, content):
+    db.add(Message(
+        id=uuid.uuid4(),
+        session_id=session.id,
+        role="user",
+        content=content,
+        tools_called=[],
+        created_at=datetime.utcnow()
+    ))
+    await db.commit()
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_session_etag_revalidation(
+    db_session: AsyncSession,
+    test_tenant: Tenant,
+    test_session: SessionModel
+):
+    """Test If-None-Match gets a 304 until a new message changes the ETag"""
+    await add_message(db_session, test_session, "hello")
+
+    first = Response()
+    await get_session(test_session.id, first, limit=100, after=None, if_none_match=None, tenant=test_tenant, db=db_session)
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"')
+
+    unchanged = await get_session(
+        test_session.id, Response(), limit=100, after=None, if_none_match=etag, tenant=test_tenant, db=db_session
+    )
+    assert unchanged.status_code == 304
+    assert unchanged.headers["ETag"] == etag
+
+    # Different page parameters are a different representation
+    other_page = Response()
+    await get_session(
+        test_session.id, other_page, limit=10, after=None, if_none_match=etag, tenant=test_tenant, db=db_session
+    )
+    assert other_page.headers["ETag"] != etag
+
+    await add_message(db_session, test_session, "are you there?")
+    changed = Response()
+    page = await get_session(
+        test_session.id, changed, limit=100, after=None, if_none_match=etag, tenant=test_tenant, db=db_session
+    )
+    assert len(page.messages) == 2
+    assert changed.headers["ETag"] != etag
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_agent_list_etag_tracks_changes(
+    db_session: AsyncSession,
+    test_tenant: Tenant,
+    test_agent: Agent
+):
+    """Test the agent list revalidates to 304 and changes when an agent is added"""
+    first = Response()
+    await list_agents(first, if_none_match=None, tenant=test_tenant, db=db_session)
+    etag = first.headers["ETag"]
+
+    unchanged = await list_agents(Response(), if_none_match=f'"other", {etag}', tenant=test_tenant, db=db_session)
+    assert unchanged.status_code == 304
+
+    db_session.add(Agent(
+        id=uuid.uuid4(),
+        tenant_id=test_tenant.id,
+        name="Second Agent",
+        primary_provider="vendorB",
+        system_prompt="Second",
+        enabled_tools=[]
+    ))
+    await db_session.commit()
+
+    changed = Response()
+    agents = await list_agents(changed, if_none_match=etag, tenant=test_tenant, db=db_session)
+    assert len(agents) == 2
+    assert changed.headers["ETag"] != etag
@@ -0,0 +1,59 @@
+"""
+Integration test for the voice message flow's transaction handling
+"""
+import io
+import pytest
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import patch
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.session import Session as SessionModel
+from app.models.tenant import Tenant
+from app.models.voice import VoiceArtifact
+from app.schemas.session import MessageResponse
+from app.services.request_context import load_request_context
+from app.services.voice.handler import VoiceMessageHandler
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_no_transaction_is_held_during_stt_or_tts(
+    db_session: AsyncSession,
+    test_tenant: Tenant,
+    test_session: SessionModel
+):
+    """Test STT and TTS run with no open transaction and the artifacts are written afterwards"""
+    seen = {}
+
+    async def transcribe(audio_file, filename):
+        seen["stt"] = db_session.in_transaction()
+        return {"text": "Where is my invoice?", "latency_ms": 5, "duration": 1.0, "language": "en"}
+
+    async def synthesize(text):
+        seen["tts"] = db_session.in_transaction()
+        return {"audio_data": b"ID3audio", "latency_ms": 7}
+
+    async def handle_message(self, user_message, idempotency_key=None):
+        # A replayed response leaves the idempotency read open
+        await db_session.execute(select(VoiceArtifact.id))
+        return MessageResponse(
+            id=uuid.uuid4(), session_id=test_session.id, role="assistant", content="It is paid.",
+            provider_used="vendorA", tokens_in=1, tokens_out=1, latency_ms=3, tools_called=[],
+            correlation_id="test-correlation-voice", cost_usd=Decimal("0.000010"), created_at=datetime.utcnow()
+        )
+
+    context = await load_request_context(db_session, test_tenant, test_session.id, "test-correlation-voice")
+    assert db_session.in_transaction()
+
+    with patch("app.services.voice.handler.stt_service.transcribe", transcribe), \
+            patch("app.services.voice.handler.tts_service.synthesize", synthesize), \
+            patch("app.services.voice.handler.MessageHandler.handle_message", handle_message):
+        result = await VoiceMessageHandler(db_session, context).handle_voice_message(io.BytesIO(b"RIFF"))
+
+    assert seen == {"stt": False, "tts": False}
+    assert result["assistant_message"]["content"] == "It is paid."
+    artifacts = (await db_session.execute(select(VoiceArtifact.artifact_type))).scalars().all()
+    assert sorted(artifacts) == ["audio_in", "audio_out"]
@@ -0,0 +1,73 @@
+"""
+Unit tests for the in-process TTL cache
+"""
+import time
+from app.utils.cache import TTLCache
+
+
+def test_cache_hit_and_miss_counters():
+    """Test hits and misses are counted"""
+    cache = TTLCache(max_size=10, ttl_seconds=60)
+
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_cache_entries_expire():
+    """Test entries older than the TTL are treated as missing"""
+    cache = TTLCache(max_size=10, ttl_seconds=0.05)
+    cache.set("a", 1)
+
+    time.sleep(0.06)
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_cache_evicts_least_recently_used():
+    """Test the oldest untouched entry is evicted when full"""
+    cache = TTLCache(max_size=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    # Touch "a" so "b" becomes least recently used
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_cache_delete_where():
+    """Test predicate-based invalidation"""
+    cache = TTLCache(max_size=10, ttl_seconds=60)
+    cache.set("key-1", {"tenant": "t1"})
+    cache.set("key-2", {"tenant": "t2"})
+
+    removed = cache.delete_where(lambda _key, value: value["tenant"] == "t1")
+
+    assert removed == 1
+    assert cache.get("key-1") is None
+    assert cache.get("key-2") == {"tenant": "t2"}
+
+
+def test_cache_delete_reports_live_entries_only():
+    """Test delete returns whether a live entry was removed and leaves stats alone"""
+    cache = TTLCache(max_size=10, ttl_seconds=60)
+    cache.set("live", 1)
+    cache.set("stale", 2, ttl_seconds=0)
+
+    assert cache.delete("live") is True
+    assert cache.delete("live") is False
+    assert cache.delete("stale") is False
+    assert cache.delete("missing") is False
+    assert cache.hits == cache.misses == 0
+    assert len(cache) == 0
@@ -0,0 +1,156 @@
+"""
+Unit tests for the per-provider circuit breaker
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.services.reliability import circuit_breaker
+from app.services.reliability.circuit_breaker import CircuitBreaker, CircuitState
+from app.services.request_context import RequestContext
+from app.services.reliability.resilient_caller import ResilientVendorCaller
+from app.services.vendors.base import VendorAdapter, VendorRequest, NormalizedResponse
+
+CONTEXT = RequestContext(tenant=MagicMock(id="t"), agent=MagicMock(), session=MagicMock(id="s"), correlation_id="c")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_breaker(clock: FakeClock, **kwargs) -> CircuitBreaker:
+    params = dict(
+        name="vendorA",
+        window_size=10,
+        min_calls=4,
+        failure_rate_threshold=0.5,
+        slow_call_ms=1000,
+        slow_call_rate_threshold=0.75,
+        open_seconds=30,
+        half_open_probes=1,
+        clock=clock
+    )
+    params.update(kwargs)
+    return CircuitBreaker(**params)
+
+
+def test_breaker_opens_on_failure_rate():
+    """Test the breaker trips once the failure rate crosses the threshold"""
+    breaker = make_breaker(FakeClock())
+
+    breaker.record_success(100)
+    breaker.record_failure()
+    breaker.record_success(100)
+    assert breaker.state == CircuitState.CLOSED  # below min_calls
+
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.allow_request() is False
+    assert breaker.rejected_calls == 1
+
+
+def test_breaker_opens_on_slow_calls():
+    """Test successful but slow calls also trip the breaker"""
+    breaker = make_breaker(FakeClock())
+
+    for _ in range(3):
+        breaker.record_success(1500)
+    breaker.record_success(100)
+
+    assert breaker.state == CircuitState.OPEN
+
+
+def test_breaker_half_open_probe_closes():
+    """Test one probe is let through after the open interval and closes the breaker"""
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    for _ in range(4):
+        breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+
+    clock.now = 31
+    assert breaker.allow_request() is True
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.allow_request() is False  # only one probe at a time
+
+    breaker.record_success(100)
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.allow_request() is True
+
+
+def test_breaker_half_open_probe_failure_reopens():
+    """Test a failed probe re-opens the breaker for another interval"""
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    for _ in range(4):
+        breaker.record_failure()
+
+    clock.now = 31
+    assert breaker.allow_request() is True
+    breaker.record_failure()
+
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.times_opened == 2
+    clock.now = 40
+    assert breaker.allow_request() is False
+
+
+class FailingVendor(VendorAdapter):
+    def __init__(self):
+        self.calls = 0
+
+    @property
+    def name(self) -> str:
+        return "vendorA"
+
+    async def send_message(self, request):
+        self.calls += 1
+        raise RuntimeError("vendor down")
+
+    def normalize_response(self, raw_response):
+        raise NotImplementedError
+
+
+class WorkingVendor(VendorAdapter):
+    @property
+    def name(self) -> str:
+        return "vendorB"
+
+    async def send_message(self, request):
+        return {}
+
+    def normalize_response(self, raw_response):
+        return NormalizedResponse(text="ok", tokens_in=1, tokens_out=1, latency_ms=1)
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_goes_straight_to_fallback(monkeypatch):
+    """Test an open primary breaker skips the primary without retries"""
+    monkeypatch.setattr(circuit_breaker, "_breakers", {})
+    breaker = circuit_breaker.get_circuit_breaker("vendorA")
+    for _ in range(breaker.min_calls):
+        breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+
+    primary, fallback = FailingVendor(), WorkingVendor()
+    adapters = {"vendorA": primary, "vendorB": fallback}
+
+    db = MagicMock()
+    db.commit = AsyncMock()
+
+    with patch(
+        "app.services.reliability.resilient_caller.get_vendor_adapter",
+        side_effect=adapters.__getitem__
+    ):
+        caller = ResilientVendorCaller(CONTEXT, db)
+        response = await caller.call_with_fallback(
+            "vendorA", "vendorB", VendorRequest(system_prompt="s", user_message="hi")
+        )
+
+    assert response.text == "ok"
+    assert primary.calls == 0
+    statuses = [call.args[0].status for call in db.add.call_args_list]
+    assert statuses == ["circuit_open", "fallback", "success"]
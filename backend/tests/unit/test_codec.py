@@ -0,0 +1,43 @@
+"""
+Unit tests for the versioned payload codecs
+"""
+import pytest
+
+from app.utils import codec
+
+PAYLOAD = b'{"id":"5f0c","content":"' + b"hello " * 200 + b'"}'
+
+
+@pytest.mark.parametrize("name", ["json", "zlib", "zstd"])
+def test_round_trip(name):
+    """Test every codec decodes to the original JSON bytes"""
+    blob = codec.encode(PAYLOAD, codec.get_codec(name))
+    assert codec.decode(blob) == PAYLOAD
+
+
+def test_small_payloads_are_stored_uncompressed():
+    """Test payloads below the threshold get the plain version byte"""
+    blob = codec.encode(b'{"a":1}', codec.ZLIB, min_compress_bytes=1024)
+    assert blob == b'\x01{"a":1}'
+
+
+def test_legacy_json_rows_decode_as_is():
+    """Test values written before versioning (plain JSON) are still readable"""
+    assert codec.decode(b'{"a": 1}') == b'{"a": 1}'
+
+
+def test_unknown_version_byte_is_rejected():
+    """Test a blob from a codec this process does not know raises CodecError"""
+    with pytest.raises(codec.CodecError):
+        codec.decode(b"\x7fdata")
+
+
+def test_missing_zstd_warns_once(monkeypatch):
+    """Test the zlib fallback for 'zstd' is logged once, not on every stored response"""
+    monkeypatch.setattr(codec, "_CODECS", {codec.JSON.version: codec.JSON, codec.ZLIB.version: codec.ZLIB})
+    monkeypatch.setattr(codec, "_warned_zstd_fallback", False)
+    warnings = []
+    monkeypatch.setattr(codec.logger, "warning", warnings.append)
+
+    assert [codec.get_codec("zstd") for _ in range(3)] == [codec.ZLIB] * 3
+    assert len(warnings) == 1
@@ -0,0 +1,226 @@
+"""
+Unit tests for the Redis idempotency store's in-flight claims
+"""
+import asyncio
+import time
+import uuid
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.config import settings
+from app.services import idempotency
+from app.services.idempotency import (
+    IdempotencyInFlight, IdempotencyService, RedisIdempotencyStore, _REFRESH_SCRIPT, _RELEASE_SCRIPT
+)
+from app.services.reliability.circuit_breaker import CircuitBreaker
+
+
+class FakeRedis:
+    """Just enough of redis.asyncio.Redis for the store (SET NX/EX, GET, release/refresh scripts)"""
+
+    def __init__(self):
+        self.data = {}
+
+    def _live(self, key):
+        entry = self.data.get(key)
+        if entry and entry[1] is not None and entry[1] <= time.monotonic():
+            del self.data[key]
+            return None
+        return entry
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and self._live(key):
+            return None
+        self.data[key] = (value, time.monotonic() + ex if ex else None)
+        return True
+
+    async def get(self, key):
+        entry = self._live(key)
+        return entry[0] if entry else None
+
+    async def eval(self, script, numkeys, key, token, *args):
+        assert script in (_RELEASE_SCRIPT, _REFRESH_SCRIPT)
+        entry = self._live(key)
+        if not entry or entry[0] != token:
+            return 0
+        if script == _REFRESH_SCRIPT:
+            self.data[key] = (token, time.monotonic() + args[0])
+        else:
+            del self.data[key]
+        return 1
+
+
+class DownRedis:
+    def __init__(self):
+        self.calls = 0
+
+    async def set(self, *args, **kwargs):
+        self.calls += 1
+        raise RedisConnectionError("connection refused")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def breaker_clock(monkeypatch):
+    """Fresh Redis breaker per test, on a fake clock"""
+    clock = FakeClock()
+    monkeypatch.setattr(idempotency, "redis_breaker", CircuitBreaker(
+        "idempotency-redis", window_size=1, min_calls=1, open_seconds=10, clock=clock
+    ))
+    return clock
+
+
+@pytest.fixture
+def fast_polling(monkeypatch):
+    monkeypatch.setattr(settings, "IDEMPOTENCY_POLL_INTERVAL_MS", 5)
+    monkeypatch.setattr(settings, "IDEMPOTENCY_WAIT_SECONDS", 1.0)
+
+
+@pytest.mark.asyncio
+async def test_duplicate_waits_for_in_flight_response(fast_polling):
+    """Test a concurrent duplicate gets the owner's response instead of processing"""
+    redis = FakeRedis()
+    tenant_id = uuid.uuid4()
+    owner = RedisIdempotencyStore(None, tenant_id, redis=redis)
+    duplicate = RedisIdempotencyStore(None, tenant_id, redis=redis)
+
+    assert await owner.claim("key-1") is None
+    waiter = asyncio.create_task(duplicate.claim("key-1"))
+    await asyncio.sleep(0.02)
+    assert not waiter.done()
+
+    await owner.cache_response("key-1", b'{"content":"hi"}')
+
+    cached = await asyncio.wait_for(waiter, timeout=1)
+    assert cached == b'{"content":"hi"}'
+
+
+@pytest.mark.asyncio
+async def test_released_claim_can_be_retaken(fast_polling):
+    """Test a failed owner's release lets the waiting duplicate process the request"""
+    redis = FakeRedis()
+    tenant_id = uuid.uuid4()
+    owner = RedisIdempotencyStore(None, tenant_id, redis=redis)
+    duplicate = RedisIdempotencyStore(None, tenant_id, redis=redis)
+
+    assert await owner.claim("key-2") is None
+    waiter = asyncio.create_task(duplicate.claim("key-2"))
+    await asyncio.sleep(0.02)
+
+    await owner.release("key-2")
+
+    assert await asyncio.wait_for(waiter, timeout=1) is None
+    # The stale owner can no longer release the new claim
+    await owner.release("key-2")
+    assert await redis.get(duplicate._key("key-2")) is not None
+
+
+@pytest.mark.asyncio
+async def test_refresh_keeps_only_the_owners_claim(fast_polling, monkeypatch):
+    """Test refresh() pushes back the owner's claim expiry and never revives another's"""
+    monkeypatch.setattr(settings, "IDEMPOTENCY_LOCK_TTL_SECONDS", 0.05)
+    redis = FakeRedis()
+    tenant_id = uuid.uuid4()
+    owner = RedisIdempotencyStore(None, tenant_id, redis=redis)
+    assert await owner.claim("key-r") is None
+
+    for _ in range(3):
+        await asyncio.sleep(0.03)
+        await owner.refresh("key-r")
+    assert await redis.get(owner._key("key-r")) == b"pending:" + owner._token
+
+    # Once lost (expired and re-claimed), a refresh leaves the new owner's claim alone
+    await asyncio.sleep(0.06)
+    other = RedisIdempotencyStore(None, tenant_id, redis=redis)
+    assert await other.claim("key-r") is None
+    await owner.refresh("key-r")
+    assert await redis.get(owner._key("key-r")) == b"pending:" + other._token
+
+
+@pytest.mark.asyncio
+async def test_wait_gives_up_with_conflict(fast_polling, monkeypatch):
+    """Test a duplicate stops waiting after IDEMPOTENCY_WAIT_SECONDS"""
+    monkeypatch.setattr(settings, "IDEMPOTENCY_WAIT_SECONDS", 0.05)
+    redis = FakeRedis()
+    tenant_id = uuid.uuid4()
+    assert await RedisIdempotencyStore(None, tenant_id, redis=redis).claim("key-3") is None
+
+    with pytest.raises(IdempotencyInFlight) as exc_info:
+        await RedisIdempotencyStore(None, tenant_id, redis=redis).claim("key-3")
+    assert exc_info.value.status_code == 409
+
+
+@pytest.mark.asyncio
+async def test_redis_outage_falls_back_to_database(monkeypatch):
+    """Test the store degrades to the database table and writes in the caller's transaction"""
+    async def no_cached_response(self, key):
+        return None
+
+    monkeypatch.setattr(IdempotencyService, "get_cached_response", no_cached_response)
+    store = RedisIdempotencyStore(None, uuid.uuid4(), redis=DownRedis())
+
+    assert store.writes_in_transaction is False
+    assert await store.claim("key-4") is None
+    assert store.writes_in_transaction is True
+
+
+@pytest.mark.asyncio
+async def test_redis_outage_is_remembered(monkeypatch, breaker_clock):
+    """Test only the first request after an outage pays for Redis, until the retry interval passes"""
+    async def no_cached_response(self, key):
+        return None
+
+    monkeypatch.setattr(IdempotencyService, "get_cached_response", no_cached_response)
+    down = DownRedis()
+    tenant_id = uuid.uuid4()
+
+    for key in ("key-a", "key-b", "key-c"):
+        store = RedisIdempotencyStore(None, tenant_id, redis=down)
+        assert await store.claim(key) is None
+        assert store.writes_in_transaction is True
+    assert down.calls == 1
+
+    # After the retry interval one probe goes to Redis; once it answers, Redis is used again
+    breaker_clock.now += 10
+    redis = FakeRedis()
+    store = RedisIdempotencyStore(None, tenant_id, redis=redis)
+    assert await store.claim("key-d") is None
+    assert store.writes_in_transaction is False
+    assert await RedisIdempotencyStore(None, tenant_id, redis=redis).claim("key-e") is None
+    assert await redis.get(store._key("key-e")) is not None
+
+
+@pytest.mark.asyncio
+async def test_large_responses_are_compressed(fast_polling, monkeypatch):
+    """Test responses over the threshold are stored compressed and replayed byte-for-byte"""
+    monkeypatch.setattr(settings, "IDEMPOTENCY_CODEC", "zlib")
+    monkeypatch.setattr(settings, "IDEMPOTENCY_COMPRESS_MIN_BYTES", 64)
+    redis = FakeRedis()
+    tenant_id = uuid.uuid4()
+    owner = RedisIdempotencyStore(None, tenant_id, redis=redis)
+    payload = b'{"content":"' + b"invoice " * 100 + b'"}'
+
+    assert await owner.claim("key-5") is None
+    await owner.cache_response("key-5", payload)
+
+    stored = await redis.get(owner._key("key-5"))
+    assert len(stored) < len(payload)
+    assert await RedisIdempotencyStore(None, tenant_id, redis=redis).claim("key-5") == payload
+
+
+@pytest.mark.asyncio
+async def test_undecodable_response_is_treated_as_a_miss(fast_polling):
+    """Test a response from an unknown codec is dropped and the key claimed instead of failing"""
+    redis = FakeRedis()
+    store = RedisIdempotencyStore(None, uuid.uuid4(), redis=redis)
+    await redis.set(store._key("key-6"), b"done:\x7fnot-a-known-codec")
+
+    assert await store.claim("key-6") is None
+    assert await redis.get(store._key("key-6")) == b"pending:" + store._token
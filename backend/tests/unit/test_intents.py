@@ -0,0 +1,82 @@
+"""
+Unit tests for keyword matching, tool intent detection and invoice ID extraction
+"""
+import pytest
+
+from app.services.tools.intents import KeywordMatcher, ToolRegistry
+from app.services.invoices.base import normalize_invoice
+from app.services.tools.invoice_lookup import InvoiceLookupTool, extract_invoice_id
+from app.services.tools.base import Tool
+
+
+class RefundTool(Tool):
+    triggers = ("refund", "money back")
+    name = "refund"
+    description = "Refunds"
+    parameters = []
+
+    async def execute(self, params, context):
+        return {"success": True}
+
+    def extract_params(self, message):
+        return {}
+
+
+def test_matcher_finds_overlapping_keywords():
+    """Test keywords sharing prefixes and suffixes are all reported in one pass"""
+    matcher = KeywordMatcher({"he": ["a"], "she": ["b"], "hers": ["c"], "his": ["d"]})
+
+    assert matcher.match("USHERS") == {"a", "b", "c"}
+    assert matcher.match("this") == {"d"}
+    assert matcher.match("nothing here") == {"a"}
+    assert matcher.match("xyz") == set()
+
+
+@pytest.mark.parametrize("message,expected", [
+    ("What's the status of INV-TC-001?", "INV-TC-001"),
+    ("check inv-hf-7 please", "INV-HF-7"),
+    ("invoice INV001", "INV-001"),
+    ("Where is invoice #12", "INV-012"),
+    ("order: 7", "INV-007"),
+    ("hello there", None),
+])
+def test_extract_invoice_id(message, expected):
+    """Test the supported invoice ID formats are normalized"""
+    assert extract_invoice_id(message) == expected
+
+
+def test_registry_only_detects_enabled_tools():
+    """Test triggers select candidate tools, filtered by the agent's enabled tools"""
+    registry = ToolRegistry([InvoiceLookupTool(), RefundTool()])
+    message = "I want my money back for invoice INV-TC-002"
+
+    intents = registry.detect(message, ["invoice_lookup", "refund"])
+    assert [(i.tool.name, i.params) for i in intents] == [
+        ("invoice_lookup", {"invoice_id": "INV-TC-002"}),
+        ("refund", {}),
+    ]
+    assert [i.tool.name for i in registry.detect(message, ["refund"])] == ["refund"]
+    assert registry.may_trigger(message, []) is False
+    # Triggered but nothing to look up: a candidate without an intent
+    assert registry.may_trigger("about my invoice", ["invoice_lookup"]) is True
+    assert registry.detect("about my invoice", ["invoice_lookup"]) == []
+
+
+def test_invoice_result_formatting():
+    """Test found and missing invoices are rendered as the reply text"""
+    tool = InvoiceLookupTool()
+    found = tool.format_result({"success": True, "invoice": tool.COMPANY_INVOICES["techcorp"]["INV-TC-001"]})
+    assert "📄 Invoice ID: INV-TC-001" in found
+    assert "💰 Amount: $15,000.00" in found
+    assert "💳 Paid On: 2025-01-10" in found
+
+    assert tool.format_result({"success": False, "error": "Invoice X not found"}) == "❌ Invoice X not found"
+
+
+def test_invoice_result_formatting_fills_missing_fields():
+    """Test absent customer/description (None after normalization) render as N/A"""
+    invoice = normalize_invoice({"id": "INV-1", "amount": 10, "status": "pending", "due_date": "2025-01-01"})
+    text = InvoiceLookupTool().format_result({"success": True, "invoice": invoice})
+    assert "👤 Customer: N/A" in text
+    assert "📝 Description: N/A" in text
+    assert "None" not in text
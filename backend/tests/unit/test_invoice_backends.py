@@ -0,0 +1,150 @@
+"""
+Unit tests for the in-memory and snapshot invoice backends
+"""
+import uuid
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services.invoices import factory
+from app.services.invoices.demo import DEMO_INVOICES
+from app.services.invoices.memory import InMemoryInvoiceBackend
+from app.services.invoices.snapshot import SnapshotInvoiceBackend, build_snapshot
+from app.services.request_context import RequestContext
+from app.services.tools.executor import ToolExecutor
+from app.services.tools.invoice_lookup import InvoiceLookupTool
+
+
+def demo_pairs():
+    for company_key, invoices in DEMO_INVOICES.items():
+        for invoice in invoices.values():
+            yield company_key, invoice
+
+
+@pytest.fixture
+async def snapshot(tmp_path):
+    path = str(tmp_path / "invoices.snap")
+    assert build_snapshot(path, demo_pairs()) == 13
+    backend = SnapshotInvoiceBackend(path)
+    yield backend
+    await backend.aclose()
+
+
+@pytest.fixture
+def memory():
+    return InMemoryInvoiceBackend(DEMO_INVOICES)
+
+
+@pytest.fixture(params=["memory", "snapshot"])
+def backend(request):
+    return request.getfixturevalue(request.param)
+
+
+@pytest.mark.asyncio
+async def test_get_by_id_is_scoped_to_the_company(backend):
+    """Test an id resolves only within its own company"""
+    invoice = await backend.get("techcorp", "INV-TC-003")
+    assert invoice == DEMO_INVOICES["techcorp"]["INV-TC-003"]
+    assert await backend.get("healthfirst", "INV-TC-003") is None
+    assert await backend.get("techcorp", "INV-TC-999") is None
+
+
+@pytest.mark.asyncio
+async def test_secondary_indexes(backend):
+    """Test customer (case-insensitive) and status lookups"""
+    found = await backend.by_customer("healthfirst", "dental associates")
+    assert [invoice["id"] for invoice in found] == ["INV-HF-006"]
+    assert await backend.by_customer("techcorp", "Dental Associates") == []
+
+    overdue = await backend.by_status("techcorp", "overdue")
+    assert sorted(invoice["id"] for invoice in overdue) == ["INV-TC-003", "INV-TC-006"]
+    assert len(await backend.by_status("healthfirst", "paid", limit=2)) == 2
+
+
+@pytest.mark.asyncio
+async def test_invoice_ids(backend):
+    """Test some ids are listed per company and none for unknown companies"""
+    ids = await backend.invoice_ids("techcorp", limit=5)
+    assert len(ids) == 5
+    assert all(invoice_id.startswith("INV-TC-") for invoice_id in ids)
+    assert await backend.invoice_ids("unknown") == []
+
+
+@pytest.mark.asyncio
+async def test_memory_bulk_load_replaces_and_reindexes(memory):
+    """Test reloading an invoice moves it between status indexes"""
+    paid = dict(DEMO_INVOICES["techcorp"]["INV-TC-003"], status="paid", payment_date="2025-01-05")
+    assert await memory.bulk_load("techcorp", [paid]) == 1
+
+    assert (await memory.get("techcorp", "INV-TC-003"))["status"] == "paid"
+    overdue = await memory.by_status("techcorp", "overdue")
+    assert [invoice["id"] for invoice in overdue] == ["INV-TC-006"]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_later_duplicates_win(tmp_path):
+    """Test building from a stream with a repeated id keeps the last version"""
+    path = str(tmp_path / "dup.snap")
+    first = {"id": "INV-1", "amount": 10, "status": "pending", "customer": "A"}
+    second = dict(first, amount=20, status="paid")
+    assert build_snapshot(path, [("acme", first), ("acme", second)]) == 1
+
+    backend = SnapshotInvoiceBackend(path)
+    try:
+        assert (await backend.get("acme", "INV-1"))["amount"] == 20.0
+        assert await backend.by_status("acme", "pending") == []
+        assert [invoice["id"] for invoice in await backend.by_status("acme", "paid")] == ["INV-1"]
+    finally:
+        await backend.aclose()
+
+
+def test_snapshot_rejects_other_files(tmp_path):
+    """Test a file without the snapshot header is refused"""
+    path = tmp_path / "not-a-snapshot"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        SnapshotInvoiceBackend(str(path))
+
+
+@pytest.mark.asyncio
+async def test_invoice_lookup_tool_uses_the_configured_backend(snapshot):
+    """Test the tool reads through the process-wide backend"""
+    tool = InvoiceLookupTool()
+    factory.set_invoice_backend(snapshot)
+    try:
+        found = await tool.execute({"invoice_id": "INV-HF-002"}, {"company_key": "healthfirst"})
+        assert found == {"success": True, "invoice": DEMO_INVOICES["healthfirst"]["INV-HF-002"]}
+
+        missing = await tool.execute({"invoice_id": "INV-HF-099"}, {"company_key": "healthfirst"})
+        assert missing["error"].startswith("Invoice INV-HF-099 not found. Available invoices: INV-HF-")
+
+        no_data = await tool.execute({"invoice_id": "INV-1"}, {"company_key": "acme"})
+        assert no_data["error"] == "No invoice data available for company: acme"
+    finally:
+        factory.set_invoice_backend(None)
+
+
+@pytest.mark.asyncio
+async def test_bulk_load_invalidates_cached_lookups(memory):
+    """Test the lookup after a load misses the tool result cache and sees the new data"""
+    context = RequestContext(
+        tenant=MagicMock(id=uuid.uuid4(), company_key="techcorp"),
+        agent=MagicMock(id=uuid.uuid4()),
+        session=MagicMock(id=uuid.uuid4()),
+        correlation_id="corr-invoices"
+    )
+    db = MagicMock()
+    db.commit = AsyncMock()
+    executor = ToolExecutor(db, context)
+    call = [("invoice_lookup", {"invoice_id": "INV-TC-003"})]
+
+    factory.set_invoice_backend(memory)
+    try:
+        await executor.execute_many(call)
+        paid = dict(DEMO_INVOICES["techcorp"]["INV-TC-003"], status="paid", payment_date="2025-01-05")
+        await memory.bulk_load("techcorp", [paid])
+        [result] = await executor.execute_many(call)
+    finally:
+        factory.set_invoice_backend(None)
+
+    assert result["invoice"]["status"] == "paid"
+    assert db.add_all.call_args.args[0][0].cached is False
@@ -0,0 +1,458 @@
+"""
+Unit tests for the vendor retry engine, retry budget, hedging, adaptive timeouts and streaming
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.config import settings
+from app.services.reliability import circuit_breaker, latency, resilient_caller
+from app.services.reliability.retry_budget import RetryBudget
+from app.services.request_context import RequestContext
+from app.services.reliability.resilient_caller import ResilientVendorCaller, AllVendorsFailed
+from app.services.vendors.base import VendorAdapter, VendorRequest, NormalizedResponse, StreamChunk
+
+CONTEXT = RequestContext(tenant=MagicMock(id="t"), agent=MagicMock(), session=MagicMock(id="s"), correlation_id="c")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class ScriptedVendor(VendorAdapter):
+    """Fails the first `failures` calls, then succeeds"""
+
+    def __init__(self, name: str, failures: int = 0, delay: float = 0):
+        self._name = name
+        self.failures = failures
+        self.delay = delay
+        self.calls = 0
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    async def send_message(self, request):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.calls <= self.failures:
+            raise RuntimeError(f"{self._name} unavailable")
+        return {}
+
+    def normalize_response(self, raw_response):
+        return NormalizedResponse(text="ok", tokens_in=1, tokens_out=1, latency_ms=1)
+
+
+@pytest.fixture
+def isolated(monkeypatch):
+    monkeypatch.setattr(circuit_breaker, "_breakers", {})
+    monkeypatch.setattr(latency, "_windows", {})
+    monkeypatch.setattr(resilient_caller, "retry_budget", RetryBudget(ratio=1.0))
+    monkeypatch.setattr(settings, "VENDOR_RETRY_MIN_WAIT", 0)
+    monkeypatch.setattr(settings, "VENDOR_RETRY_MAX_WAIT", 0)
+    monkeypatch.setattr(settings, "CIRCUIT_BREAKER_MIN_CALLS", 100)
+
+
+async def run_caller(primary, fallback, **overrides):
+    adapters = {primary.name: primary}
+    if fallback:
+        adapters[fallback.name] = fallback
+
+    db = MagicMock()
+    db.commit = AsyncMock()
+
+    with patch(
+        "app.services.reliability.resilient_caller.get_vendor_adapter",
+        side_effect=adapters.__getitem__
+    ):
+        caller = ResilientVendorCaller(CONTEXT, db)
+        for key, value in overrides.items():
+            setattr(caller, key, value)
+        try:
+            response = await caller.call_with_fallback(
+                primary.name,
+                fallback.name if fallback else None,
+                VendorRequest(system_prompt="s", user_message="hi")
+            )
+        except AllVendorsFailed:
+            response = None
+
+    rows = [(c.args[0].provider, c.args[0].attempt_number, c.args[0].status) for c in db.add.call_args_list]
+    return response, rows
+
+
+def test_retry_budget_caps_retries_to_ratio():
+    """Test retries are limited to ratio * requests (plus the floor)"""
+    clock = FakeClock()
+    budget = RetryBudget(ratio=0.2, min_retries_per_second=0, window_seconds=10, clock=clock)
+
+    for _ in range(10):
+        budget.record_request()
+
+    assert budget.try_acquire_retry() is True
+    assert budget.try_acquire_retry() is True
+    assert budget.try_acquire_retry() is False
+    assert budget.rejected_retries == 1
+
+    # Window slides: old requests and retries age out together
+    clock.now = 11
+    assert budget.try_acquire_retry() is False
+    budget.record_request()
+    budget.record_request()
+    budget.record_request()
+    budget.record_request()
+    budget.record_request()
+    assert budget.try_acquire_retry() is True
+
+
+@pytest.mark.asyncio
+async def test_attempt_numbers_are_sequential(isolated):
+    """Test each vendor call gets its own attempt number across primary and fallback"""
+    primary = ScriptedVendor("vendorA", failures=10)
+    fallback = ScriptedVendor("vendorB", failures=1)
+
+    response, rows = await run_caller(primary, fallback)
+
+    assert response.text == "ok"
+    assert primary.calls == settings.VENDOR_MAX_RETRIES == 3
+    assert rows == [
+        ("vendorA", 1, "retry"),
+        ("vendorA", 2, "retry"),
+        ("vendorA", 3, "error"),
+        ("vendorB", 3, "fallback"),
+        ("vendorB", 4, "retry"),
+        ("vendorB", 5, "success"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_exhausted_budget_stops_retries(isolated, monkeypatch):
+    """Test no retries are made once the budget is spent"""
+    monkeypatch.setattr(
+        resilient_caller, "retry_budget", RetryBudget(ratio=0, min_retries_per_second=0)
+    )
+    primary = ScriptedVendor("vendorA", failures=10)
+
+    response, rows = await run_caller(primary, None)
+
+    assert response is None
+    assert primary.calls == 1
+    assert rows == [("vendorA", 1, "error")]
+
+
+@pytest.mark.asyncio
+async def test_deadline_bounds_primary_and_fallback(isolated):
+    """Test the request deadline caps attempt timeouts and skips the fallback once spent"""
+    primary = ScriptedVendor("vendorA", delay=1)
+    fallback = ScriptedVendor("vendorB")
+
+    response, rows = await run_caller(primary, fallback, deadline_seconds=0.05)
+
+    assert response is None
+    assert primary.calls == 1
+    assert fallback.calls == 0
+    assert rows == [
+        ("vendorA", 1, "error"),
+        ("vendorB", 1, "fallback"),
+        ("vendorB", 1, "error"),
+    ]
+
+
+def seed_latency(provider: str, latency_ms: int):
+    window = latency.get_latency_window(provider)
+    for _ in range(window.min_samples):
+        window.record(latency_ms)
+
+
+@pytest.mark.asyncio
+async def test_hedge_takes_first_answer_and_cancels_loser(isolated, monkeypatch):
+    """Test a slow primary is raced by the fallback and only winner + cancelled are logged"""
+    monkeypatch.setattr(settings, "VENDOR_HEDGE_MIN_DELAY_MS", 0)
+    seed_latency("vendorA", 10)
+    primary = ScriptedVendor("vendorA", delay=1)
+    fallback = ScriptedVendor("vendorB")
+
+    response, rows = await run_caller(primary, fallback, hedge_percentile=95)
+
+    assert response.provider == "vendorB"
+    assert rows == [
+        ("vendorB", 2, "success"),
+        ("vendorA", 1, "cancelled"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_hedge_race_keeps_failed_attempts(isolated, monkeypatch):
+    """Test retries inside a won race keep their rows and the cancelled primary is sampled"""
+    monkeypatch.setattr(settings, "VENDOR_HEDGE_MIN_DELAY_MS", 0)
+    seed_latency("vendorA", 10)
+    samples = len(latency.get_latency_window("vendorA"))
+    primary = ScriptedVendor("vendorA", delay=1)
+    fallback = ScriptedVendor("vendorB", failures=1)
+
+    response, rows = await run_caller(primary, fallback, hedge_percentile=95)
+
+    assert response.provider == "vendorB"
+    assert fallback.calls == 2
+    assert rows == [
+        ("vendorB", 2, "retry"),
+        ("vendorB", 3, "success"),
+        ("vendorA", 1, "cancelled"),
+    ]
+    # The abandoned primary call is recorded as a (censored) latency sample
+    assert len(latency.get_latency_window("vendorA")) == samples + 1
+
+
+@pytest.mark.asyncio
+async def test_hedge_win_keeps_primary_errors(isolated, monkeypatch):
+    """Test the primary's failed attempts stay logged when the hedge wins, with one cancelled row"""
+    monkeypatch.setattr(settings, "VENDOR_HEDGE_MIN_DELAY_MS", 0)
+    seed_latency("vendorA", 10)
+    primary = ScriptedVendor("vendorA", failures=10, delay=0.05)
+    fallback = ScriptedVendor("vendorB", delay=0.12)
+
+    response, rows = await run_caller(primary, fallback, hedge_percentile=95)
+
+    assert response.provider == "vendorB"
+    assert sorted(rows) == [
+        ("vendorA", 1, "retry"),
+        ("vendorA", 3, "retry"),
+        ("vendorA", 4, "cancelled"),
+        ("vendorB", 2, "success"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_hedge_race_without_winner_logs_every_attempt(isolated, monkeypatch):
+    """Test a race both vendors lose keeps the full failure trail"""
+    monkeypatch.setattr(settings, "VENDOR_HEDGE_MIN_DELAY_MS", 0)
+    monkeypatch.setattr(settings, "VENDOR_MAX_RETRIES", 2)
+    seed_latency("vendorA", 10)
+    primary = ScriptedVendor("vendorA", failures=10, delay=0.05)
+    fallback = ScriptedVendor("vendorB", failures=10)
+
+    response, rows = await run_caller(primary, fallback, hedge_percentile=95, max_retries=2)
+
+    assert response is None
+    assert sorted(rows) == [
+        ("vendorA", 1, "retry"), ("vendorA", 4, "error"),
+        ("vendorB", 2, "retry"), ("vendorB", 3, "error"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_no_hedge_without_retry_budget(isolated, monkeypatch):
+    """Test a slow primary is simply awaited when the retry budget cannot pay for a hedge"""
+    monkeypatch.setattr(settings, "VENDOR_HEDGE_MIN_DELAY_MS", 0)
+    monkeypatch.setattr(
+        resilient_caller, "retry_budget", RetryBudget(ratio=0, min_retries_per_second=0)
+    )
+    seed_latency("vendorA", 10)
+    primary = ScriptedVendor("vendorA", delay=0.05)
+    fallback = ScriptedVendor("vendorB")
+
+    response, rows = await run_caller(primary, fallback, hedge_percentile=95)
+
+    assert response.provider == "vendorA"
+    assert fallback.calls == 0
+    assert rows == [("vendorA", 1, "success")]
+
+
+@pytest.mark.asyncio
+async def test_no_hedge_when_primary_is_fast(isolated, monkeypatch):
+    """Test the fallback is not called when the primary answers before the hedge delay"""
+    monkeypatch.setattr(settings, "VENDOR_HEDGE_MIN_DELAY_MS", 0)
+    seed_latency("vendorA", 500)
+    primary = ScriptedVendor("vendorA")
+    fallback = ScriptedVendor("vendorB")
+
+    response, rows = await run_caller(primary, fallback, hedge_percentile=95)
+
+    assert response.provider == "vendorA"
+    assert fallback.calls == 0
+    assert rows == [("vendorA", 1, "success")]
+
+
+def test_latency_window_percentiles():
+    """Test histogram percentiles track the rolling window within bucket precision"""
+    window = latency.LatencyWindow(size=100, min_samples=10)
+    assert window.percentile(99) is None
+
+    for ms in range(1, 101):
+        window.record(ms * 10)  # 10ms .. 1000ms
+
+    assert 500 <= window.percentile(50) <= 550
+    assert 990 <= window.percentile(99) <= 1100
+
+    # Old samples roll out of the window
+    for _ in range(100):
+        window.record(50)
+    assert 50 <= window.percentile(99) <= 55
+
+
+def test_adaptive_timeout_is_clamped(isolated, monkeypatch):
+    """Test the timeout follows p99 x factor between the floor and the static ceiling"""
+    monkeypatch.setattr(settings, "VENDOR_TIMEOUT_FACTOR", 2.5)
+    monkeypatch.setattr(settings, "VENDOR_TIMEOUT_MIN_SECONDS", 2.0)
+    monkeypatch.setattr(settings, "VENDOR_TIMEOUT_SECONDS", 10)
+
+    assert latency.adaptive_timeout("vendorA") == 10  # no history yet
+
+    seed_latency("vendorA", 800)
+    assert 2.0 <= latency.adaptive_timeout("vendorA") <= 2.2
+
+    seed_latency("vendorB", 100)
+    assert latency.adaptive_timeout("vendorB") == 2.0
+
+    seed_latency("vendorC", 9000)
+    assert latency.adaptive_timeout("vendorC") == 10
+
+
+@pytest.mark.asyncio
+async def test_hung_call_abandoned_at_adaptive_timeout(isolated, monkeypatch):
+    """Test an attempt is cut off at the adaptive timeout rather than the static one"""
+    monkeypatch.setattr(settings, "VENDOR_TIMEOUT_MIN_SECONDS", 0.05)
+    monkeypatch.setattr(settings, "VENDOR_MAX_RETRIES", 1)
+    seed_latency("vendorA", 20)
+    primary = ScriptedVendor("vendorA", delay=5)
+
+    response, rows = await asyncio.wait_for(run_caller(primary, None), timeout=1)
+
+    assert response is None
+    assert rows == [("vendorA", 1, "error")]
+
+
+@pytest.mark.asyncio
+async def test_stream_falls_back_before_first_chunk(isolated):
+    """Test a stream that cannot start moves to the fallback and logs one terminal row per attempt"""
+    primary = ScriptedVendor("vendorA", failures=10)
+    fallback = ScriptedVendor("vendorB")
+
+    db = MagicMock()
+    db.commit = AsyncMock()
+    adapters = {"vendorA": primary, "vendorB": fallback}
+    with patch(
+        "app.services.reliability.resilient_caller.get_vendor_adapter",
+        side_effect=adapters.__getitem__
+    ):
+        caller = ResilientVendorCaller(CONTEXT, db)
+        caller.max_retries = 1
+        chunks = [
+            chunk async for chunk in caller.stream_with_fallback(
+                "vendorA", "vendorB", VendorRequest(system_prompt="s", user_message="hi")
+            )
+        ]
+
+    assert [chunk.text for chunk in chunks if not chunk.done] == ["ok"]
+    assert chunks[-1].done and chunks[-1].provider == "vendorB"
+    rows = [(c.args[0].provider, c.args[0].attempt_number, c.args[0].status) for c in db.add.call_args_list]
+    assert rows == [
+        ("vendorA", 1, "error"),
+        ("vendorB", 1, "fallback"),
+        ("vendorB", 2, "success"),
+    ]
+
+
+class ChunkedVendor(ScriptedVendor):
+    """Streams `chunks` deltas, then fails if `fail_after` is set"""
+
+    def __init__(self, name: str, chunks: int = 3, fail_after: bool = False):
+        super().__init__(name)
+        self.chunks = chunks
+        self.fail_after = fail_after
+
+    async def stream(self, request):
+        for i in range(self.chunks):
+            yield StreamChunk(text=f"part{i}")
+        if self.fail_after:
+            raise RuntimeError("connection reset")
+        yield StreamChunk(done=True, tokens_in=1, tokens_out=1)
+
+
+def open_caller_stream(vendor):
+    db = MagicMock()
+    db.commit = AsyncMock()
+    caller = ResilientVendorCaller(CONTEXT, db)
+    stream = caller.stream_with_fallback(vendor.name, None, VendorRequest(system_prompt="s", user_message="hi"))
+    return stream, db
+
+
+@pytest.mark.asyncio
+async def test_abandoned_stream_is_logged_as_cancelled(isolated):
+    """Test a consumer closing the stream mid-answer still gets a row and a latency sample"""
+    vendor = ChunkedVendor("vendorA")
+    with patch("app.services.reliability.resilient_caller.get_vendor_adapter", return_value=vendor):
+        stream, db = open_caller_stream(vendor)
+        first = await anext(stream)
+        await stream.aclose()
+
+    assert first.text == "part0"
+    rows = [(c.args[0].provider, c.args[0].attempt_number, c.args[0].status) for c in db.add.call_args_list]
+    assert rows == [("vendorA", 1, "cancelled")]
+    assert len(latency.get_latency_window("vendorA")) == 1
+
+
+@pytest.mark.asyncio
+async def test_mid_stream_failure_counts_against_breaker(isolated):
+    """Test a stream dying after its first chunk is logged as an error and recorded by the breaker"""
+    vendor = ChunkedVendor("vendorA", fail_after=True)
+    with patch("app.services.reliability.resilient_caller.get_vendor_adapter", return_value=vendor):
+        stream, db = open_caller_stream(vendor)
+        with pytest.raises(RuntimeError):
+            async for _ in stream:
+                pass
+
+    rows = [(c.args[0].provider, c.args[0].status, c.args[0].error_message) for c in db.add.call_args_list]
+    assert rows == [("vendorA", "error", "connection reset")]
+    assert circuit_breaker.get_circuit_breaker("vendorA").total_failures == 1
+
+
+@pytest.mark.asyncio
+async def test_empty_stream_is_closed_and_falls_back(isolated):
+    """Test a stream ending before its first chunk is closed and treated as a failed attempt"""
+    closed = []
+
+    class EmptyStream:
+        """Async iterator holding a (pretend) HTTP response until closed"""
+
+        def __init__(self, name):
+            self.name = name
+
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self):
+            raise StopAsyncIteration
+
+        async def aclose(self):
+            closed.append(self.name)
+
+    class EmptyVendor(ScriptedVendor):
+        def stream(self, request):
+            return EmptyStream(self.name)
+
+    adapters = {"vendorA": EmptyVendor("vendorA"), "vendorB": ChunkedVendor("vendorB")}
+    with patch(
+        "app.services.reliability.resilient_caller.get_vendor_adapter",
+        side_effect=adapters.__getitem__
+    ):
+        db = MagicMock()
+        db.commit = AsyncMock()
+        caller = ResilientVendorCaller(CONTEXT, db)
+        caller.max_retries = 1
+        chunks = [
+            chunk async for chunk in caller.stream_with_fallback(
+                "vendorA", "vendorB", VendorRequest(system_prompt="s", user_message="hi")
+            )
+        ]
+
+    assert closed == ["vendorA"]
+    assert chunks[-1].provider == "vendorB"
+    assert circuit_breaker.get_circuit_breaker("vendorA").total_failures == 1
+    rows = [(c.args[0].provider, c.args[0].status, c.args[0].error_message) for c in db.add.call_args_list]
+    assert rows[0] == ("vendorA", "error", "Vendor stream ended without data")
@@ -0,0 +1,46 @@
+"""
+Unit tests for the HyperLogLog distinct-count sketch
+"""
+import uuid
+from datetime import datetime
+
+from app.services.billing.rollups import bucket_start
+from app.utils.sketch import HyperLogLog
+
+
+def test_small_counts_are_near_exact_and_idempotent():
+    """Test linear counting keeps small cardinalities close and duplicates are ignored"""
+    sketch = HyperLogLog()
+    ids = [uuid.uuid4().bytes for _ in range(50)]
+    for value in ids:
+        sketch.add(value)
+    once = sketch.count()
+    for value in ids:
+        sketch.add(value)
+
+    assert sketch.count() == once
+    assert abs(once - 50) <= 3
+
+
+def test_merge_counts_union():
+    """Test merged sketches estimate the union within the sketch's error"""
+    a, b = HyperLogLog(), HyperLogLog()
+    shared = [uuid.uuid4().bytes for _ in range(5000)]
+    for value in shared:
+        a.add(value)
+        b.add(value)
+    for _ in range(5000):
+        a.add(uuid.uuid4().bytes)
+        b.add(uuid.uuid4().bytes)
+
+    merged = HyperLogLog.union([a.to_bytes(), b.to_bytes()])
+
+    assert abs(merged.count() - 15000) / 15000 < 0.07
+    assert HyperLogLog.from_bytes(merged.to_bytes()).count() == merged.count()
+
+
+def test_bucket_start_truncates():
+    """Test timestamps truncate to the start of their hour/day"""
+    ts = datetime(2024, 5, 6, 17, 42, 13, 500)
+    assert bucket_start(ts, "hour") == datetime(2024, 5, 6, 17)
+    assert bucket_start(ts, "day") == datetime(2024, 5, 6)
@@ -0,0 +1,197 @@
+"""
+Unit tests for concurrent tool execution (execute_many) and the tool result cache
+"""
+import asyncio
+import time
+import uuid
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services.request_context import RequestContext
+from app.services.tools import executor
+from app.services.tools.base import Tool
+from app.services.tools.executor import ToolExecutor
+from app.services.tools.intents import ToolRegistry
+from app.services.tools.invoice_lookup import extract_invoice_ids
+from app.services.tools.result_cache import tool_result_cache
+
+
+class SleepyTool(Tool):
+    """Answers after `delay` seconds, tracking how many calls overlap"""
+
+    name = ""  # set per instance
+    description = "sleeps"
+    parameters = []
+
+    def __init__(self, name, delay, timeout_seconds=None, max_concurrency=None, cache_ttl_seconds=None):
+        self.name = name
+        self.delay = delay
+        self.timeout_seconds = timeout_seconds
+        self.max_concurrency = max_concurrency
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.running = 0
+        self.peak = 0
+        self.calls = 0
+
+    async def execute(self, params, context):
+        self.calls += 1
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.running -= 1
+        return {"success": True, "echo": params["n"], "company_key": context["company_key"]}
+
+
+@pytest.fixture(autouse=True)
+def clear_result_cache():
+    tool_result_cache.clear()
+    yield
+    tool_result_cache.clear()
+
+
+def make_executor(monkeypatch, *tools):
+    monkeypatch.setattr(executor, "tool_registry", ToolRegistry(tools))
+    monkeypatch.setattr(executor, "_semaphores", {})
+    db = MagicMock()
+    db.commit = AsyncMock()
+    return ToolExecutor(db, make_context("techcorp")), db
+
+
+def make_context(company_key):
+    return RequestContext(
+        tenant=MagicMock(id=uuid.uuid4(), company_key=company_key),
+        agent=MagicMock(id=uuid.uuid4()),
+        session=MagicMock(id=uuid.uuid4()),
+        correlation_id="corr-tools"
+    )
+
+
+@pytest.mark.asyncio
+async def test_calls_run_concurrently_with_one_audit_batch(monkeypatch):
+    """Test independent calls overlap and all audit rows are added in one batch"""
+    tool = SleepyTool("lookup", delay=0.1)
+    tool_executor, db = make_executor(monkeypatch, tool)
+
+    start = time.perf_counter()
+    results = await tool_executor.execute_many([("lookup", {"n": i}) for i in range(3)] + [("missing", {})])
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.25
+    assert tool.peak == 3
+    assert [r["echo"] for r in results[:3]] == [0, 1, 2]
+    assert results[3] is None
+    assert results[0]["company_key"] == "techcorp"
+    db.get.assert_not_called()  # company_key comes from the request context
+
+    db.add_all.assert_called_once()
+    rows = db.add_all.call_args.args[0]
+    assert [(row.tool_name, row.status) for row in rows] == [("lookup", "success")] * 3
+    db.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_timeout_fails_only_that_call(monkeypatch):
+    """Test a call over its tool's timeout becomes an error result without cancelling the others"""
+    fast = SleepyTool("fast", delay=0.01)
+    slow = SleepyTool("slow", delay=1, timeout_seconds=0.05)
+    tool_executor, db = make_executor(monkeypatch, fast, slow)
+
+    results = await asyncio.wait_for(
+        tool_executor.execute_many([("slow", {"n": 1}), ("fast", {"n": 2})]), timeout=0.5
+    )
+
+    assert results[0]["success"] is False
+    assert results[1]["echo"] == 2
+    rows = db.add_all.call_args.args[0]
+    assert rows[0].status == "error" and "Timed out" in rows[0].error_message
+    assert rows[1].status == "success"
+
+
+@pytest.mark.asyncio
+async def test_concurrency_cap_per_tool(monkeypatch):
+    """Test a tool's max_concurrency bounds overlapping executions"""
+    tool = SleepyTool("capped", delay=0.02, max_concurrency=2)
+    tool_executor, _ = make_executor(monkeypatch, tool)
+
+    await tool_executor.execute_many([("capped", {"n": i}) for i in range(6)])
+
+    assert tool.peak == 2
+
+
+@pytest.mark.asyncio
+async def test_timeout_covers_waiting_for_a_slot(monkeypatch):
+    """Test a call queued behind a saturated tool times out instead of waiting for the holder"""
+    tool = SleepyTool("capped", delay=0.01, timeout_seconds=0.05, max_concurrency=1)
+    tool_executor, db = make_executor(monkeypatch, tool)
+
+    async with executor.get_tool_semaphore(tool):  # a blocked holder
+        results = await asyncio.wait_for(tool_executor.execute_many([("capped", {"n": 1})]), timeout=0.5)
+
+    assert results[0]["success"] is False
+    assert tool.calls == 0
+    row = db.add_all.call_args.args[0][0]
+    assert row.status == "error" and "Timed out" in row.error_message
+
+
+@pytest.mark.asyncio
+async def test_cached_results_are_reused_and_audited(monkeypatch):
+    """Test repeat calls skip the tool but still write audit rows marked cached"""
+    tool = SleepyTool("lookup", delay=0, cache_ttl_seconds=60)
+    tool_executor, db = make_executor(monkeypatch, tool)
+
+    await tool_executor.execute_many([("lookup", {"n": 1, "x": "a"})])
+    results = await tool_executor.execute_many([("lookup", {"x": "a", "n": 1}), ("lookup", {"n": 2})])
+
+    assert tool.calls == 2  # {"n": 1, "x": "a"} once, {"n": 2} once
+    assert results[0]["echo"] == 1
+    rows = db.add_all.call_args.args[0]
+    assert [(row.status, row.cached) for row in rows] == [("success", True), ("success", False)]
+    assert rows[0].result == results[0]
+
+
+@pytest.mark.asyncio
+async def test_result_cache_is_scoped_and_invalidated(monkeypatch):
+    """Test other companies miss, failures are not cached and invalidate_cache() drops entries"""
+    tool = SleepyTool("lookup", delay=0, cache_ttl_seconds=60)
+    tool_executor, db = make_executor(monkeypatch, tool)
+
+    await tool_executor.execute_many([("lookup", {"n": 1})])
+    await ToolExecutor(db, make_context("healthfirst")).execute_many([("lookup", {"n": 1})])
+    assert tool.calls == 2
+
+    await tool_executor.execute_many([("lookup", {"n": 1})])
+    assert tool.calls == 2
+
+    assert tool.invalidate_cache("techcorp") == 1
+    await tool_executor.execute_many([("lookup", {"n": 1})])
+    assert tool.calls == 3
+
+    uncached = SleepyTool("uncached", delay=0)
+    tool_executor, _ = make_executor(monkeypatch, uncached)
+    await tool_executor.execute_many([("uncached", {"n": 1})] * 2)
+    assert uncached.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_results_are_not_cached(monkeypatch):
+    """Test a tool error result is retried on the next call"""
+    tool = SleepyTool("lookup", delay=0, cache_ttl_seconds=60)
+    tool.execute = AsyncMock(return_value={"success": False, "error": "not found"})
+    tool_executor, db = make_executor(monkeypatch, tool)
+
+    await tool_executor.execute_many([("lookup", {"n": 1})])
+    await tool_executor.execute_many([("lookup", {"n": 1})])
+
+    assert tool.execute.await_count == 2
+    assert db.add_all.call_args.args[0][0].cached is False
+
+
+def test_every_invoice_id_in_a_message_is_extracted():
+    """Test multi-lookup messages yield one call per distinct invoice"""
+    assert extract_invoice_ids("status of INV-TC-001 and inv-tc-003, also INV-TC-001") == [
+        "INV-TC-001", "INV-TC-003"
+    ]
+    assert extract_invoice_ids("INV002 or INV-TC-001") == ["INV-002", "INV-TC-001"]
+    assert extract_invoice_ids("invoice #4") == ["INV-004"]
@@ -0,0 +1,43 @@
+"""
+Unit tests for the vendor adapter registry
+"""
+import pytest
+from app.config import settings
+from app.services.vendors import factory
+from app.services.vendors.factory import get_vendor_adapter, close_vendor_adapters
+
+
+@pytest.fixture
+def openai_key(monkeypatch):
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(factory, "_adapters", {})
+
+
+@pytest.mark.asyncio
+async def test_adapter_is_reused(openai_key):
+    """Test the same adapter (and HTTP client) is returned on every call"""
+    first = get_vendor_adapter("vendorA")
+    second = get_vendor_adapter("vendorA")
+
+    assert first is second
+    assert first.client is second.client
+
+    await close_vendor_adapters()
+
+
+@pytest.mark.asyncio
+async def test_close_vendor_adapters_resets_registry(openai_key):
+    """Test shutdown closes clients and a later call builds a fresh adapter"""
+    first = get_vendor_adapter("vendorA")
+    await close_vendor_adapters()
+
+    assert first.http_client.is_closed
+    assert get_vendor_adapter("vendorA") is not first
+
+    await close_vendor_adapters()
+
+
+def test_unsupported_vendor():
+    """Test unknown providers are rejected"""
+    with pytest.raises(ValueError):
+        get_vendor_adapter("vendorZ")
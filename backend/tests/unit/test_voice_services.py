@@ -0,0 +1,65 @@
+"""
+Unit tests for the async STT/TTS services
+"""
+import asyncio
+import io
+import httpx
+import pytest
+from openai import AsyncOpenAI
+
+from app.config import settings
+from app.middleware.error_handler import AppException
+from app.services.voice.stt import STTService
+from app.services.voice.tts import TTSService
+
+
+def mock_client(handler) -> AsyncOpenAI:
+    return AsyncOpenAI(
+        api_key="test",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+
+
+@pytest.mark.asyncio
+async def test_stt_does_not_block_event_loop():
+    """Test other coroutines keep running while a transcription is in flight"""
+    async def handler(request):
+        await asyncio.sleep(0.2)
+        return httpx.Response(200, json={"text": "hello", "language": "en", "duration": 1.0})
+
+    service = STTService(client=mock_client(handler))
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticker_task = asyncio.create_task(ticker())
+    result = await service.transcribe(io.BytesIO(b"\0" * 64), "test.wav")
+    ticker_task.cancel()
+
+    assert result["text"] == "hello"
+    assert ticks >= 10
+
+
+@pytest.mark.asyncio
+async def test_tts_concurrency_limit_returns_busy(monkeypatch):
+    """Test callers beyond the concurrency limit get a 503 after the queue timeout"""
+    monkeypatch.setattr(settings, "VOICE_MAX_CONCURRENCY", 1)
+    monkeypatch.setattr(settings, "VOICE_QUEUE_TIMEOUT_SECONDS", 0.05)
+
+    async def handler(request):
+        await asyncio.sleep(0.3)
+        return httpx.Response(200, content=b"ID3audio", headers={"content-type": "audio/mpeg"})
+
+    service = TTSService(client=mock_client(handler))
+
+    first = asyncio.create_task(service.synthesize("first"))
+    await asyncio.sleep(0.01)
+    with pytest.raises(AppException) as exc_info:
+        await service.synthesize("second")
+
+    assert exc_info.value.status_code == 503
+    assert (await first)["audio_data"] == b"ID3audio"
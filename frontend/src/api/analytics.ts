@@ -1,5 +1,5 @@
 import apiClient from './client'
-import { UsageAnalytics, TopAgent } from '../types'
+import { UsageAnalytics, UsageTimeseries, TopAgent } from '../types'
 
 export const analyticsApi = {
   getUsage: (startDate?: string, endDate?: string) => {
@@ -9,6 +9,18 @@ export const analyticsApi = {
     return apiClient.get<UsageAnalytics>('/api/analytics/usage', { params })
   },
 
+  getUsageTimeseries: (
+    bucket: 'hour' | 'day' = 'day',
+    groupBy: 'provider' | 'agent' = 'provider',
+    startDate?: string,
+    endDate?: string
+  ) => {
+    const params: any = { bucket, group_by: groupBy }
+    if (startDate) params.start_date = startDate
+    if (endDate) params.end_date = endDate
+    return apiClient.get<UsageTimeseries>('/api/analytics/usage/timeseries', { params })
+  },
+
   getTopAgents: (limit = 10) =>
     apiClient.get<{ agents: TopAgent[] }>('/api/analytics/top-agents', {
       params: { limit }
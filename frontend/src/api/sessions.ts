@@ -8,7 +8,22 @@ export const sessionsApi = {
     channel?: string
   }) => apiClient.post<Session>('/api/sessions', data),
 
-  get: (id: string) => apiClient.get<Session>(`/api/sessions/${id}`),
+  get: (id: string, params?: { limit?: number; after?: string }) =>
+    apiClient.get<Session>(`/api/sessions/${id}`, { params }),
+
+  // Full transcript, following next_cursor page by page
+  getMessages: async (id: string) => {
+    const messages: Message[] = []
+    let after: string | undefined
+    do {
+      const { data } = await apiClient.get<Session>(`/api/sessions/${id}`, {
+        params: { limit: 500, after }
+      })
+      messages.push(...(data.messages ?? []))
+      after = data.next_cursor ?? undefined
+    } while (after)
+    return { data: messages }
+  },
 
   sendMessage: (sessionId: string, content: string, idempotencyKey?: string) =>
     apiClient.post<Message>(
@@ -2,7 +2,9 @@ import { useState } from 'react'
 import { DollarSign, MessageSquare, Hash, TrendingUp } from 'lucide-react'
 import { useQuery } from '@tanstack/react-query'
 import { analyticsApi } from '../api/analytics'
-import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer } from 'recharts'
+import { BarChart, Bar, LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer } from 'recharts'
+
+const SERIES_COLORS = ['#3b82f6', '#10b981', '#f59e0b', '#8b5cf6', '#ef4444']
 
 export default function Analytics() {
   const [dateRange, setDateRange] = useState({ start: '', end: '' })
@@ -15,6 +17,22 @@ export default function Analytics() {
     }
   })
 
+  const { data: timeseries } = useQuery({
+    queryKey: ['analytics', 'timeseries', dateRange],
+    queryFn: async () => {
+      const { data } = await analyticsApi.getUsageTimeseries('day', 'provider', dateRange.start, dateRange.end)
+      return data
+    }
+  })
+
+  const costByDay = timeseries?.buckets.map((bucket, i) => {
+    const point: Record<string, string | number> = { day: bucket.slice(0, 10) }
+    timeseries.series.forEach((series) => {
+      point[series.label] = parseFloat(series.cost_usd[i])
+    })
+    return point
+  })
+
   const { data: topAgents } = useQuery({
     queryKey: ['analytics', 'top-agents'],
     queryFn: async () => {
@@ -58,6 +76,31 @@ export default function Analytics() {
         />
       </div>
 
+      {/* Daily Cost */}
+      {timeseries && costByDay && (
+        <div className="card mb-8">
+          <h2 className="text-lg font-semibold mb-4">Daily Cost by Provider</h2>
+          <ResponsiveContainer width="100%" height={300}>
+            <LineChart data={costByDay}>
+              <CartesianGrid strokeDasharray="3 3" />
+              <XAxis dataKey="day" />
+              <YAxis />
+              <Tooltip />
+              <Legend />
+              {timeseries.series.map((series, i) => (
+                <Line
+                  key={series.key}
+                  type="monotone"
+                  dataKey={series.label}
+                  stroke={SERIES_COLORS[i % SERIES_COLORS.length]}
+                  dot={false}
+                />
+              ))}
+            </LineChart>
+          </ResponsiveContainer>
+        </div>
+      )}
+
       {/* Provider Breakdown */}
       {usage && (
         <div className="card mb-8">
@@ -20,6 +20,7 @@ export interface Session {
   metadata: Record<string, any>
   created_at: string
   messages?: Message[]
+  next_cursor?: string | null
 }
 
 export interface Message {
@@ -51,6 +52,22 @@ export interface UsageAnalytics {
   }>
 }
 
+export interface UsageSeries {
+  key: string
+  label: string
+  messages: number[]
+  tokens_in: number[]
+  tokens_out: number[]
+  cost_usd: string[]
+}
+
+export interface UsageTimeseries {
+  bucket: 'hour' | 'day'
+  group_by: 'provider' | 'agent'
+  buckets: string[]
+  series: UsageSeries[]
+}
+
 export interface TopAgent {
   agent_id: string
   agent_name: string